@@ -0,0 +1,81 @@
+#control-rate coefficient benchmark
+# renders the same chord at several control periods & reports voice render time & error vs. per-sample coefficients
+# usage (from the repo root): python -m benchmarks.control_rate [patch] [--periods 1 8 16 32 64] [--seconds 4]
+import argparse
+import random
+import numpy as np
+import mido
+from subsnake.audio import AudioEngine
+
+block_size = 512
+chord = [48, 55, 60, 64, 67, 71, 74, 79]
+
+def render_chord(patch, control_period, seconds, filter_type):
+    random.seed(1)
+    np.random.seed(1)
+    engine = AudioEngine(realtime=False, sample_rate=44100, control_period=control_period)
+    engine.load_patch(patch)
+    engine.set_midi_channel(1)
+    engine.update_mode(filter_type)
+    #deterministic voices (numba's rng isn't seeded from python): no drift, no sample & hold
+    engine.update_osc_drift(0.0)
+    engine.update_lfo1_shape(0)
+    #modulate cutoff & envelope times (lfo 1, menv 1) so coefficients change every sample
+    engine.update_lfo1_freq(3.0)
+    engine.update_mod_mode("filt_freq", 1)
+    engine.update_mod_value("filt_freq", 0.5)
+    engine.update_mod_mode("env_rel", 3)
+    engine.update_mod_value("env_rel", 0.5)
+    engine.render_offline([], 0.1)
+    engine.render_workers.reset_stats()
+
+    total_frames = int(seconds*engine.fs)
+    release_frame = total_frames//2
+    output = np.zeros((total_frames, 2), dtype=np.float32)
+    events = [(0, mido.Message("note_on", note=note, velocity=100, channel=0)) for note in chord]
+    voice_time = 0.0
+    voice_frames = 0
+    block_start = 0
+    while block_start < total_frames:
+        block_end = min(block_start + block_size, total_frames)
+        if block_start <= release_frame < block_end:
+            events = [(release_frame - block_start, mido.Message("note_off", note=note, channel=0)) for note in chord]
+        engine.render(output[block_start:block_end], block_end - block_start, events)
+        events = []
+        render_times, _, batch_sizes = engine.render_workers.get_stats()
+        voice_time += float(np.sum(render_times))
+        voice_frames += int(np.sum(batch_sizes))*(block_end - block_start)
+        block_start = block_end
+    engine.close()
+    return output, voice_time, voice_frames, engine.fs
+
+def main():
+    parser = argparse.ArgumentParser(description="control-rate coefficient benchmark")
+    parser.add_argument("patch", nargs="?", default="subsnake/patches/based.json")
+    parser.add_argument("--periods", nargs="+", type=int, default=[1, 8, 16, 32, 64])
+    parser.add_argument("--seconds", type=float, default=4.0)
+    args = parser.parse_args()
+
+    for filter_type, filter_name in ((0, "chamberlin"), (1, "zdf")):
+        print(f"\n{filter_name} filter | {len(chord)} voices, {args.seconds}s")
+        print(f"{'period':>8} {'us/voice-block':>15} {'cpu %/voice':>12} {'saving':>8} {'max err':>10} {'rms err dB':>11}")
+        reference = None
+        reference_time = None
+        for period in args.periods:
+            output, voice_time, voice_frames, fs = render_chord(args.patch, period, args.seconds, filter_type)
+            voice_blocks = voice_frames/block_size
+            us_per_block = 1e6*voice_time/max(1, voice_blocks)
+            cpu_percent = 100.0*voice_time/max(1e-12, voice_frames/fs)
+            if reference is None:
+                reference = output
+                reference_time = us_per_block
+            error = output - reference
+            max_error = float(np.max(np.abs(error)))
+            rms_error = float(np.sqrt(np.mean(error**2)))
+            rms_signal = float(np.sqrt(np.mean(reference**2)))
+            rms_db = 20*np.log10(rms_error/rms_signal) if rms_error > 0.0 else -np.inf
+            saving = 100.0*(1.0 - us_per_block/reference_time)
+            print(f"{period:>8} {us_per_block:>15.1f} {cpu_percent:>12.3f} {saving:>7.1f}% {max_error:>10.2e} {rms_db:>11.1f}")
+
+if __name__ == "__main__":
+    main()
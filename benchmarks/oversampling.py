@@ -0,0 +1,121 @@
+#chamberlin filter oversampling benchmark
+# cpu per voice (engine, 8 voice chord) & aliasing (filter alone, driven sine) at each oversampling factor
+# usage (from the repo root): python -m benchmarks.oversampling [patch] [--factors 8 4 2 1 0] [--seconds 4]
+import argparse
+import random
+import time
+import numpy as np
+import mido
+from subsnake.audio import AudioEngine
+from subsnake.audio.filters import HalSVF
+
+block_size = 512
+chord = [48, 55, 60, 64, 67, 71, 74, 79]
+#aliasing cases: (name, test tone Hz, cutoff Hz, drive, saturation, resonance)
+alias_cases = [("dark", 1234.5, 800.0, 1.0, 8.0, 1.0),
+               ("dark+driven", 1234.5, 1500.0, 9.0, 8.0, 1.0),
+               ("mid+driven", 1234.5, 3000.0, 9.0, 8.0, 1.0),
+               ("mid+resonant", 1234.5, 5000.0, 4.0, 8.0, 0.1),
+               ("bright+driven", 3210.5, 7000.0, 9.0, 8.0, 1.0),
+               ("bright+sat", 3210.5, 12000.0, 9.0, 1.0, 1.0)]
+alias_frames = 1 << 16
+
+def factor_name(factor):
+    return "auto" if factor == 0 else f"{factor}x"
+
+def render_chord(patch, factor, seconds):
+    random.seed(1)
+    np.random.seed(1)
+    engine = AudioEngine(realtime=False, sample_rate=44100)
+    engine.load_patch(patch)
+    engine.set_midi_channel(1)
+    engine.update_mode(0)
+    engine.update_osc_drift(0.0)
+    engine.update_oversample(factor)
+    engine.render_offline([], 0.1)
+    engine.render_workers.reset_stats()
+
+    total_frames = int(seconds*engine.fs)
+    output = np.zeros((total_frames, 2), dtype=np.float32)
+    events = [(0, mido.Message("note_on", note=note, velocity=100, channel=0)) for note in chord]
+    voice_time = 0.0
+    voice_frames = 0
+    block_start = 0
+    while block_start < total_frames:
+        block_end = min(block_start + block_size, total_frames)
+        engine.render(output[block_start:block_end], block_end - block_start, events)
+        events = []
+        render_times, _, batch_sizes = engine.render_workers.get_stats()
+        voice_time += float(np.sum(render_times))
+        voice_frames += int(np.sum(batch_sizes))*(block_end - block_start)
+        block_start = block_end
+    engine.close()
+    return voice_time, voice_frames, engine.fs
+
+#filter kernel alone (stereo, us per block)
+def filter_time(factor, repeats=2000, fs=44100):
+    filt = HalSVF(0.0, 3000.0, 1.0, 4.0, 8.0, fs)
+    filt.update_oversample(factor)
+    t = np.arange(block_size)/fs
+    input = np.zeros((block_size, 2), dtype=np.float32)
+    input[:, 0] = 0.5*np.sin(2*np.pi*220.0*t)
+    input[:, 1] = input[:, 0]
+    output = np.zeros_like(input)
+    fenv = np.zeros_like(input)
+    no_mod = np.zeros((block_size), dtype=np.float32)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        filt.process_block(input, output, fenv, [no_mod]*5, [0.0]*5)
+    return 1e6*(time.perf_counter() - start)/repeats
+
+#energy outside the test tone's harmonics (aliases) relative to the harmonics (dB)
+def alias_ratio(factor, tone, cutoff, drive, saturate, resonance, fs=44100):
+    filt = HalSVF(0.0, cutoff, resonance, drive, saturate, fs)
+    filt.update_oversample(factor)
+    t = np.arange(alias_frames + 8192)/fs
+    input = np.zeros((len(t), 2), dtype=np.float32)
+    input[:, 0] = 0.5*np.sin(2*np.pi*tone*t)
+    input[:, 1] = input[:, 0]
+    output = np.zeros_like(input)
+    fenv = np.zeros_like(input)
+    no_mod = np.zeros((len(t)), dtype=np.float32)
+    filt.process_block(input, output, fenv, [no_mod]*5, [0.0]*5)
+    #4-term blackman-harris window (-92dB sidelobes)
+    n = np.arange(alias_frames)*(2*np.pi/alias_frames)
+    window = 0.35875 - 0.48829*np.cos(n) + 0.14128*np.cos(2*n) - 0.01168*np.cos(3*n)
+    spectrum = np.abs(np.fft.rfft(output[-alias_frames:, 0]*window))**2
+    freqs = np.fft.rfftfreq(alias_frames, 1.0/fs)
+    harmonic = np.zeros(len(freqs), dtype=bool)
+    for k in range(1, int((fs/2)/tone) + 1):
+        harmonic |= np.abs(freqs - k*tone) < 8*fs/alias_frames
+    signal = np.sum(spectrum[harmonic])
+    alias = np.sum(spectrum[~harmonic & (freqs > 20.0)])
+    return 10*np.log10(alias/signal)
+
+def main():
+    parser = argparse.ArgumentParser(description="chamberlin filter oversampling benchmark")
+    parser.add_argument("patch", nargs="?", default="subsnake/patches/based.json")
+    parser.add_argument("--factors", nargs="+", type=int, default=[8, 4, 2, 1, 0])
+    parser.add_argument("--seconds", type=float, default=4.0)
+    args = parser.parse_args()
+
+    print(f"cpu | {len(chord)} voices, {args.seconds}s, chamberlin filter")
+    print(f"{'factor':>8} {'us/voice-block':>15} {'cpu %/voice':>12} {'saving':>8} {'filter us/block':>16}")
+    reference_time = None
+    for factor in args.factors:
+        voice_time, voice_frames, fs = render_chord(args.patch, factor, args.seconds)
+        us_per_block = 1e6*voice_time/max(1, voice_frames/block_size)
+        cpu_percent = 100.0*voice_time/max(1e-12, voice_frames/fs)
+        if reference_time is None:
+            reference_time = us_per_block
+        saving = 100.0*(1.0 - us_per_block/reference_time)
+        print(f"{factor_name(factor):>8} {us_per_block:>15.1f} {cpu_percent:>12.3f} {saving:>7.1f}% {filter_time(factor):>16.1f}")
+
+    print("\naliasing | energy outside the tone's harmonics (dB re. harmonics)")
+    print(f"{'case':>14} " + " ".join(f"{factor_name(factor):>7}" for factor in args.factors))
+    for name, tone, cutoff, drive, saturate, resonance in alias_cases:
+        ratios = [alias_ratio(factor, tone, cutoff, drive, saturate, resonance) for factor in args.factors]
+        print(f"{name:>14} " + " ".join(f"{ratio:>7.1f}" for ratio in ratios))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+#dsp benchmark suite
+# kernels: ns/sample per kernel at several block sizes, unmodulated & with every mod input routed
+# engine: AudioEngine.callback cost at 1/4/8/16 held voices for each bundled patch (ns/sample & real-time factor)
+# results are written as json | compare mode flags entries that got slower than a baseline (exit code 1)
+# usage (from the repo root):
+#  python -m benchmarks.suite [--out results.json] [--blocks 64 256 1024] [--voices 1 4 8 16] [--patches based ...] [--skip-engine] [--skip-kernels]
+#  python -m benchmarks.suite --compare baseline.json [results.json] [--threshold 10]
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import numba
+import mido
+from subsnake.audio import AudioEngine, WrappedOsc, HalSVF, ZDFSVF, ADSR, LFO, ModEnv
+from subsnake.audio.effects import StereoDelay, AudioRecorder, delay_block_entry, process_samples_entry, pan_samples_entry
+from subsnake.audio.filters import filter_block_hal_entry, filter_block_zdf_entry
+from subsnake.audio.envelopes import envelope_block_entry
+from subsnake.audio.modulators import lfo_block_entry, menv_block_entry
+from subsnake.audio.engine import dc_hpf_entry, part_block_entry, bus_block_entry, master_gain
+from subsnake.audio.voice import VoiceBank
+from subsnake.audio.compiler import compile_kernels
+from subsnake.audio import aot, generators
+
+fs = 44100
+patch_dir = Path(__file__).parent.parent / "subsnake" / "patches"
+#held notes (voice n plays chord[n])
+chord = [36, 43, 48, 52, 55, 59, 62, 64, 67, 71, 72, 74, 76, 79, 83, 86]
+routings = ("none", "mod")
+trials = 5
+kernel_samples = 1 << 18     #samples per trial (per kernel case)
+
+#mod inputs: silent or a slow full-scale sine | amount: 0 or 0.5
+def mod_inputs(frames, routing, count):
+    if routing == "none":
+        return [np.zeros((frames), dtype=np.float32)]*count, 0.0
+    t = np.arange(frames, dtype=np.float32)/fs
+    return [np.ascontiguousarray(np.sin(2*np.pi*(3.0 + n)*t).astype(np.float32)) for n in range(0, count)], 0.5
+
+#kernel cases: name -> build(frames, routing) | build returns a callable rendering one block
+def osc_case(alg):
+    def build(frames, routing):
+        osc = WrappedOsc(1, 0.5, 220.0, fs)
+        out = np.zeros((frames), dtype=np.float32)
+        walk = np.zeros((frames), dtype=np.float32)
+        (pm, dm, am, wm), amt = mod_inputs(frames, routing, 4)
+        amp, freq, width, rate = 0.5, 220.0, 0.5, osc.rate
+        calls = {"generate_sine": lambda: generators.generate_sine(osc.state, out, walk, 0.0, width, pm, dm, am, wm, amt, amt, amt, amt, amp, freq, rate),
+                 "polyblep_saw": lambda: generators.polyblep_saw(osc.state, out, width, walk, 0.0, pm, dm, am, wm, amt, amt, amt, amt, amp, freq, rate),
+                 "polyblep_pulse": lambda: generators.polyblep_pulse(osc.state, out, osc.state2, width, walk, 0.0, pm, dm, am, wm, amt, amt, amt, amt, amp, freq, rate),
+                 "polyblep_triangle": lambda: generators.polyblep_triangle(osc.state, osc.blep_integrator, osc.smoothed_blep_width, osc.output_hpf, out, osc.state2, width,
+                                                                           walk, 0.0, pm, dm, am, wm, amt, amt, amt, amt, amp, freq, rate),
+                 "blit_saw": lambda: generators.blit_saw(out, osc.blit_states, osc.blit_integrators, width, walk, 0.0, pm, dm, am, wm, amt, amt, amt, amt, amp, freq, rate),
+                 "blit_pulse": lambda: generators.blit_pulse(out, osc.blit_states, osc.blit_integrators, osc.smoothed_widths,
+                                                             walk, 0.0, pm, dm, am, wm, amt, amt, amt, amt, amp, freq, width, rate),
+                 "blit_triangle": lambda: generators.blit_triangle(out, osc.blit_states, osc.blit_integrators, osc.smoothed_widths, osc.blit_env_follower,
+                                                                   walk, 0.0, pm, dm, am, wm, amt, amt, amt, amt, amp, freq, width, rate),
+                 "table_saw": lambda: generators.table_saw(out, osc.blit_states, osc.tables, width, walk, 0.0, pm, dm, am, wm, amt, amt, amt, amt, amp, freq, rate),
+                 "table_pulse": lambda: generators.table_pulse(out, osc.blit_states, osc.smoothed_widths, osc.tables,
+                                                               walk, 0.0, pm, dm, am, wm, amt, amt, amt, amt, amp, freq, width, rate),
+                 "table_triangle": lambda: generators.table_triangle(out, osc.blit_states, osc.smoothed_widths, osc.tables,
+                                                                     walk, 0.0, pm, dm, am, wm, amt, amt, amt, amt, amp, freq, width, rate)}
+        return calls[alg]
+    return build
+
+def filter_case(zdf):
+    def build(frames, routing):
+        filt = ZDFSVF(fs) if zdf else HalSVF(0.0, 1500.0, 1.0, 2.0, 8.0, fs)
+        filt.update_cutoff(1500.0)
+        t = np.arange(frames)/fs
+        input = np.zeros((frames, 2), dtype=np.float32)
+        input[:, 0] = 0.5*np.sin(2*np.pi*220.0*t)
+        input[:, 1] = input[:, 0]
+        output = np.zeros_like(input)
+        fenv = np.ones_like(input)
+        (fm, rm, dm, sm, em), amt = mod_inputs(frames, routing, 5)
+        mod_vals = np.full((5), amt, dtype=np.float32)
+        if zdf:
+            return lambda: filter_block_zdf_entry(input, output, filt.integrator_states, filt.params, fenv, fm, rm, dm, sm, em, mod_vals, filt.fs, 1, 2)
+        return lambda: filter_block_hal_entry(input, output, filt.integrators, filt.params, fenv, fm, rm, dm, sm, em, mod_vals, filt.fs, 1, 2, filt.oversample)
+    return build
+
+def envelope_case(frames, routing):
+    env = ADSR(0.01, 0.5, 0.5, 0.5, fs)
+    input = np.ones((frames, 2), dtype=np.float32)
+    output = np.zeros_like(input)
+    (am, dm, sm, rm), amt = mod_inputs(frames, routing, 4)
+    return lambda: envelope_block_entry(env.state, True, input, output, am, dm, sm, rm, amt, amt, amt, amt,
+                                        env.attack, env.decay, env.sustain, env.release, env.fs, 1)
+
+def lfo_case(shape):
+    def build(frames, routing):
+        lfo = LFO(fs, 5.0, 0.0, shape)
+        (fm, pm), amt = mod_inputs(frames, routing, 2)
+        return lambda: lfo_block_entry(lfo.params, lfo.states, lfo.output[:frames], fm, pm, amt, amt)
+    return build
+
+def menv_case(mode):
+    def build(frames, routing):
+        menv = ModEnv(fs, 0.05, 0.05, mode)
+        #gate held (loop keeps cycling, AR/AHR run their attack then hold/settle)
+        menv.params[3] = 1.0
+        (am, rm), amt = mod_inputs(frames, routing, 2)
+        return lambda: menv_block_entry(menv.params, menv.value, menv.flags, menv.output[:frames], am, rm, amt, amt)
+    return build
+
+def delay_case(frames, routing):
+    delay = StereoDelay(fs, 0.3, 0.5, 0.5)
+    input = np.random.default_rng(1).uniform(-0.5, 0.5, (frames, 2)).astype(np.float32)
+    output = np.zeros_like(input)
+    (tm, fm, mm), amt = mod_inputs(frames, routing, 3)
+    return lambda: delay_block_entry(input, output, delay.buffer, delay.offset, delay.offset_smooth, delay.write_heads, delay.delay_feedback, delay.mix_level,
+                                     tm, fm, mm, amt, amt, amt, delay.tm_amount_smooth, float(delay.fs))
+
+#recorder (recording, looping) | no mod inputs, both routings time the same path
+def recorder_case(frames, routing):
+    rec_buffer = np.zeros((fs*4, 2), dtype=np.float32)
+    indata = np.random.default_rng(1).uniform(-0.5, 0.5, (frames, 2)).astype(np.float32)
+    outdata = np.zeros_like(indata)
+    play_heads = np.zeros((2), dtype=np.int32)
+    end_heads = np.zeros((2), dtype=np.int32)
+    smoothers = [np.zeros((1, 2), dtype=np.float32) for n in range(0, 3)]
+    paused, stopped, record, put_stop = (np.array([flag]) for flag in (False, False, True, False))
+    return lambda: process_samples_entry(rec_buffer, indata, outdata, frames, paused, stopped, record, True, play_heads, end_heads, put_stop,
+                                         np.float32(1.0), smoothers[0], smoothers[1], smoothers[2])
+
+def pan_case(frames, routing):
+    indata = np.random.default_rng(1).uniform(-0.5, 0.5, (frames, 2)).astype(np.float32)
+    outdata = np.zeros_like(indata)
+    (pm,), amt = mod_inputs(frames, routing, 1)
+    return lambda: pan_samples_entry(indata, outdata, 0.25, pm, amt)
+
+def dc_hpf_case(frames, routing):
+    buffer = np.random.default_rng(1).uniform(-0.5, 0.5, (frames, 2)).astype(np.float32)
+    states = np.zeros((2), dtype=np.float32)
+    g = math.tan(math.pi*6.667/fs)
+    return lambda: dc_hpf_entry(buffer, states, g)
+
+#voice bus (16 voices summed & delay on) | ns/sample of the voice bus, not per voice
+def part_case(frames, routing):
+    bank = VoiceBank(16)
+    bank.outputs[:] = np.random.default_rng(1).uniform(-0.1, 0.1, bank.outputs.shape).astype(np.float32)
+    active = np.arange(16, dtype=np.int64)
+    outdata = np.zeros((frames, 2), dtype=np.float32)
+    part_output = np.zeros((frames, 2), dtype=np.float32)
+    delay = StereoDelay(fs, 0.3, 0.5, 0.5)
+    (tm, fm, mm), amt = mod_inputs(frames, routing, 3)
+    return lambda: part_block_entry(outdata, part_output, bank.outputs, active, frames,
+                                    True, delay.buffer, delay.offset, delay.offset_smooth, delay.write_heads, delay.delay_feedback,
+                                    delay.mix_level, tm, fm, mm, amt, amt, amt, delay.tm_amount_smooth, float(delay.fs))
+
+#master bus (recorder recording) | ns/sample of the bus
+def bus_case(frames, routing):
+    outdata = np.random.default_rng(1).uniform(-0.5, 0.5, (frames, 2)).astype(np.float32)
+    rec_output = np.zeros((frames, 2), dtype=np.float32)
+    states = np.zeros((2), dtype=np.float32)
+    recorder = AudioRecorder(fs)
+    recorder.set_record(True)
+    recorder.set_loop(True)
+    recorder.play()
+    recorder.end_heads[:] = fs
+    scope_buffer = np.zeros((16384, 2), dtype=np.float32)
+    scope_head = np.zeros((1), dtype=np.int64)
+    g = math.tan(math.pi*6.667/fs)
+    return lambda: bus_block_entry(outdata, frames, states, g,
+                                   True, rec_output, recorder.record_buffer, recorder.paused, recorder.stopped, recorder.record, recorder.loop, recorder.play_heads,
+                                   recorder.end_heads, recorder.put_stop, recorder.input_level, recorder.input_level_smooth, recorder.output_level_smooth,
+                                   recorder.rec_gate_smooth, master_gain, scope_buffer, scope_head)
+
+kernel_cases = {**{f"osc.{alg}": osc_case(alg) for alg in ("generate_sine", "polyblep_saw", "polyblep_pulse", "polyblep_triangle",
+                                                            "blit_saw", "blit_pulse", "blit_triangle", "table_saw", "table_pulse", "table_triangle")},
+                "filter_block_hal": filter_case(False), "filter_block_zdf": filter_case(True),
+                "envelope_block": envelope_case,
+                **{f"lfo.{name}": lfo_case(shape) for name, shape in (("sine", 0), ("triangle", 1), ("ramp", 2), ("sawtooth", 3), ("square", 4), ("sample_hold", 5))},
+                **{f"menv.{name}": menv_case(mode) for name, mode in (("AR", 0), ("AHR", 1), ("loop", 2))},
+                "delay_block": delay_case, "process_samples": recorder_case, "pan_samples": pan_case, "dc_hpf": dc_hpf_case,
+                "part_block": part_case, "bus_block": bus_case}
+
+#best of trials (ns/sample)
+def time_block(call, frames, samples=kernel_samples):
+    call()
+    repeats = max(8, samples//frames)
+    best = math.inf
+    for _ in range(trials):
+        start = time.perf_counter_ns()
+        for _ in range(repeats):
+            call()
+        best = min(best, (time.perf_counter_ns() - start)/(repeats*frames))
+    return best
+
+def bench_kernels(blocks):
+    results = {}
+    for name, build in kernel_cases.items():
+        results[name] = {}
+        for frames in blocks:
+            results[name][str(frames)] = {routing: time_block(build(frames, routing), frames) for routing in routings}
+        row = " ".join(f"{results[name][str(frames)]['none']:>7.1f}/{results[name][str(frames)]['mod']:<7.1f}" for frames in blocks)
+        print(f"{name:<24} {row}", flush=True)
+    return results
+
+#engine callback with n held voices (block frames per call) | ns/sample, real-time factor (callback time/block duration)
+def bench_engine(patch, voices, block, seconds):
+    random.seed(1)
+    np.random.seed(1)
+    engine = AudioEngine(realtime=False, sample_rate=fs)
+    engine.load_patch(patch)
+    engine.set_midi_channel(1)
+    events = [(0.0, mido.Message("note_on", note=note, velocity=100, channel=0)) for note in chord[:voices]]
+    engine.render_offline(events, 0.25)
+    outdata = np.zeros((block, 2), dtype=np.float32)
+    calls = max(1, int(seconds*fs)//block)
+    times = np.zeros((calls), dtype=np.float64)
+    for n in range(0, calls):
+        start = time.perf_counter()
+        engine.callback(outdata, block, None, None)
+        times[n] = time.perf_counter() - start
+    active = sum(1 for voice in engine.voices if voice.status != 0)
+    engine.close()
+    block_time = block/fs
+    return {"ns_per_sample": 1e9*float(np.median(times))/block, "rtf": float(np.median(times))/block_time,
+            "rtf_max": float(np.max(times))/block_time, "active_voices": active}
+
+def bench_engines(patches, voice_counts, block, seconds):
+    results = {}
+    print(f"\nengine | {block} frame callback, median ns/sample (real-time factor), active voices")
+    for patch in patches:
+        name = patch.stem
+        results[name] = {str(voices): bench_engine(patch, voices, block, seconds) for voices in voice_counts}
+        row = " ".join(f"{results[name][str(v)]['ns_per_sample']:>8.1f} ({results[name][str(v)]['rtf']:.3f}, {results[name][str(v)]['active_voices']:>2})" for v in voice_counts)
+        print(f"{name:<16} {row}", flush=True)
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    return {"commit": git_commit(), "python": platform.python_version(), "numpy": np.__version__, "numba": numba.__version__,
+            "machine": platform.machine(), "processor": platform.processor(), "cpus": os.cpu_count(), "aot": aot.compiled is not None,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+#flatten results to {path: ns/sample} (kernels: name/block/routing, engine: patch/voices)
+def flatten(results):
+    flat = {}
+    for name, blocks in results.get("kernels", {}).items():
+        for frames, by_routing in blocks.items():
+            for routing, ns in by_routing.items():
+                flat[f"kernels/{name}/{frames}/{routing}"] = ns
+    for patch, by_voices in results.get("engine", {}).items():
+        for voices, entry in by_voices.items():
+            flat[f"engine/{patch}/{voices}"] = entry["ns_per_sample"]
+    return flat
+
+#relative change per entry | returns regressions (slower by more than threshold %)
+def compare(baseline, current, threshold):
+    base = flatten(baseline)
+    new = flatten(current)
+    shared = [path for path in base if path in new]
+    regressions = []
+    print(f"{'entry':<48} {'base':>9} {'new':>9} {'change':>8}")
+    for path in shared:
+        change = 100.0*(new[path]/base[path] - 1.0) if base[path] > 0.0 else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  regression"
+            regressions.append((path, change))
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{path:<48} {base[path]:>9.1f} {new[path]:>9.1f} {change:>+7.1f}%{flag}")
+    missing = [path for path in base if path not in new]
+    if missing:
+        print(f"\n{len(missing)} baseline entries missing from the new results")
+    print(f"\n{len(shared)} entries compared | {len(regressions)} slower than {threshold:.0f}% (baseline {baseline['environment'].get('commit')}, new {current['environment'].get('commit')})")
+    return regressions
+
+def run(args):
+    compile_kernels(wait=True)
+    results = {"environment": environment()}
+    if not args.skip_kernels:
+        print(f"kernels | ns/sample (unmodulated/modulated) at block sizes {args.blocks}")
+        results["kernels"] = bench_kernels(args.blocks)
+    if not args.skip_engine:
+        if args.patches:
+            patches = [patch_dir / f"{name}.json" for name in args.patches]
+        else:
+            patches = sorted(patch_dir.glob("*.json"))
+        results["engine"] = bench_engines(patches, args.voices, args.engine_block, args.seconds)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="subsnake dsp benchmark suite")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--blocks", nargs="+", type=int, default=[64, 256, 1024])
+    parser.add_argument("--voices", nargs="+", type=int, default=[1, 4, 8, 16])
+    parser.add_argument("--patches", nargs="+", help="patch names (default: every bundled patch)")
+    parser.add_argument("--engine-block", type=int, default=512)
+    parser.add_argument("--seconds", type=float, default=2.0, help="engine time per patch & voice count")
+    parser.add_argument("--skip-kernels", action="store_true")
+    parser.add_argument("--skip-engine", action="store_true")
+    parser.add_argument("--compare", nargs="+", metavar=("BASELINE", "RESULTS"), help="compare results (default: a new run) against a baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold (%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], "r") as f:
+            baseline = json.load(f)
+        if len(args.compare) > 1:
+            with open(args.compare[1], "r") as f:
+                current = json.load(f)
+        else:
+            current = run(args)
+            with open(args.out, "w") as f:
+                json.dump(current, f, indent=1)
+            print()
+        regressions = compare(baseline, current, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    results = run(args)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=1)
+    print(f"\nwrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('subsnake', 'subsnake')],
-    hiddenimports=['mido.backends.rtmidi'],
+    hiddenimports=['mido.backends.rtmidi', 'subsnake.audio._kernels'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
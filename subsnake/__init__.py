@@ -1,6 +1,12 @@
-from .gui.window import MainWindow
 from .audio.engine import AudioEngine
 from .audio.generators import WrappedOsc
 from .audio.filters import HalSVF, ZDFSVF
 from .audio.envelopes import ADSR
-from .audio.modulators import LFO, ModEnv
\ No newline at end of file
+from .audio.modulators import LFO, ModEnv
+
+#gui (PySide6) loads on first use | the audio package imports without Qt
+def __getattr__(name):
+    if name == "MainWindow":
+        from .gui.window import MainWindow
+        return MainWindow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,11 @@
 from .filters import HalSVF, ZDFSVF
 from .generators import WrappedOsc
 from .envelopes import ADSR
-from .engine import AudioEngine
-from .workers import KeyEventWorker
+from .engine import AudioEngine, MultiEngine
+from .workers import RenderWorkers, EventDispatcher
+from .meter import LoadMeter
+from .rings import SPSCRing
 from .effects import StereoDelay, AudioRecorder, Panner
 from .modulators import LFO, ModEnv
-from .voice import Voice
+from .voice import Voice, VoiceBank
+from .allocator import VoiceAllocator
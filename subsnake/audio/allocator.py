@@ -0,0 +1,85 @@
+from collections import OrderedDict
+
+#voice allocation modes (returned by VoiceAllocator.note_on)
+alloc_retrigger = 0     #voice already playing this note
+alloc_free = 1          #stopped voice
+alloc_release = 2       #oldest releasing voice
+alloc_steal = 3         #oldest held voice
+
+#polyphonic voice allocator
+# note -> voice map, free/releasing/held lists in age order (oldest first) | constant time note on/off
+class VoiceAllocator():
+    def __init__(self, voices=16):
+        self.voices = voices
+        self.note_to_voice = {}
+        self.voice_notes = [None] * voices
+        self.free_voices = OrderedDict((index, None) for index in range(0, voices))
+        self.released_voices = OrderedDict()
+        self.held_voices = OrderedDict()
+        #counters
+        self.note_ons = 0
+        self.retriggers = 0
+        self.release_steals = 0
+        self.steals = 0
+
+    #returns (voice index, allocation mode)
+    def note_on(self, note):
+        self.note_ons += 1
+        index = self.note_to_voice.get(note)
+        if index is not None:
+            self.retriggers += 1
+            self.released_voices.pop(index, None)
+            self.held_voices.pop(index, None)
+            self.held_voices[index] = None
+            return index, alloc_retrigger
+        if self.free_voices:
+            index, _ = self.free_voices.popitem(last=False)
+            mode = alloc_free
+        elif self.released_voices:
+            index, _ = self.released_voices.popitem(last=False)
+            self.note_to_voice.pop(self.voice_notes[index], None)
+            self.release_steals += 1
+            mode = alloc_release
+        else:
+            index, _ = self.held_voices.popitem(last=False)
+            self.note_to_voice.pop(self.voice_notes[index], None)
+            self.steals += 1
+            mode = alloc_steal
+        self.voice_notes[index] = note
+        self.note_to_voice[note] = index
+        self.held_voices[index] = None
+        return index, mode
+
+    #returns the released voice index (None if the note isn't held)
+    def note_off(self, note):
+        index = self.note_to_voice.get(note)
+        if (index is not None) and (index in self.held_voices):
+            del self.held_voices[index]
+            self.released_voices[index] = None
+        return index
+
+    #voice finished (amp. envelope off)
+    def voice_stopped(self, index):
+        if index in self.free_voices:
+            return
+        self.held_voices.pop(index, None)
+        self.released_voices.pop(index, None)
+        note = self.voice_notes[index]
+        if self.note_to_voice.get(note) == index:
+            del self.note_to_voice[note]
+        self.voice_notes[index] = None
+        self.free_voices[index] = None
+
+    def get_stats(self):
+        steal_rate = 0.0
+        if self.note_ons > 0:
+            steal_rate = (self.steals + self.release_steals)/self.note_ons
+        return {"note_ons": self.note_ons, "retriggers": self.retriggers, "release_steals": self.release_steals,
+                "steals": self.steals, "steal_rate": steal_rate, "free": len(self.free_voices),
+                "releasing": len(self.released_voices), "held": len(self.held_voices)}
+
+    def reset_stats(self):
+        self.note_ons = 0
+        self.retriggers = 0
+        self.release_steals = 0
+        self.steals = 0
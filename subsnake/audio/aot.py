@@ -0,0 +1,137 @@
+#ahead-of-time compiled dsp kernels
+# build (from the repo root, before freezing): python -m subsnake.audio.aot
+#  -> writes the subsnake.audio._kernels extension next to this file
+# python-level kernel calls resolve through kernel(): the aot build when it's importable, else the jit dispatcher
+# (set SUBSNAKE_JIT=1 to ignore an existing build)
+# each entry declares its signature next to the kernel (kernel(function, signature)) | exports are tagged with it,
+# so a build made for other argument types is never called (the entry stays on jit)
+import os
+import sys
+import time
+import zlib
+import subprocess
+from pathlib import Path
+
+module_name = "_kernels"
+
+#python-level entry points (module, function) | callees are compiled into each entry
+entry_points = (("subsnake.audio.voice", "route_block"), ("subsnake.audio.voice", "apply_shared_params"),
+                ("subsnake.audio.voice", "voice_block"), ("subsnake.audio.voice", "bank_block"),
+                ("subsnake.audio.voice", "sum_voices"),
+                ("subsnake.audio.generators", "osc_block"), ("subsnake.audio.generators", "unison_block"),
+                ("subsnake.audio.generators", "generate_walk"),
+                ("subsnake.audio.filters", "filter_block_hal"), ("subsnake.audio.filters", "filter_block_zdf"),
+                ("subsnake.audio.envelopes", "envelope_block"),
+                ("subsnake.audio.modulators", "lfo_block"), ("subsnake.audio.modulators", "menv_block"),
+                ("subsnake.audio.effects", "delay_block"), ("subsnake.audio.effects", "process_samples"),
+                ("subsnake.audio.effects", "pan_samples"),
+                ("subsnake.audio.engine", "dc_hpf"), ("subsnake.audio.engine", "part_block"),
+                ("subsnake.audio.engine", "bus_block"),
+                ("subsnake.gui.scope_gui", "ScopeGUI.update_display_math"))
+
+try:
+    if os.environ.get("SUBSNAKE_JIT"):
+        raise ImportError("jit forced")
+    from . import _kernels as compiled
+except ImportError:
+    compiled = None
+
+#declared signatures: export name -> numba signature string (arrays as any-layout [:], entry points receive slices & views)
+entry_signatures = {}
+
+def export_name(module, function):
+    return module.rsplit(".", 1)[-1] + "_" + function.rsplit(".", 1)[-1]
+
+#export name + signature checksum
+def tagged_name(name, signature):
+    return f"{name}_{zlib.crc32(signature.replace(' ', '').encode()):08x}"
+
+#aot build of a jit kernel (if exported with this signature), else the kernel itself
+def kernel(function, signature):
+    py_func = getattr(function, "py_func", function)
+    name = export_name(py_func.__module__, py_func.__name__)
+    entry_signatures[name] = signature
+    if compiled is None:
+        return function
+    exported = getattr(compiled, tagged_name(name, signature), None)
+    if exported is None:
+        print(f"warning: aot build has no {name} for {signature} (stale build?), using jit")
+        return function
+    return exported
+
+#run every entry point once (jit), so each dispatcher holds the signatures used at runtime
+# compile jobs first (one call per kernel), then an offline render
+def warm_up():
+    import mido
+    from .engine import AudioEngine, MultiEngine
+    from .compiler import compile_kernels
+    try:
+        from subsnake.gui import scope_gui
+    except ImportError:
+        pass
+    compile_kernels(wait=True)
+
+    events = [(0.0, mido.Message("note_on", note=60, velocity=100)), (0.05, mido.Message("note_off", note=60))]
+    for engine in (AudioEngine(realtime=False), MultiEngine(parts=1, realtime=False)):
+        engine.render_offline(events, 0.1)
+        engine.close()
+
+def resolve(module, function):
+    import importlib
+    target = importlib.import_module(module)
+    for part in function.split("."):
+        target = getattr(target, part)
+    return target
+
+#declared signature seen in warm_up (exported arrays are any-layout, so compare as such)
+# a declared type no call uses would make every aot call mismatch its arguments
+def signature_observed(dispatcher, signature):
+    from numba import types
+    from numba.core.sigutils import normalize_signature
+    declared = normalize_signature(signature)[0]
+    for args in dispatcher.signatures:
+        args = tuple(arg.copy(layout="A", readonly=False) if isinstance(arg, types.Array) else arg for arg in args)
+        if args == tuple(declared):
+            return True
+    return False
+
+def build(output_dir=None):
+    from numba.pycc import CC
+    if output_dir is None:
+        output_dir = Path(__file__).parent
+    start = time.perf_counter()
+    warm_up()
+    print(f"warm up: {time.perf_counter() - start:.1f}s")
+
+    cc = CC(module_name)
+    cc.output_dir = str(output_dir)
+    cc.verbose = False
+    for module, function in entry_points:
+        try:
+            dispatcher = resolve(module, function)
+        except ImportError as error:
+            print(f"skipped {module}.{function} ({error})")
+            continue
+        name = export_name(module, function)
+        signature = entry_signatures.get(name)
+        if signature is None:
+            print(f"skipped {module}.{function} (no declared signature)")
+            continue
+        if not signature_observed(dispatcher, signature):
+            print(f"skipped {module}.{function} (declared {signature}, called with {dispatcher.signatures})")
+            continue
+        cc.export(tagged_name(name, signature), signature)(dispatcher.py_func)
+        print(f"{name}: {signature}")
+
+    start = time.perf_counter()
+    cc.compile()
+    print(f"compiled {module_name} in {time.perf_counter() - start:.1f}s -> {output_dir}")
+
+if __name__ == "__main__":
+    #declared signatures are checked against the jit dispatchers, so re-run without an existing build loaded
+    if compiled is not None:
+        env = dict(os.environ, SUBSNAKE_JIT="1")
+        sys.exit(subprocess.call([sys.executable, "-m", "subsnake.audio.aot"] + sys.argv[1:], env=env))
+    #the registry kernel() fills (not this __main__ copy)
+    from subsnake.audio import aot
+    aot.build(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,114 @@
+#kernel compile registry
+# modules register compile jobs (one representative call per kernel) instead of compiling in their constructors
+# compile_kernels() runs every job once per process on a background thread | kernels_ready is set while no job is pending
+# (one thread: numba compiles under a global lock, so jobs can't overlap | the thread keeps the main thread free)
+# report: python -m subsnake.audio.compiler
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from numba.core.compiler_lock import global_compiler_lock
+from .aot import compiled
+
+#registered jobs: (name, kernel, job) | callee jobs are skipped with an aot build (callees are compiled into their entry points)
+compile_jobs = []
+#finished jobs: name -> (seconds, source)
+# source: "compile", "cache" (loaded from numba's disk cache), "shared" (already compiled by another job's kernel), "aot" or "error"
+compile_times = {}
+kernels_ready = threading.Event()
+registry_lock = threading.Lock()
+compile_state = {"pool": None, "pending": 0, "start": 0.0, "elapsed": 0.0}
+
+def kernel_name(kernel):
+    py_func = getattr(kernel, "py_func", kernel)
+    return py_func.__module__.rsplit(".", 1)[-1] + "." + py_func.__name__
+
+#decorator: register job() as the compile call for kernel
+def compile_job(kernel, callee=False):
+    def register(job):
+        if callee and (compiled is not None):
+            return job
+        name = kernel_name(kernel)
+        with registry_lock:
+            compile_jobs.append((name, kernel, job))
+            #late registration (module imported after compile_kernels): run it on the same thread, not ready until it has
+            if compile_state["pool"] is not None:
+                compile_state["pending"] += 1
+                kernels_ready.clear()
+                compile_state["pool"].submit(run_job, name, kernel, job)
+        return job
+    return register
+
+def cache_counts(kernel):
+    stats = getattr(kernel, "stats", None)
+    if stats is None:
+        return 0, 0
+    return sum(stats.cache_hits.values()), sum(stats.cache_misses.values())
+
+#numba compiles (and loads from its cache) under a global lock, so jobs hold it for the whole call:
+# per-kernel times exclude waits on compiles from other threads (e.g. a kernel's first jit call)
+def run_job(name, kernel, job):
+    try:
+        with global_compiler_lock:
+            hits, misses = cache_counts(kernel)
+            start = time.perf_counter()
+            job()
+            seconds = time.perf_counter() - start
+        new_hits, new_misses = cache_counts(kernel)
+        if not hasattr(kernel, "stats"):
+            source = "aot"
+        elif new_misses > misses:
+            source = "compile"
+        elif new_hits > hits:
+            source = "cache"
+        else:
+            source = "shared"
+    except Exception as error:
+        #left to compile on first use
+        print(f"error: compile job {name} failed ({error})")
+        seconds = 0.0
+        source = "error"
+    with registry_lock:
+        compile_times[name] = (seconds, source)
+        compile_state["pending"] -= 1
+        if compile_state["pending"] == 0:
+            compile_state["elapsed"] = time.perf_counter() - compile_state["start"]
+            kernels_ready.set()
+
+#start compiling every registered kernel in the background (once per process) | wait: block until done
+def compile_kernels(wait=False):
+    with registry_lock:
+        if compile_state["pool"] is None:
+            compile_state["pool"] = ThreadPoolExecutor(max_workers=1, thread_name_prefix="subsnake-compile")
+            compile_state["start"] = time.perf_counter()
+            compile_state["pending"] = len(compile_jobs)
+            if not compile_jobs:
+                kernels_ready.set()
+            for name, kernel, job in compile_jobs:
+                compile_state["pool"].submit(run_job, name, kernel, job)
+    if wait:
+        kernels_ready.wait()
+
+#(finished jobs, registered jobs)
+def compile_progress():
+    with registry_lock:
+        return len(compile_times), len(compile_jobs)
+
+#[(name, seconds, source)] slowest first, total wall time
+def compile_report():
+    with registry_lock:
+        report = sorted(((name, seconds, source) for name, (seconds, source) in compile_times.items()), key=lambda entry: -entry[1])
+        return report, compile_state["elapsed"]
+
+if __name__ == "__main__":
+    #the registry modules populate (not this __main__ copy)
+    from subsnake.audio import engine, compiler
+    try:
+        from subsnake.gui import scope_gui
+    except ImportError:
+        pass
+    compiler.compile_kernels(wait=True)
+    report, elapsed = compiler.compile_report()
+    print(f"{'kernel':<36} {'seconds':>8}  source")
+    for name, seconds, source in report:
+        print(f"{name:<36} {seconds:>8.3f}  {source}")
+    print(f"{len(report)} kernels in {elapsed:.2f}s")
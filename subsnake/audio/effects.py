@@ -1,9 +1,10 @@
 import numpy as np
 from numba import njit
-from queue import SimpleQueue
+from .aot import kernel
+from .compiler import compile_job
+from .rings import SPSCRing
 import math
 
-oneoverfs = 1.0/float(44100.0)
 twopi = 2*np.pi
 
 #stereo tape delay
@@ -16,23 +17,23 @@ class StereoDelay():
         self.delay_time = delay_time
         self.delay_feedback = delay_feedback
         self.write_heads = np.zeros((2), dtype=np.int32)
-        self.offset = 22050
-        self.offset_smooth = np.array([22050, 22050], dtype=np.float32)
+        self.offset = delay_time*fs
+        self.offset_smooth = np.array([self.offset, self.offset], dtype=np.float32)
         self.tm_amount_smooth = np.zeros((1, 2), dtype=np.float32)
         self.mix_level = mix
 
-        #init numba compile call
-        test_in = np.zeros((16, 2), dtype=np.float32)
-        test_out = np.zeros((16, 2), dtype=np.float32)
-        mod_test = np.zeros((16), dtype=np.float32)
-        mod_test_val = np.float32(0.0)
-        delay_block(test_in, test_out, self.buffer, self.offset, self.offset_smooth, self.write_heads, self.delay_feedback, self.mix_level,
-                         mod_test, mod_test, mod_test, mod_test_val, mod_test_val, mod_test_val, self.tm_amount_smooth)
-
     def process_block(self, input, output, mod_buffers, mod_values):
+        self.start_block()
+        delay_block_entry(input, output, self.buffer, self.offset, self.offset_smooth, self.write_heads, self.delay_feedback, self.mix_level,
+                               mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_values[0], mod_values[1], mod_values[2], self.tm_amount_smooth, float(self.fs))
+
+    #block-rate parameters (before delay_block or the engine's master bus)
+    def start_block(self):
         self.offset = self.delay_time*self.fs
-        delay_block(input, output, self.buffer, self.offset, self.offset_smooth, self.write_heads, self.delay_feedback, self.mix_level,
-                         mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_values[0], mod_values[1], mod_values[2], self.tm_amount_smooth)
+
+    #silence the delay line (re-enabled after being skipped)
+    def clear(self):
+        self.buffer[:] = 0.0
 
     #helpers
     def update_time(self, new_time):
@@ -44,6 +45,10 @@ class StereoDelay():
     def update_mix(self, new_mix):
         self.mix_level = new_mix
 
+#recorder commands (gui -> audio: command_ring) & events (audio -> gui: event_ring)
+rec_delete = 1
+rec_stop = 2
+
 #stereo audio recorder/looper
 # 5m rec buffer | 
 class AudioRecorder():
@@ -53,24 +58,22 @@ class AudioRecorder():
         self.record_buffer = np.ascontiguousarray(np.zeros((self.max_buffer_samples, 2), dtype=np.float32))
         self.play_heads = np.zeros((2), dtype=np.int32)
         self.end_heads = np.zeros((2), dtype=np.int32)
-        self.paused = [False]
-        self.stopped = [True]
-        self.record = [False]
+        #transport flags (1-element arrays: shared with the kernels without list reflection)
+        self.paused = np.zeros((1), dtype=np.bool_)
+        self.stopped = np.ones((1), dtype=np.bool_)
+        self.record = np.zeros((1), dtype=np.bool_)
         self.loop = False
-        self.event_queue = SimpleQueue()
-        self.delete_queue = SimpleQueue()
-        self.put_stop = [False]
+        self.event_ring = SPSCRing(np.int32, 16)
+        self.command_ring = SPSCRing(np.int32, 16)
+        self.command = np.zeros((1), dtype=np.int32)
+        self.put_stop = np.zeros((1), dtype=np.bool_)
         self.input_level = np.float32(1.0)
         self.input_level_smooth = np.zeros((1, 2), dtype=np.float32)
         self.output_level_smooth = np.zeros((1, 2), dtype=np.float32)
         self.rec_gate_smooth = np.zeros((1, 2), dtype=np.float32)
 
-        test_smoothers = np.zeros((1, 2), dtype=np.float32)
-        process_samples(np.zeros((32, 2), dtype=np.float32), np.zeros((16, 2), dtype=np.float32), np.zeros((16, 2), dtype=np.float32), 0,
-                              [False], [True], [False], False, np.zeros((2), dtype=np.int32), np.zeros((2), dtype=np.int32), [False], np.float32(1.0), test_smoothers, test_smoothers, test_smoothers)
-
     def delete(self):
-        self.delete_queue.put("delete")
+        self.command_ring.push(rec_delete)
     
     def play(self):
         self.paused[0] = False
@@ -98,10 +101,10 @@ class AudioRecorder():
         return status
 
     def get_time(self):
-        current_time_seconds = int(float(self.play_heads[0]) / 44100.0)
+        current_time_seconds = int(float(self.play_heads[0]) / float(self.fs))
         display_current_time_seconds = current_time_seconds % 60
         current_time_minutes = int(current_time_seconds / 60)
-        max_time_seconds = int(float(self.end_heads[0]) / 44100.0)
+        max_time_seconds = int(float(self.end_heads[0]) / float(self.fs))
         display_max_time_seconds = max_time_seconds % 60
         max_time_minutes = int(max_time_seconds / 60)
         output = (current_time_minutes, display_current_time_seconds, max_time_minutes, display_max_time_seconds)
@@ -109,51 +112,63 @@ class AudioRecorder():
 
     def process_block(self, indata, outdata):
         frames = len(indata)
-        #increment end heads, stop recording at end of buffer (if not looping) & reset play heads
         outdata[:frames] = 0.0
-        if not self.delete_queue.empty():
-            del_event = self.delete_queue.get_nowait()
-            if del_event == "delete":
+        if self.start_block(frames):
+            process_samples_entry(self.record_buffer, indata, outdata, frames, self.paused, self.stopped,
+                                      self.record, self.loop, self.play_heads, self.end_heads, self.put_stop, self.input_level, self.input_level_smooth, self.output_level_smooth, self.rec_gate_smooth)
+        self.end_block()
+
+    #block-rate transport (before process_samples or the engine's master bus) | returns True if the recorder runs this block
+    def start_block(self, frames):
+        #increment end heads, stop recording at end of buffer (if not looping) & reset play heads
+        if self.command_ring.pop(self.command):
+            if self.command[0] == rec_delete:
                 self.record_buffer[:max(self.end_heads[0], self.end_heads[1])] = 0.0
                 self.play_heads[:] = 0
                 self.end_heads[:] = 0
-                
-        if not self.stopped[0] and not self.paused[0]:
-            if self.record[0]:
-                if (self.end_heads[0] + frames) < self.max_buffer_samples:
-                    if (self.play_heads[0] + frames) >= self.end_heads[0]:
-                        if not self.loop:
-                            self.end_heads[:] += frames
-                else:
+
+        if self.stopped[0] or self.paused[0]:
+            return False
+        if self.record[0]:
+            if (self.end_heads[0] + frames) < self.max_buffer_samples:
+                if (self.play_heads[0] + frames) >= self.end_heads[0]:
                     if not self.loop:
-                        self.stopped[0] = True
-                        self.record[0] = False
-                    self.play_heads[:] = 0
-            process_samples(self.record_buffer, indata, outdata, frames, self.paused, self.stopped,
-                                self.record, self.loop, self.play_heads, self.end_heads, self.put_stop, self.input_level, self.input_level_smooth, self.output_level_smooth, self.rec_gate_smooth)
+                        self.end_heads[:] += frames
+            else:
+                if not self.loop:
+                    self.stopped[0] = True
+                    self.record[0] = False
+                self.play_heads[:] = 0
+        return True
+
+    #pass a stop from the audio thread to the gui
+    def end_block(self):
         if self.put_stop[0]:
             self.put_stop[0] = False
-            self.event_queue.put_nowait("stop")
+            self.event_ring.push(rec_stop)
 
 class Panner():
     def __init__(self):
         self.position = 0.0
-        test_data = np.zeros((16, 2), dtype=np.float32)
-        mod_test = np.zeros((16), dtype=np.float32)
-        mod_test_val = np.float32(0.0)
-        pan_samples(test_data, test_data, self.position, mod_test, mod_test_val)
+        self.params = np.zeros((1), dtype=np.float64)
 
     def process_block(self, indata, outdata, pan_mod, pm_amt):
-        pan_samples(indata, outdata, self.position, pan_mod, pm_amt)
+        pan_samples_entry(indata, outdata, self.position, pan_mod, pm_amt)
+
+    #move state into preallocated (voice-owned) arrays
+    def bind(self, params):
+        params[:] = self.params
+        self.params = params
 
     def update_position(self, new_pos):
         self.position = new_pos
+        self.params[0] = new_pos
 
 
 #numba DSP
 # delay
 @njit(nogil=True, fastmath=True, cache=True, inline="always")
-def delay_block(input, output, buffer, offset_raw, offset_smooth, write_heads, feedback, mix, time_mod, feedback_mod, mix_mod, tm_amt, fm_amt, mm_amt, tm_amt_smooth):
+def delay_block(input, output, buffer, offset_raw, offset_smooth, write_heads, feedback, mix, time_mod, feedback_mod, mix_mod, tm_amt, fm_amt, mm_amt, tm_amt_smooth, fs):
     frames = len(input)
     buffer_size = len(buffer)
     alpha = .0001
@@ -162,14 +177,16 @@ def delay_block(input, output, buffer, offset_raw, offset_smooth, write_heads, f
             #smooth offset
             offset_smooth[c] = offset_smooth[c]*(1.0 - alpha) + offset_raw*alpha
             tm_amt_smooth[0, c] = tm_amt_smooth[0, c]*(1.0 - alpha) + tm_amt*alpha
-            offset_mod = offset_smooth[c] + 22050.0*time_mod[n]*tm_amt_smooth[0, c]
-            offset_mod = max(0.0, min(44100.0, offset_mod))
+            offset_mod = offset_smooth[c] + 0.5*fs*time_mod[n]*tm_amt_smooth[0, c]
+            offset_mod = max(0.0, min(fs, offset_mod))
 
             #calculate read head position & wrap
             read_head_exact = write_heads[c] - offset_mod
             read_head_int = np.floor(read_head_exact)
             offset_frac = read_head_exact - read_head_int
-            read_head = int(read_head_int) % buffer_size
+            read_head = int(read_head_int)
+            if read_head < 0:       #offset_mod <= fs (half the buffer): one wrap at most
+                read_head += buffer_size
 
             #calculate interpolation indeces
             y0_index = read_head-1
@@ -239,3 +256,41 @@ def pan_samples(indata, outdata, position, pan_mod, pm_amt):
         outdata[n, 0] = indata[n, 0]*L_pos
         outdata[n, 1] = indata[n, 1]*R_pos
 
+# mono -> stereo panner (accumulates into outdata, scaled by gain)
+@njit(nogil=True, fastmath=True, cache=True)
+def pan_mono(indata, outdata, position, pan_mod, pm_amt, gain):
+    frames = len(indata)
+    for n in range(0, frames):
+        mod_pos = max(-1.0, min(1.0, position + pan_mod[n]*pm_amt))
+        sample = indata[n]*gain
+        outdata[n, 0] += sample*(1.0 - mod_pos)
+        outdata[n, 1] += sample*(1.0 + mod_pos)
+
+#python-level entry points (aot builds when available)
+delay_block_entry = kernel(delay_block, "void(float32[:, :], float32[:, :], float32[:, :], float64, float32[:], int32[:], float64, float64, "
+                                        "float32[:], float32[:], float32[:], float32, float32, float32, float32[:, :], float64)")
+process_samples_entry = kernel(process_samples, "void(float32[:, :], float32[:, :], float32[:, :], int64, boolean[:], boolean[:], boolean[:], "
+                                                "boolean, int32[:], int32[:], boolean[:], float32, float32[:, :], float32[:, :], float32[:, :])")
+pan_samples_entry = kernel(pan_samples, "void(float32[:, :], float32[:, :], float64, float32[:], float32)")
+
+#compile jobs (see compiler.py)
+@compile_job(delay_block_entry)
+def compile_delay_block():
+    delay = StereoDelay(44100)
+    mod_test = np.zeros((16), dtype=np.float32)
+    mod_test_val = np.float32(0.0)
+    delay_block_entry(np.zeros((16, 2), dtype=np.float32), np.zeros((16, 2), dtype=np.float32), delay.buffer, delay.offset, delay.offset_smooth, delay.write_heads,
+                      delay.delay_feedback, delay.mix_level, mod_test, mod_test, mod_test, mod_test_val, mod_test_val, mod_test_val, delay.tm_amount_smooth, float(delay.fs))
+
+@compile_job(process_samples_entry)
+def compile_process_samples():
+    test_smoothers = np.zeros((1, 2), dtype=np.float32)
+    process_samples_entry(np.zeros((32, 2), dtype=np.float32), np.zeros((16, 2), dtype=np.float32), np.zeros((16, 2), dtype=np.float32), 0,
+                          np.zeros((1), dtype=np.bool_), np.ones((1), dtype=np.bool_), np.zeros((1), dtype=np.bool_), False,
+                          np.zeros((2), dtype=np.int32), np.zeros((2), dtype=np.int32), np.zeros((1), dtype=np.bool_), np.float32(1.0),
+                          test_smoothers, test_smoothers, test_smoothers)
+
+@compile_job(pan_samples_entry)
+def compile_pan_samples():
+    test_data = np.zeros((16, 2), dtype=np.float32)
+    pan_samples_entry(test_data, test_data, 0.0, np.zeros((16), dtype=np.float32), np.float32(0.0))
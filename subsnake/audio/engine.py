@@ -1,33 +1,228 @@
 import numpy as np
 import math
 import mido
-import queue
 import sounddevice as sd
 import soundfile as sf
 import random
-import time as pytime
-import concurrent.futures
+import json
+from time import perf_counter
 from numba import njit
-from PySide6.QtCore import QThreadPool
-from .voice import Voice
-from .workers import KeyEventWorker
-from .effects import StereoDelay, AudioRecorder
+from .voice import Voice, VoiceBank, max_block_size, sum_voices
+from .workers import RenderWorkers, EventDispatcher, event_records, key_source, note_on_status, note_off_status, control_change_status
+from .meter import LoadMeter, voice_stage, modulator_stage, part_stage, bus_stage
+from .allocator import VoiceAllocator, alloc_free, alloc_retrigger
+from .effects import StereoDelay, AudioRecorder, process_samples, delay_block
 from .modulators import LFO, ModEnv
-
-fs = 44100
+from .filters import oversample_factors
+from .generators import max_unison
+from .aot import kernel
+from .compiler import compile_job, compile_kernels, kernels_ready
+
+default_fs = 44100
+sample_rates = (44100, 48000, 88200, 96000)
+block_sizes = (64, 128, 256, 512, 1024)    #fixed stream block sizes (low latency)
 twopi = 2*np.pi
 oneoverpi = 1/np.pi
 oott = 1.0/32.0
 middle_a = 69
 midi_latency = 0.0029025   #seconds
-hpf_g = math.tan(math.pi*6.667/fs)
-hpf_g_div = 1.0/(1.0 + hpf_g)
+master_gain = 0.288675     #before the tanh limiter
+
+#patch keys added after patches were first saved | patches without them load these values (unison off, 8x filter oversampling)
+patch_defaults = {"osc_unison": 1, "osc_spread": 0, "filt_oversample": 8}
+
+#patch conversions (slider value -> engine update function, divisor)
+patch_sliders = {"osc_freq": ("update_pitch_1", 250.0), "osc_det": ("update_detune_1", 20.0), "osc_width": ("update_width_1", 500.0),
+                 "osc2_freq": ("update_pitch_2", 100.0), "osc2_det": ("update_detune_2", 20.0), "osc2_width": ("update_width_2", 500.0),
+                 "osc3_freq": ("update_pitch_3", 100.0), "osc3_det": ("update_detune_3", 20.0), "osc3_width": ("update_width_3", 500.0),
+                 "osc_amp": ("update_amplitude_1", 500.0), "osc2_amp": ("update_amplitude_2", 500.0), "osc3_amp": ("update_amplitude_3", 500.0),
+                 "osc_pan": ("update_pan_1", 250.0), "osc2_pan": ("update_pan_2", 250.0), "osc3_pan": ("update_pan_3", 250.0),
+                 "filt_drive": ("update_drive", 40.0), "filt_sat": ("update_saturate", 100.0),
+                 "filt_track": ("update_key_tracking", 1000.0), "kt_amt": ("update_key_tracking", 1000.0),
+                 "fenv_att": ("update_fenv_attack", 250.0), "fenv_dec": ("update_fenv_decay", 250.0),
+                 "fenv_sus": ("update_fenv_sustain", 1000.0), "fenv_rel": ("update_fenv_release", 250.0), "fenv_amt": ("update_fenv_amount", 500.0),
+                 "env_att": ("update_attack", 250.0), "env_dec": ("update_decay", 250.0),
+                 "env_sus": ("update_sustain", 1000.0), "env_rel": ("update_release", 250.0),
+                 "del_time": ("update_del_time", 1000.0), "del_fback": ("update_del_feedback", 1000.0), "del_mix": ("update_del_mix", 1000.0),
+                 "lfo1_freq": ("update_lfo1_freq", 100.0), "lfo1_phase": ("update_lfo1_offset", 1000.0),
+                 "lfo2_freq": ("update_lfo2_freq", 100.0), "lfo2_phase": ("update_lfo2_offset", 1000.0),
+                 "menv1_att": ("update_menv1_att", 1000.0), "menv1_rel": ("update_menv1_rel", 1000.0),
+                 "menv2_att": ("update_menv2_att", 1000.0), "menv2_rel": ("update_menv2_rel", 1000.0),
+                 "osc_drift": ("update_osc_drift", 100.0),
+                 "osc_unison": ("update_osc_unison", 1.0), "osc_spread": ("update_osc_spread", 1000.0)}
+osc_numbers = {"osc": 1, "osc2": 2, "osc3": 3}
+osc_waves = {"sine": 0.0, "triangle": 3.0, "saw": 1.0, "pulse": 2.0}
+filt_types = {"low": 0.0, "high": 1.0, "band": 2.0, "notch": 3.0}
+lfo_shapes = {"sine": 0, "tri": 1, "ramp": 2, "saw": 3, "square": 4, "s+h": 5}
+menv_modes = {"AR": 0, "AHR": 1, "Loop": 2}
+#delay & delay modulator (lfo 1, lfo 2, menv 1, menv 2) mod destinations
+delay_mods = ("del_time", "del_feedback", "del_mix")
+delay_modulator_mods = (("lfo1_freq", "lfo1_phase"), ("lfo2_freq", "lfo2_phase"), ("menv1_att", "menv1_rel"), ("menv2_att", "menv2_rel"))
+
+#stream-side resources a MultiEngine shares with its parts (event rings, render threads, load meter & master bus state)
+shared_resources = ("event_dispatcher", "render_workers", "meter", "recorder", "recorder_output", "output_hpf_states",
+                    "scope_buffer", "scope_frames", "scope_head", "part_output")
+
+#device stream, midi input, event dispatch & sub-block render loop (shared by AudioEngine & MultiEngine)
+# subclasses own the stream-side resources (event_dispatcher, meter, render_workers, stream state) & define handle_event & render_block
+class StreamEngine():
+    #initialize stream
+    # block_size: None (device default block size, high latency) or one of block_sizes (fixed blocks, low latency)
+    def start_audio(self, block_size=None):
+        if (block_size is not None) and (block_size not in block_sizes):
+            raise ValueError(f"unsupported block size: {block_size} (supported: {block_sizes})")
+        self.block_size = block_size
+        if block_size is None:
+            self.sub_block_size = max_block_size
+            self.stream = sd.OutputStream(channels=2, samplerate=self.fs, blocksize=0, latency="high", callback=self.callback, dtype=np.float32)
+        else:
+            self.sub_block_size = block_size
+            self.stream = sd.OutputStream(channels=2, samplerate=self.fs, blocksize=block_size, latency="low", callback=self.callback, dtype=np.float32)
+        self.stream.start()
+
+    #reopen stream with a new block size
+    def set_latency(self, block_size):
+        if self.stream:
+            self.stream.stop()
+            self.stream.close()
+        self.start_audio(block_size)
+
+    def get_latency(self):
+        if self.stream:
+            return self.stream.latency
+        return 0.0
+
+    #event dispatch counters: (dispatched, queue depth, max queue depth, dispatch lag, max dispatch lag)
+    def get_event_stats(self):
+        return self.event_dispatcher.get_stats()
+
+    #dsp load (callback time/block deadline): (mean load, max load, max load since reset, xruns, callbacks) | last count callbacks
+    def get_load_stats(self, count=64):
+        return self.meter.get_stats(count)
+
+    #mean seconds per callback per stage (voices, modulators, sum+delay, recorder/limiter/scope) | last count callbacks
+    def get_stage_times(self, count=64):
+        return self.meter.get_stage_times(count)
+
+    def reset_load_stats(self):
+        self.meter.reset_stats()
+
+    def get_devices(self):
+        audio_devices = sd.query_devices()
+        return audio_devices
+
+    #offline render (no stream)
+    # events: iterable of (time in seconds, mido message) | returns (frames, 2) float32 array
+    def render_events(self, events, duration, filename=None, block_size=512):
+        kernels_ready.wait()
+        total_frames = int(duration*self.fs)
+        output = np.ascontiguousarray(np.zeros((total_frames, 2), dtype=np.float32))
+        pending = sorted(((max(0, int(event_time*self.fs)), message) for event_time, message in events), key=lambda event: event[0])
+        event_index = 0
+        block_start = 0
+        while block_start < total_frames:
+            block_end = min(block_start + block_size, total_frames)
+            #collect this block's events (frame offsets relative to block start)
+            block_events = []
+            while (event_index < len(pending)) and (pending[event_index][0] < block_end):
+                block_events.append((pending[event_index][0] - block_start, pending[event_index][1]))
+                event_index += 1
+            self.render(output[block_start:block_end], block_end - block_start, block_events)
+            block_start = block_end
+        if filename is not None:
+            sf.write(filename, output, self.fs)
+        return output
+
+    #initialize midi
+    def set_midi_input(self, port_name):
+        if self.midi_input:
+            self.midi_input.close()
+        
+        if port_name:
+            self.midi_input = mido.open_input(port_name, callback=self.midi_callback)
+
+    #midi callback
+    def midi_callback(self, message):
+        self.event_dispatcher.put(message)
 
-class AudioEngine():
-    def __init__(self):
-        #init compile dc_hpf
-        self.test_hpf_states = np.zeros((2), dtype=np.float32)
-        dc_hpf(np.zeros((16, 2), dtype=np.float32), self.test_hpf_states)
+    #midi helpers
+    def get_midi_inputs(self):
+        input_list = mido.get_input_names()
+        return input_list
+
+    #close stream/midi port, stop render workers
+    def close(self):
+        if self.stream:
+            self.stream.stop()
+            self.stream.close()
+            
+        if self.midi_input:
+            self.midi_input.close()
+
+        self.render_workers.stop()
+
+    #main audio callback
+    def callback(self, outdata, frames, time, status):
+        start = self.meter.start_callback()
+        #zero output buffer
+        outdata[:frames] = 0.0
+        #still compiling: drop events, output silence
+        if not kernels_ready.is_set():
+            self.event_dispatcher.drain(frames)
+        else:
+            #drain pending events (frame offsets in this block) & render
+            events = self.event_dispatcher.drain(frames)
+            self.render(outdata, frames, events)
+        self.meter.end_callback(start, frames, (status is not None) and status.output_underflow)
+
+    #render any number of frames in fixed internal sub-blocks (decouples buffer sizes from the host block size)
+    # events: block event records (frame offset, status, data 1, data 2) or [(frame offset, mido message)], in frame order
+    # sub-blocks are split at each event frame (sample accurate)
+    def render(self, outdata, frames, events=()):
+        if not isinstance(events, np.ndarray):
+            events = event_records(events)
+        event_frames, event_status, event_data1, event_data2 = events["frame"], events["status"], events["data1"], events["data2"]
+        block_start = 0
+        event_index = 0
+        while block_start < frames:
+            block_end = min(block_start + self.sub_block_size, frames)
+            while event_index < len(events):
+                event_frame = event_frames[event_index]
+                if event_frame > block_start:
+                    block_end = min(block_end, event_frame)
+                    break
+                self.handle_event(event_status[event_index], event_data1[event_index], event_data2[event_index])
+                event_index += 1
+            self.render_block(outdata[block_start:block_end], block_end - block_start)
+            block_start = block_end
+
+    #master bus (render_block, after the voice buses): dc blocker, recorder, limiter & scope write, in place on outdata
+    def render_bus(self, outdata, frames):
+        recorder = self.recorder
+        rec_on = recorder.start_block(frames)
+        bus_block_entry(outdata, frames, self.output_hpf_states, self.hpf_g,
+                        rec_on, self.recorder_output, recorder.record_buffer, recorder.paused, recorder.stopped, recorder.record, recorder.loop, recorder.play_heads,
+                        recorder.end_heads, recorder.put_stop, recorder.input_level, recorder.input_level_smooth, recorder.output_level_smooth, recorder.rec_gate_smooth,
+                        master_gain, self.scope_buffer, self.scope_head)
+        recorder.end_block()
+        self.scope_frames[0] = frames
+
+#synth engine: one patch, midi channel & 16 voice pool
+# standalone (own stream & master bus) or a part hosted by a MultiEngine (renders through the host's stream, workers & master bus)
+class AudioEngine(StreamEngine):
+    def __init__(self, realtime=True, sample_rate=None, control_period=1, host=None):
+        #sample rate (None: default output device rate, if supported | hosted: the host's rate)
+        if host is not None:
+            sample_rate = host.fs
+        if sample_rate is None:
+            sample_rate = native_sample_rate()
+        if sample_rate not in sample_rates:
+            raise ValueError(f"unsupported sample rate: {sample_rate} (supported: {sample_rates})")
+        self.fs = sample_rate
+        self.hpf_g = math.tan(math.pi*6.667/self.fs)
+
+        #compile kernels in the background (output is silent until kernels_ready)
+        compile_kernels()
 
         #mod dial value states (float)
         self.mod_dial_values = {"osc_freq": 0.0, "osc_det": 0.0, "osc_amp": 0.0, "osc_width": 0.0,
@@ -53,29 +248,38 @@ class AudioEngine():
                                 "menv1_att": 0, "menv1_rel": 0, "menv2_att": 0, "menv2_rel": 0}
         
         #instance voices & effects
+        self.voice_bank = VoiceBank(16, self.fs, control_period)
         self.voices = []
         for n in range(0, 16):
-            self.voices.append(Voice(self.mod_dial_values, self.mod_dial_modes))
-        self.delay = StereoDelay(fs)
-        self.delay_modulators = [LFO(fs, 5, 0, 0), LFO(fs, 5, 0, 0), ModEnv(fs, 0.5, 0.5, 0), ModEnv(fs, 0.5, 0.5, 0)]
-        self.no_mod = np.ascontiguousarray(np.zeros((2048), dtype=np.float32))
-        self.recorder = AudioRecorder(fs)
-        self.stopped_voice_indeces = []
-        self.released_voice_indeces = []
-        voice_index = 0
+            self.voices.append(Voice(self.mod_dial_values, self.mod_dial_modes, self.voice_bank, n))
+        self.active_voices = np.zeros((16), dtype=np.int64)
+        self.delay = StereoDelay(self.fs)
+        self.delay_modulators = [LFO(self.fs, 5, 0, 0), LFO(self.fs, 5, 0, 0), ModEnv(self.fs, 0.5, 0.5, 0), ModEnv(self.fs, 0.5, 0.5, 0)]
+        self.no_mod = np.ascontiguousarray(np.zeros((max_block_size), dtype=np.float32))
+        self.voice_allocator = VoiceAllocator(len(self.voices))
         for voice in self.voices:
-            voice.index = voice_index
-            self.stopped_voice_indeces.append(voice_index)
             voice.detune_offset_1 = .975 + .050*random.random()
             voice.detune_offset_2 = .975 + .050*random.random()
             voice.detune_offset_3 = .975 + .050*random.random()
-            voice_index += 1
+
+        #stream-side resources (own, or shared with the host's other parts | see shared_resources)
+        if host is None:
+            self.event_dispatcher = EventDispatcher(self.fs)
+            self.render_workers = RenderWorkers(len(self.voices))
+            self.meter = LoadMeter(self.fs)
+            self.recorder = AudioRecorder(self.fs)
+            self.recorder_output = np.ascontiguousarray(np.zeros((max_block_size, 2), dtype=np.float32))
+            self.output_hpf_states = np.zeros((2), dtype=np.float32)
+            self.scope_buffer = np.ascontiguousarray(np.zeros((16384, 2), dtype=np.float32))
+            self.scope_frames = [0]
+            self.scope_head = np.zeros((1), dtype=np.int64)
+            self.part_output = np.ascontiguousarray(np.zeros((max_block_size, 2), dtype=np.float32))    #voice bus scratch (delay)
+        else:
+            for name in shared_resources:
+                setattr(self, name, getattr(host, name))
 
         #attributes
-        self.recorder_output = np.ascontiguousarray(np.zeros((2048, 2), dtype=np.float32))
-        self.delay_output = np.ascontiguousarray(np.zeros((2048, 2), dtype=np.float32))
         self.key_to_note = {}
-        self.note_to_voice = {}
         self.octave = 0
         self.osc_drift_amt = 0.0
         self.pitch_offset_1 = 0
@@ -85,25 +289,16 @@ class AudioEngine():
         self.detune_2 = 0.0
         self.detune_3 = 0.0
         self.filt_mode = 0
-        self.midi_in_queue = queue.SimpleQueue()
-        self.frame_times = queue.SimpleQueue()
-        self.pending_event = None
         self.midi_cc_functions = {}
         self.midi_cc_values = {}
         self.stream = None
+        self.block_size = None                  #stream block size (None: device default, high latency)
+        self.sub_block_size = max_block_size    #internal render block size
         self.midi_input = None
         self.midi_channel = None
-        self.previous_buffer_dac_time = pytime.perf_counter()
-        self.scope_buffer = np.ascontiguousarray(np.zeros((16384, 2), dtype=np.float32))
-        self.scope_frames = [0]
-        self.scope_head = [0]
-        self.scope_buffer_length = len(self.scope_buffer)
-        self.threadpool = QThreadPool()
-        self.key_event_worker = KeyEventWorker(self)
-        self.threadpool.start(self.key_event_worker)
-        self.run_threads = True
-        self.voice_executor = concurrent.futures.ThreadPoolExecutor(max_workers=16)
-        self.output_hpf_states = np.zeros((2), dtype=np.float32)
+        self.note_low = 0                       #key range (midi notes, inclusive | splits)
+        self.note_high = 127
+        self.realtime = realtime
 
         #mod dial mode buffers (delay & engine modulators)
         self.lfo1_mod_buffers = [self.assign_mod_buffer(self.mod_dial_modes["lfo1_freq"])]
@@ -126,117 +321,219 @@ class AudioEngine():
         self.del_mod_values = [self.mod_dial_values["del_time"], self.mod_dial_values["del_feedback"],
                            self.mod_dial_values["del_mix"]]
 
+        #delay/delay modulators in use (skipped at zero mix | see update_delay_routing)
+        self.delay_routing = (False, (False, False, False, False))
+        self.update_delay_routing()
 
-    #initialize stream
-    def start_audio(self):
-        self.stream = sd.OutputStream(channels=2, samplerate=fs, blocksize=0, latency="high", callback=self.callback, dtype=np.float32)
-        self.stream.start()
+    #voice allocation counters (note ons, retriggers, steals, steal rate, free/releasing/held voices)
+    def get_voice_stats(self):
+        return self.voice_allocator.get_stats()
 
-    def get_devices(self):
-        audio_devices = sd.query_devices()
-        return audio_devices
+    #filter/envelope coefficient update period (samples | 1 = per sample)
+    def set_control_period(self, control_period):
+        self.voice_bank.control_period = max(1, int(control_period))
 
-    #initialize midi
-    def set_midi_input(self, port_name):
-        if self.midi_input:
-            self.midi_input.close()
-        
-        if port_name:
-            self.midi_input = mido.open_input(port_name, callback=self.midi_callback)
+    #offline render of this engine's patch (no stream) | see render_events
+    def render_offline(self, events, duration, patch=None, filename=None, block_size=512, channel=1):
+        if patch is not None:
+            self.load_patch(patch)
+        self.set_midi_channel(channel)
+        return self.render_events(events, duration, filename, block_size)
 
-    #midi callback
-    def midi_callback(self, message):
-        stamped_message = (message, pytime.perf_counter())
-        self.midi_in_queue.put(stamped_message) 
-
-    #midi helpers
+    #midi channel (1-16)
     def set_midi_channel(self, channel):
         self.midi_channel = channel-1
 
-    def get_midi_inputs(self):
-        input_list = mido.get_input_names()
-        return input_list
-
-    #close stream/midi port, stop KeyEventWorker & shutdown voice executor
-    def close(self):
-        if self.stream:
-            self.stream.stop()
-            self.stream.close()
-            
-        if self.midi_input:
-            self.midi_input.close()
-
-        self.run_threads = False
-        self.voice_executor.shutdown(wait=True, cancel_futures=True)
-
-    #main audio callback
-    def callback(self, outdata, frames, time, status):
-        #zero output buffer
-        outdata[:frames] = 0.0
-        #calc. frame times & push to queue
-        frame_width = frames/fs
-        frame_start = time.outputBufferDacTime
-        frame_end = frame_start + frame_width
-        self.frame_times.put((frame_width, frame_start, frame_end, frames))
-        #run voice callbacks (multithreaded)
-        futures = []
+    #key range (midi notes, inclusive) | note events outside it are ignored
+    def set_note_range(self, low, high):
+        self.note_low = max(0, min(127, int(low)))
+        self.note_high = max(self.note_low, min(127, int(high)))
+
+    #patch loading (slider values -> engine parameters, mirrors the GUI conversions)
+    def load_patch(self, patch):
+        if not isinstance(patch, dict):
+            with open(patch, "r") as f:
+                patch = json.load(f)
+        patch = patch_defaults | patch
+        if "filt_mode" in patch:
+            self.update_mode(patch["filt_mode"])
+        self.update_oversample(int(patch["filt_oversample"]))
+        for param, value in patch.items():
+            if param in patch_sliders:
+                update_function, scale = patch_sliders[param]
+                getattr(self, update_function)(float(value)/scale)
+            elif param == "filt_freq":
+                if self.filt_mode == 0:
+                    self.update_cutoff(27.5 * 2**(float(value)/100.0))
+                else:
+                    self.update_cutoff(27.5 * 2**(float(value)/95.0))
+            elif param == "filt_res":
+                self.update_resonance(5.0 / (10.0**(value/100.0)))
+            elif param in ("osc_wave", "osc2_wave", "osc3_wave"):
+                self.update_algorithm(osc_waves[value], osc_numbers[param.split("_")[0]])
+            elif param in ("osc_type", "osc2_type", "osc3_type"):
+                self.update_osc_type(osc_numbers[param.split("_")[0]], value)
+            elif param == "filt_type":
+                self.update_type(filt_types[value])
+            elif param == "lfo1_shape":
+                self.update_lfo1_shape(lfo_shapes[value])
+            elif param == "lfo2_shape":
+                self.update_lfo2_shape(lfo_shapes[value])
+            elif param == "menv1_mode":
+                self.update_menv1_mode(menv_modes[value])
+            elif param == "menv2_mode":
+                self.update_menv2_mode(menv_modes[value])
+            elif param.endswith("_mod"):
+                name = param.removesuffix("_mod").replace("fback", "feedback")
+                self.update_mod_value(name, float(value)/500.0)
+            elif param.endswith("_ass"):
+                name = param.removesuffix("_ass").replace("fback", "feedback")
+                self.update_mod_mode(name, value)
+
+    #render one block (shared by the stream callback & offline render)
+    def render_block(self, outdata, frames):
+        #collect active voices & render (persistent worker threads)
+        meter = self.meter
+        stage_start = perf_counter()
+        active = self.collect_voices()
+        self.render_workers.render(((self.voice_bank, active),), frames)
+        self.release_voices(active)
+        stage_start = meter.mark(voice_stage, stage_start)
+        delay_on = self.start_delay(frames)
+        stage_start = meter.mark(modulator_stage, stage_start)
+
+        # voice bus (voice sum & delay, added into outdata) & master bus (dc blocker, recorder, limiter & scope, in place)
+        delay = self.delay
+        del_mod_buffers = self.del_mod_buffers
+        del_mod_values = self.del_mod_values
+        part_block_entry(outdata, self.part_output, self.voice_bank.outputs, active, frames,
+                         delay_on, delay.buffer, delay.offset, delay.offset_smooth, delay.write_heads, delay.delay_feedback, delay.mix_level,
+                         del_mod_buffers[0], del_mod_buffers[1], del_mod_buffers[2], float(del_mod_values[0]), float(del_mod_values[1]), float(del_mod_values[2]),
+                         delay.tm_amount_smooth, float(delay.fs))
+        stage_start = meter.mark(part_stage, stage_start)
+        self.render_bus(outdata, frames)
+        meter.mark(bus_stage, stage_start)
+
+    #block steps (render_block | MultiEngine.render_block runs them for every part)
+    #snapshot shared parameters & collect active voices (rendered into voice_bank.outputs by the render workers)
+    def collect_voices(self):
+        self.voice_bank.snapshot()
+        active_count = 0
         for voice in self.voices:
             if voice.status != 0:
-                future = self.voice_executor.submit(
-                voice.callback, voice.voice_output[:frames], frames)
-                futures.append(future)
-            else:
-                voice.voice_output[:] = 0.0
-        concurrent.futures.wait(futures)
-        #sum voice outputs
-        for voice in self.voices:
-            outdata += voice.voice_output[:frames]
-        #remove DC offset
-        dc_hpf(outdata, self.output_hpf_states)
-        #pass main output to rec.
-        self.recorder.process_block(outdata, self.recorder_output)
-        #sum rec. output to main
-        outdata += self.recorder_output[:frames]
-
-        # delay modulators (self/cross modulated)
-        # lfo 1
-        self.delay_modulators[0].process_block(frames, self.lfo1_mod_buffers, self.lfo1_mod_values)
-        # lfo 2
-        self.delay_modulators[1].process_block(frames, self.lfo2_mod_buffers, self.lfo2_mod_values)
-        # menv 1
-        self.delay_modulators[2].process_block(frames, self.menv1_mod_buffers, self.menv1_mod_values)
-        # menv 2
-        self.delay_modulators[3].process_block(frames, self.menv2_mod_buffers, self.menv2_mod_values)
-
-        # delay mod buffers
-        self.delay.process_block(outdata, outdata, self.del_mod_buffers, self.del_mod_values)
-        # limit output
-        outdata *= 0.288675
-        outdata = np.tanh(outdata)
-
-        head_pos = self.scope_head[0]
-        new_pos = head_pos + frames
-        if new_pos >= self.scope_buffer_length:
-            overflow = new_pos - self.scope_buffer_length
-            first_chunk_size = frames - overflow
-            self.scope_buffer[head_pos:] = outdata[:first_chunk_size]
-            self.scope_buffer[:overflow] = outdata[first_chunk_size:frames]
-            self.scope_head[0] = overflow
-        else:
-            self.scope_buffer[head_pos:new_pos] = outdata[:frames]
-            self.scope_head[0] = new_pos
-        self.scope_frames[0] = frames
-    
+                voice.update_params()
+                self.active_voices[active_count] = voice.index
+                active_count += 1
+        return self.active_voices[:active_count]
+
+    #free finished voices (after rendering)
+    def release_voices(self, active):
+        for index in active:
+            if self.voices[index].update_status():
+                self.voice_allocator.voice_stopped(index)
+
+    #delay modulators (self/cross modulated | skipped at zero mix / when unrouted, see update_delay_routing)
+    # returns True if the delay runs this block
+    def start_delay(self, frames):
+        delay_on, modulators_on = self.delay_routing
+        if delay_on:
+            # lfo 1
+            if modulators_on[0]:
+                self.delay_modulators[0].process_block(frames, self.lfo1_mod_buffers, self.lfo1_mod_values)
+            # lfo 2
+            if modulators_on[1]:
+                self.delay_modulators[1].process_block(frames, self.lfo2_mod_buffers, self.lfo2_mod_values)
+            # menv 1
+            if modulators_on[2]:
+                self.delay_modulators[2].process_block(frames, self.menv1_mod_buffers, self.menv1_mod_values)
+            # menv 2
+            if modulators_on[3]:
+                self.delay_modulators[3].process_block(frames, self.menv2_mod_buffers, self.menv2_mod_values)
+            self.delay.start_block()
+        return delay_on
+
     #key input handlers
-    def key_pressed(self, note_val, velocity_val, sample_offset=0):
+    def key_pressed(self, note_val, velocity_val):
         note_on_msg = mido.Message("note_on", note=note_val, velocity=velocity_val, channel=self.midi_channel)
-        stamped_message = (note_on_msg, pytime.perf_counter())
-        self.midi_in_queue.put(stamped_message) 
+        self.event_dispatcher.put(note_on_msg, source=key_source)
 
-    def key_released(self, note_val, sample_offset=0):
+    def key_released(self, note_val):
         note_off_msg = mido.Message("note_off", note=note_val, velocity=0, channel=self.midi_channel)
-        stamped_message = (note_off_msg, pytime.perf_counter())
-        self.midi_in_queue.put(stamped_message)
+        self.event_dispatcher.put(note_off_msg, source=key_source)
+
+    #note/cc event handlers (called from render, at the event's frame)
+    # raw channel message bytes (status, data 1, data 2)
+    def handle_event(self, status, data1, data2):
+        if (status & 0x0F) != self.midi_channel:
+            return
+        message_type = status & 0xF0
+        if (message_type == note_on_status) or (message_type == note_off_status):
+            if (data1 < self.note_low) or (data1 > self.note_high):
+                return
+        if message_type == note_on_status:
+            if (data2 > 0):
+                self.note_on(data1 - middle_a, data2)
+            else:
+                self.note_off(data1 - middle_a)
+        elif message_type == note_off_status:
+            self.note_off(data1 - middle_a)
+        elif message_type == control_change_status:
+            if (data1 in self.midi_cc_functions):
+                self.midi_cc_values.update({data1: data2})
+                cc_update_function = self.midi_cc_functions[data1]
+                cc_update_function(data2)
+
+    def note_on(self, note, velocity):
+        new_voice = self.assign_voice(note)
+        if new_voice is not None:
+            #oscillator pitch follows base_note (see apply_shared_params) | filter key tracking uses osc 1 pitch at note on
+            new_pitch = 440.0 * 2**((float(note))/12.0 + self.pitch_offset_1) + self.detune_1*new_voice.detune_offset_1
+            new_voice.base_note = note
+            new_voice.filt.update_base_freq(new_pitch)
+            new_voice.filt2.update_base_freq(new_pitch)
+            new_voice.velocity = float(velocity)/127.0
+            new_voice.env.update_gate(True)
+            new_voice.fenv.update_gate(True)
+            new_voice.menv1.update_gate(True)
+            new_voice.menv2.update_gate(True)
+            new_voice.status = 2
+        self.delay_modulators[2].update_gate(True)
+        self.delay_modulators[3].update_gate(True)
+
+    def note_off(self, note):
+        index = self.voice_allocator.note_off(note)
+        if index is not None:
+            voice = self.voices[index]
+            voice.env.update_gate(False)
+            voice.fenv.update_gate(False)
+            voice.menv1.update_gate(False)
+            voice.menv2.update_gate(False)
+            voice.status = 1
+        self.delay_modulators[2].update_gate(False)
+        self.delay_modulators[3].update_gate(False)
+
+    #same note -> stopped voice -> oldest releasing voice -> oldest held voice (see VoiceAllocator)
+    def assign_voice(self, note):
+        index, mode = self.voice_allocator.note_on(note)
+        voice = self.voices[index]
+        if mode == alloc_retrigger:
+            return voice
+        if mode != alloc_free:
+            voice = self.fade_voice(voice)
+        voice = self.reset_voice(voice)
+        return voice
+    
+    def fade_voice(self, voice):
+        linear_fade = np.linspace(1.0, 0.0, 100)
+        for n in linear_fade:
+            voice.velocity = voice.velocity*n
+        return voice
+    
+    def reset_voice(self, voice):
+        voice.osc.reset_buffers()
+        voice.osc2.reset_buffers()
+        voice.osc3.reset_buffers()
+        return voice
 
     #recorder slots
     def update_delete(self):
@@ -261,149 +558,114 @@ class AudioEngine():
         frames = max(self.recorder.end_heads[0], self.recorder.end_heads[1])
         buffer_max = np.max(np.abs(self.recorder.record_buffer[:frames]))
         norm_buffer = self.recorder.record_buffer[:frames] / buffer_max
-        sf.write(filename, norm_buffer, fs)
+        sf.write(filename, norm_buffer, self.fs)
         print(f"audio saved to: {filename}")
 
-    #voice helper functions
+    #voice helper functions (single slot writes into the shared parameter block)
+    def set_param(self, name, value):
+        self.voice_bank.set_param(name, value)
+
     # oscillator drift
     def update_osc_drift(self, drift):
-        for voice in self.voices:
-            voice.osc.update_drift(drift)
-            voice.osc2.update_drift(drift)
-            voice.osc3.update_drift(drift)
+        self.set_param("osc_drift", drift)
+
+    # oscillator unison (copies per oscillator, 1 = off) & spread (detune/stereo, 0 to 1)
+    def update_osc_unison(self, copies):
+        self.set_param("osc_unison", float(max(1, min(max_unison, int(copies)))))
+
+    def update_osc_spread(self, spread):
+        self.set_param("osc_spread", max(0.0, min(1.0, spread)))
     
     # oscillator type (algorithm)
     def update_osc_type(self, osc, new_type):
-        if osc == 0:
-            for voice in self.voices:
-                voice.osc.update_type(new_type)
-        elif osc == 1:
-            for voice in self.voices:
-                voice.osc2.update_type(new_type)
-        elif osc == 2:
-            for voice in self.voices:
-                voice.osc3.update_type(new_type)
+        self.set_param(f"osc{osc}_type", new_type)
 
 
     # oscillators
     def update_pitch_1(self, offset):
-        for voice in self.voices:
-            new_pitch = 440.0 * 2**(float(voice.base_note)/12.0 + offset) + self.detune_1*voice.detune_offset_1
-            voice.osc.update_pitch(new_pitch)
-            self.pitch_offset_1 = offset
+        self.pitch_offset_1 = offset
+        self.set_param("osc1_pitch", offset)
 
     def update_pitch_2(self, offset):
-        for voice in self.voices:
-            new_pitch = 440.0 * 2**(float(voice.base_note)/12.0 + offset) + self.detune_2*voice.detune_offset_2
-            voice.osc2.update_pitch(new_pitch)
-            self.pitch_offset_2 = offset
+        self.pitch_offset_2 = offset
+        self.set_param("osc2_pitch", offset)
 
     def update_pitch_3(self, offset):
-        for voice in self.voices:
-            new_pitch = 440.0 * 2**(float(voice.base_note)/12.0 + offset) + self.detune_3*voice.detune_offset_3
-            voice.osc3.update_pitch(new_pitch)
-            self.pitch_offset_3 = offset
+        self.pitch_offset_3 = offset
+        self.set_param("osc3_pitch", offset)
 
     def update_detune_1(self, detune):
-        for voice in self.voices:
-            new_pitch = 440.0 * 2**(float(voice.base_note)/12.0 + self.pitch_offset_1) + detune*voice.detune_offset_1
-            voice.osc.update_pitch(new_pitch)
         self.detune_1 = detune
+        self.set_param("osc1_detune", detune)
 
     def update_detune_2(self, detune):
-        for voice in self.voices:
-            new_pitch = 440.0 * 2**(float(voice.base_note)/12.0 + self.pitch_offset_2) + detune*voice.detune_offset_2
-            voice.osc2.update_pitch(new_pitch)
         self.detune_2 = detune
+        self.set_param("osc2_detune", detune)
 
     def update_detune_3(self, detune):
-        for voice in self.voices:
-            new_pitch = 440.0 * 2**(float(voice.base_note)/12.0 + self.pitch_offset_3) + detune*voice.detune_offset_3
-            voice.osc3.update_pitch(new_pitch)
         self.detune_3 = detune
+        self.set_param("osc3_detune", detune)
 
     def update_width_1(self, newWidth):
-        for voice in self.voices:
-            voice.osc.update_width(newWidth)
+        self.set_param("osc1_width", newWidth)
 
     def update_width_2(self, newWidth):
-        for voice in self.voices:
-            voice.osc2.update_width(newWidth)
+        self.set_param("osc2_width", newWidth)
 
     def update_width_3(self, newWidth):
-        for voice in self.voices:
-            voice.osc3.update_width(newWidth)
+        self.set_param("osc3_width", newWidth)
     
     def update_algorithm(self, newAlg, osc):
-        for voice in self.voices:
-            if (osc == 1):
-                voice.osc.update_algorithm(newAlg)
-            elif (osc == 2):
-                voice.osc2.update_algorithm(newAlg)
-            elif (osc == 3):
-                voice.osc3.update_algorithm(newAlg)
+        self.set_param(f"osc{osc}_alg", newAlg)
 
     # mix
     def update_amplitude_1(self, newAmp):
-        for voice in self.voices:
-            voice.osc.update_amplitude(newAmp)
+        self.set_param("osc1_amp", newAmp)
 
     def update_amplitude_2(self, newAmp):
-        for voice in self.voices:
-            voice.osc2.update_amplitude(newAmp)
+        self.set_param("osc2_amp", newAmp)
 
     def update_amplitude_3(self, newAmp):
-        for voice in self.voices:
-            voice.osc3.update_amplitude(newAmp)
+        self.set_param("osc3_amp", newAmp)
 
     # pan
     def update_pan_1(self, newPan):
-        for voice in self.voices:
-            voice.pan1.update_position(newPan)
+        self.set_param("pan1", newPan)
 
     def update_pan_2(self, newPan):
-        for voice in self.voices:
-            voice.pan2.update_position(newPan)
+        self.set_param("pan2", newPan)
 
     def update_pan_3(self, newPan):
-        for voice in self.voices:
-            voice.pan3.update_position(newPan)
+        self.set_param("pan3", newPan)
     
     # filter
     def update_cutoff(self, newFreq):
-        for voice in self.voices:
-            voice.filt.update_cutoff(newFreq)
-            voice.filt2.update_cutoff(newFreq)
+        self.set_param("filt_cutoff", newFreq)
 
     def update_resonance(self, newRes):
-        for voice in self.voices:
-            voice.filt.update_resonance(newRes)
-            voice.filt2.update_resonance(newRes)
+        self.set_param("filt_res", newRes)
 
     def update_drive(self, newDrive):
-        for voice in self.voices:
-            voice.filt.update_drive(newDrive)
-            voice.filt2.update_drive(newDrive)
+        self.set_param("filt_drive", newDrive)
     
     def update_type(self, newType):
-        for voice in self.voices:
-            voice.filt.update_type(newType)
-            voice.filt2.update_type(newType)
+        self.set_param("filt_type", newType)
 
     def update_saturate(self, newSat):
-        for voice in self.voices:
-            voice.filt.update_saturate(newSat)
-            voice.filt2.update_saturate(newSat)
+        self.set_param("filt_sat", newSat)
 
     def update_key_tracking(self, newTrack):
-        for voice in self.voices:
-            voice.filt.update_key_tracking(newTrack)
-            voice.filt2.update_key_tracking(newTrack)
+        self.set_param("filt_track", newTrack)
 
     def update_mode(self, newMode):
         self.filt_mode = newMode
-        for voice in self.voices:
-            voice.filt_mode = newMode
+        self.set_param("filt_mode", newMode)
+
+    #chamberlin oversampling factor (1, 2, 4, 8 | 0: adaptive)
+    def update_oversample(self, factor):
+        if factor not in oversample_factors:
+            raise ValueError(f"unsupported oversampling factor: {factor} (supported: {oversample_factors})")
+        self.set_param("filt_oversample", factor)
 
 
     # envelope
@@ -412,42 +674,32 @@ class AudioEngine():
               voice.env.update_gate(newGate)
 
     def update_attack(self, newAttack):
-        for voice in self.voices:
-             voice.env.update_attack(newAttack)
+        self.set_param("env_att", newAttack)
 
     def update_decay(self, newDecay):
-        for voice in self.voices:
-             voice.env.update_decay(newDecay)
+        self.set_param("env_dec", newDecay)
     
     def update_sustain(self, newSustain):
-        for voice in self.voices:
-             voice.env.update_sustain(newSustain)
+        self.set_param("env_sus", newSustain)
     
     def update_release(self, newRelease):
-         for voice in self.voices:
-              voice.env.update_release(newRelease)
+        self.set_param("env_rel", newRelease)
 
     # filter envelope
     def update_fenv_attack(self, newAttack):
-        for voice in self.voices:
-             voice.fenv.update_attack(newAttack)
+        self.set_param("fenv_att", newAttack)
 
     def update_fenv_decay(self, newDecay):
-        for voice in self.voices:
-             voice.fenv.update_decay(newDecay)
+        self.set_param("fenv_dec", newDecay)
     
     def update_fenv_sustain(self, newSustain):
-        for voice in self.voices:
-             voice.fenv.update_sustain(newSustain)
+        self.set_param("fenv_sus", newSustain)
     
     def update_fenv_release(self, newRelease):
-        for voice in self.voices:
-            voice.fenv.update_release(newRelease)
+        self.set_param("fenv_rel", newRelease)
 
     def update_fenv_amount(self, newAmount):
-        for voice in self.voices:
-            voice.filt.update_env_amount(newAmount)
-            voice.filt2.update_env_amount(newAmount)
+        self.set_param("fenv_amt", newAmount)
 
     # delay
     def update_del_time(self, newTime):
@@ -458,70 +710,82 @@ class AudioEngine():
 
     def update_del_mix(self, newMix):
         self.delay.update_mix(newMix)
+        self.update_delay_routing()
+
+    #delay on (mix or mix mod) & the delay modulators reaching it (directly or through each other)
+    # published as one tuple (read once per block by the audio thread)
+    def update_delay_routing(self):
+        delay_on = (self.delay.mix_level != 0.0) or self.mod_routed("del_mix")
+        sources = [False, False, False, False, False]
+        if delay_on:
+            for name in delay_mods:
+                if self.mod_routed(name):
+                    sources[self.mod_dial_modes[name]] = True
+            for _ in range(0, 4):
+                for m, names in enumerate(delay_modulator_mods):
+                    if sources[1 + m]:
+                        for name in names:
+                            if self.mod_routed(name):
+                                sources[self.mod_dial_modes[name]] = True
+        #the delay line restarts silent: cleared here (control thread) before the audio thread sees it on, not in the callback
+        if delay_on and not self.delay_routing[0]:
+            self.delay.clear()
+        self.delay_routing = (delay_on, tuple(sources[1:]))
+
+    def mod_routed(self, name):
+        return (self.mod_dial_modes[name] != 0) and (self.mod_dial_values[name] != 0.0)
 
     # modulators
     #  lfo 1
     def update_lfo1_freq(self, newFreq):
-        for voice in self.voices:
-            voice.lfo1.set_frequency(newFreq)
+        self.set_param("lfo1_freq", newFreq)
         self.delay_modulators[0].set_frequency(newFreq)
 
     def update_lfo1_offset(self, newPhase):
-        for voice in self.voices:
-            voice.lfo1.set_offset(newPhase)
+        self.set_param("lfo1_phase", newPhase)
         self.delay_modulators[0].set_offset(newPhase)
 
     def update_lfo1_shape(self, newShape):
-        for voice in self.voices:
-            voice.lfo1.set_shape(newShape)
+        self.set_param("lfo1_shape", newShape)
         self.delay_modulators[0].set_shape(newShape)
 
     #  lfo 2
     def update_lfo2_freq(self, newFreq):
-        for voice in self.voices:
-            voice.lfo2.set_frequency(newFreq)
+        self.set_param("lfo2_freq", newFreq)
         self.delay_modulators[1].set_frequency(newFreq)
 
     def update_lfo2_offset(self, newPhase):
-        for voice in self.voices:
-            voice.lfo2.set_offset(newPhase)
+        self.set_param("lfo2_phase", newPhase)
         self.delay_modulators[1].set_offset(newPhase)
 
     def update_lfo2_shape(self, newShape):
-        for voice in self.voices:
-            voice.lfo2.set_shape(newShape)
+        self.set_param("lfo2_shape", newShape)
         self.delay_modulators[1].set_shape(newShape)
 
     #  menv 1
     def update_menv1_att(self, newAtt):
-        for voice in self.voices:
-            voice.menv1.set_attack(newAtt)
+        self.set_param("menv1_att", newAtt)
         self.delay_modulators[2].set_attack(newAtt)
 
     def update_menv1_rel(self, newRel):
-        for voice in self.voices:
-            voice.menv1.set_release(newRel)
+        self.set_param("menv1_rel", newRel)
         self.delay_modulators[2].set_release(newRel)
 
     def update_menv1_mode(self, newMode):
-        for voice in self.voices:
-            voice.menv1.set_mode(newMode)
+        self.set_param("menv1_mode", newMode)
         self.delay_modulators[2].set_mode(newMode)
 
     #  menv 2
     def update_menv2_att(self, newAtt):
-        for voice in self.voices:
-            voice.menv2.set_attack(newAtt)
+        self.set_param("menv2_att", newAtt)
         self.delay_modulators[3].set_attack(newAtt)
 
     def update_menv2_rel(self, newRel):
-        for voice in self.voices:
-            voice.menv2.set_release(newRel)
+        self.set_param("menv2_rel", newRel)
         self.delay_modulators[3].set_release(newRel)
 
     def update_menv2_mode(self, newMode):
-        for voice in self.voices:
-            voice.menv2.set_mode(newMode)
+        self.set_param("menv2_mode", newMode)
         self.delay_modulators[3].set_mode(newMode)
 
     #cc helpers
@@ -731,8 +995,10 @@ class AudioEngine():
                 self.del_mod_values[1] = value
             elif name.endswith("mix"):
                 self.del_mod_values[2] = value
-        for voice in self.voices:
-            voice.update_mod_value(name, value)
+        if name in self.mod_dial_values:
+            self.mod_dial_values[name] = value
+            self.update_delay_routing()
+        self.voice_bank.update_mod_value(name, value)
 
     def update_mod_mode(self, name, mode):
         new_buffer = self.assign_mod_buffer(mode)
@@ -765,8 +1031,10 @@ class AudioEngine():
                 self.del_mod_buffers[1] = new_buffer
             elif name.endswith("mix"):
                 self.del_mod_buffers[2] = new_buffer
-        for voice in self.voices:
-            voice.update_mod_mode(name, mode)
+        if name in self.mod_dial_modes:
+            self.mod_dial_modes[name] = mode
+            self.update_delay_routing()
+        self.voice_bank.update_mod_mode(name, mode)
 
     def assign_mod_buffer(self, mode):
         if mode == 0:
@@ -781,13 +1049,225 @@ class AudioEngine():
             return self.delay_modulators[3].output
         
 
+#multi-part (multitimbral) engine
+# hosts parts (AudioEngines with their own patch, midi channel, key range, voices & delay) on one device stream,
+# one event dispatcher, one render worker pool (every part's voices are batched together) & one master bus:
+# each part's voice sum & delay is added into the bus, then the shared dc blocker, recorder, limiter & scope run once
+# parts keep the full engine interface (load_patch, update_*, set_midi_channel, set_note_range, key_pressed, ...)
+class MultiEngine(StreamEngine):
+    def __init__(self, parts=2, realtime=True, sample_rate=None, control_period=1):
+        #sample rate (None: default output device rate, if supported)
+        if sample_rate is None:
+            sample_rate = native_sample_rate()
+        if sample_rate not in sample_rates:
+            raise ValueError(f"unsupported sample rate: {sample_rate} (supported: {sample_rates})")
+        self.fs = sample_rate
+        self.hpf_g = math.tan(math.pi*6.667/self.fs)
+
+        #compile kernels in the background (output is silent until kernels_ready)
+        compile_kernels()
+
+        #stream-side resources (shared with every part | see shared_resources)
+        self.event_dispatcher = EventDispatcher(self.fs)
+        self.render_workers = RenderWorkers(16*parts)
+        self.meter = LoadMeter(self.fs)
+        self.recorder = AudioRecorder(self.fs)
+        self.recorder_output = np.ascontiguousarray(np.zeros((max_block_size, 2), dtype=np.float32))
+        self.output_hpf_states = np.zeros((2), dtype=np.float32)
+        self.scope_buffer = np.ascontiguousarray(np.zeros((16384, 2), dtype=np.float32))
+        self.scope_frames = [0]
+        self.scope_head = np.zeros((1), dtype=np.int64)
+        self.part_output = np.ascontiguousarray(np.zeros((max_block_size, 2), dtype=np.float32))    #voice bus scratch (delay)
+        self.stream = None
+        self.block_size = None
+        self.sub_block_size = max_block_size
+        self.midi_input = None
+        self.realtime = realtime
+
+        #parts (midi channels 1, 2, ... | layer: same channel, split: same channel & set_note_range)
+        self.parts = []
+        for n in range(0, parts):
+            part = AudioEngine(realtime, self.fs, control_period, host=self)
+            part.set_midi_channel(n % 16 + 1)
+            self.parts.append(part)
+
+    #patch per part (None: unchanged)
+    def load_patches(self, patches):
+        for part, patch in zip(self.parts, patches):
+            if patch is not None:
+                part.load_patch(patch)
+
+    #offline render (no stream) | events on each part's midi channel
+    def render_offline(self, events, duration, patches=None, filename=None, block_size=512):
+        if patches is not None:
+            self.load_patches(patches)
+        return self.render_events(events, duration, filename, block_size)
+
+    #voice allocation counters per part (see AudioEngine.get_voice_stats)
+    def get_voice_stats(self):
+        return [part.get_voice_stats() for part in self.parts]
+
+    def set_control_period(self, control_period):
+        for part in self.parts:
+            part.set_control_period(control_period)
+
+    #note/cc events go to every part (each filters its channel & key range)
+    def handle_event(self, status, data1, data2):
+        for part in self.parts:
+            part.handle_event(status, data1, data2)
+
+    #render one block (shared by the stream callback & offline render)
+    def render_block(self, outdata, frames):
+        #collect every part's active voices & render them in one pass (persistent worker threads)
+        meter = self.meter
+        stage_start = perf_counter()
+        parts = self.parts
+        jobs = [(part.voice_bank, part.collect_voices()) for part in parts]
+        self.render_workers.render(jobs, frames)
+        for part, (bank, active) in zip(parts, jobs):
+            part.release_voices(active)
+        stage_start = meter.mark(voice_stage, stage_start)
+        delays_on = [part.start_delay(frames) for part in parts]
+        stage_start = meter.mark(modulator_stage, stage_start)
+
+        # part buses (voice sum & delay, added into outdata) & master bus (dc blocker, recorder, limiter & scope, in place)
+        for part, (bank, active), delay_on in zip(parts, jobs, delays_on):
+            delay = part.delay
+            del_mod_buffers = part.del_mod_buffers
+            del_mod_values = part.del_mod_values
+            part_block_entry(outdata, self.part_output, bank.outputs, active, frames,
+                             delay_on, delay.buffer, delay.offset, delay.offset_smooth, delay.write_heads, delay.delay_feedback, delay.mix_level,
+                             del_mod_buffers[0], del_mod_buffers[1], del_mod_buffers[2], float(del_mod_values[0]), float(del_mod_values[1]), float(del_mod_values[2]),
+                             delay.tm_amount_smooth, float(delay.fs))
+        stage_start = meter.mark(part_stage, stage_start)
+        self.render_bus(outdata, frames)
+        meter.mark(bus_stage, stage_start)
+
+#default output device sample rate (falls back to 44.1kHz if unsupported/unavailable)
+def native_sample_rate():
+    try:
+        device_rate = int(sd.query_devices(kind="output")["default_samplerate"])
+    except Exception:
+        return default_fs
+    if device_rate in sample_rates:
+        return device_rate
+    return default_fs
+
+# channels interleaved & state kept in locals (two independent recursions per frame instead of one chain through memory)
 @njit(nogil=True, fastmath=True, cache=True)
-def dc_hpf(buffer, hp_state):
+def dc_hpf(buffer, hp_state, hpf_g):
     frames = len(buffer)
-    for c in range(0, 2):
-        for n in range(0, frames):
-            x = buffer[n, c]
-            lp = (hpf_g*x + hp_state[c])*hpf_g_div
-            hp = x - lp
-            hp_state[c] = lp + hpf_g*hp
-            buffer[n, c] = hp
+    hpf_g_div = 1.0/(1.0 + hpf_g)
+    state_l = hp_state[0]
+    state_r = hp_state[1]
+    for n in range(0, frames):
+        x = buffer[n, 0]
+        lp = (hpf_g*x + state_l)*hpf_g_div
+        hp = x - lp
+        state_l = np.float32(lp + hpf_g*hp)
+        buffer[n, 0] = hp
+        x = buffer[n, 1]
+        lp = (hpf_g*x + state_r)*hpf_g_div
+        hp = x - lp
+        state_r = np.float32(lp + hpf_g*hp)
+        buffer[n, 1] = hp
+    hp_state[0] = state_l
+    hp_state[1] = state_r
+
+#master bus stages (block loops, compiled into bus_block)
+#recorder: records block, mixes its playback back in (rec_output: scratch)
+@njit(nogil=True, fastmath=True, cache=True)
+def record_block(block, frames, rec_output, rec_buffer, paused, stopped, record, loop, play_heads, end_heads, put_stop,
+                 input_level, input_level_smooth, output_level_smooth, rec_gate_smooth):
+    rec_block = rec_output[:frames]
+    rec_block[:] = 0.0
+    process_samples(rec_buffer, block, rec_block, frames, paused, stopped, record, loop, play_heads, end_heads, put_stop,
+                    input_level, input_level_smooth, output_level_smooth, rec_gate_smooth)
+    for n in range(0, frames):
+        block[n, 0] += rec_block[n, 0]
+        block[n, 1] += rec_block[n, 1]
+
+#gain & soft limiter (in place), scope ring write
+@njit(nogil=True, fastmath=True, cache=True)
+def limit_block(block, frames, gain, scope_buffer, scope_head):
+    gain = np.float32(gain)
+    scope_length = len(scope_buffer)
+    head = scope_head[0]
+    for n in range(0, frames):
+        left = np.tanh(block[n, 0]*gain)
+        right = np.tanh(block[n, 1]*gain)
+        block[n, 0] = left
+        block[n, 1] = right
+        scope_buffer[head, 0] = left
+        scope_buffer[head, 1] = right
+        head += 1
+        if head >= scope_length:
+            head = 0
+    scope_head[0] = head
+
+#voice bus (one per engine | MultiEngine: one per part): voice sum & delay, added into outdata (part_output: scratch)
+@njit(nogil=True, fastmath=True, cache=True)
+def part_block(outdata, part_output, voice_outputs, active, frames,
+               delay_on, delay_buffer, offset_raw, offset_smooth, write_heads, feedback, mix, time_mod, feedback_mod, mix_mod, tm_amt, fm_amt, mm_amt, tm_amt_smooth, fs):
+    if not delay_on:
+        sum_voices(outdata, voice_outputs, active, frames)
+        return
+    block = part_output[:frames]
+    block[:] = 0.0
+    sum_voices(block, voice_outputs, active, frames)
+    delay_block(block, block, delay_buffer, offset_raw, offset_smooth, write_heads, feedback, mix, time_mod, feedback_mod, mix_mod,
+                tm_amt, fm_amt, mm_amt, tm_amt_smooth, fs)
+    for n in range(0, frames):
+        outdata[n, 0] += block[n, 0]
+        outdata[n, 1] += block[n, 1]
+
+#master bus (after every part_block, in place on outdata): dc blocker, recorder (records the bus, playback is mixed in), gain & soft limiter, scope ring write
+@njit(nogil=True, fastmath=True, cache=True)
+def bus_block(outdata, frames, hp_state, hpf_g,
+              rec_on, rec_output, rec_buffer, paused, stopped, record, loop, play_heads, end_heads, put_stop, input_level, input_level_smooth, output_level_smooth, rec_gate_smooth,
+              gain, scope_buffer, scope_head):
+    block = outdata[:frames]
+    dc_hpf(block, hp_state, hpf_g)
+    if rec_on:
+        record_block(block, frames, rec_output, rec_buffer, paused, stopped, record, loop, play_heads, end_heads, put_stop,
+                     input_level, input_level_smooth, output_level_smooth, rec_gate_smooth)
+    limit_block(block, frames, gain, scope_buffer, scope_head)
+
+#python-level entry points (aot builds when available)
+dc_hpf_entry = kernel(dc_hpf, "void(float32[:, :], float32[:], float64)")
+part_block_entry = kernel(part_block, "void(float32[:, :], float32[:, :], float32[:, :, :], int64[:], int64, boolean, float32[:, :], float64, "
+                                      "float32[:], int32[:], float64, float64, float32[:], float32[:], float32[:], float64, float64, float64, "
+                                      "float32[:, :], float64)")
+bus_block_entry = kernel(bus_block, "void(float32[:, :], int64, float32[:], float64, boolean, float32[:, :], float32[:, :], boolean[:], boolean[:], "
+                                    "boolean[:], boolean, int32[:], int32[:], boolean[:], float32, float32[:, :], float32[:, :], float32[:, :], "
+                                    "float64, float32[:, :], int64[:])")
+
+#compile jobs (see compiler.py)
+@compile_job(dc_hpf_entry)
+def compile_dc_hpf():
+    dc_hpf_entry(np.zeros((16, 2), dtype=np.float32), np.zeros((2), dtype=np.float32), math.tan(math.pi*6.667/44100))
+
+#recorder arguments (rec_output through rec_gate_smooth) with a short record buffer | AudioRecorder types
+def test_recorder_args():
+    test_smoothers = np.zeros((1, 2), dtype=np.float32)
+    return (np.zeros((16, 2), dtype=np.float32), np.zeros((32, 2), dtype=np.float32),
+            np.zeros((1), dtype=np.bool_), np.ones((1), dtype=np.bool_), np.zeros((1), dtype=np.bool_), False,
+            np.zeros((2), dtype=np.int32), np.zeros((2), dtype=np.int32), np.zeros((1), dtype=np.bool_), np.float32(1.0),
+            test_smoothers, test_smoothers, test_smoothers)
+
+#delay arguments (delay_buffer through fs) | runtime types (mod values as python floats)
+def test_delay_args():
+    delay = StereoDelay(44100)
+    mod_test = np.zeros((16), dtype=np.float32)
+    return (delay.buffer, delay.offset, delay.offset_smooth, delay.write_heads, delay.delay_feedback, delay.mix_level,
+            mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, delay.tm_amount_smooth, float(delay.fs))
+
+@compile_job(part_block_entry)
+def compile_part_block():
+    part_block_entry(np.zeros((16, 2), dtype=np.float32), np.zeros((16, 2), dtype=np.float32), VoiceBank(1).outputs, np.zeros((0), dtype=np.int64), 16,
+                     False, *test_delay_args())
+
+@compile_job(bus_block_entry)
+def compile_bus_block():
+    bus_block_entry(np.zeros((16, 2), dtype=np.float32), 16, np.zeros((2), dtype=np.float32), math.tan(math.pi*6.667/44100),
+                    False, *test_recorder_args(), master_gain, np.zeros((64, 2), dtype=np.float32), np.zeros((1), dtype=np.int64))
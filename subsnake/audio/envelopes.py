@@ -1,20 +1,21 @@
 import numpy as np
 import math
 from numba import njit
+from .aot import kernel
+from .compiler import compile_job
 
-fs = 44100
 twopi = 2*np.pi
 oneoverpi = 1/np.pi
 threshold = math.log(.001)
 
 class ADSR():
-    def __init__(self, attack=0.01, decay=0.5, sustain=0.5, release=0.5):
+    def __init__(self, attack=0.01, decay=0.5, sustain=0.5, release=0.5, fs=44100):
+        fs = float(fs)
+        self.fs = fs
         #envelope state array
         #   level, stage, attack c, decay c, sustain, release c
         self.state = np.ascontiguousarray(np.array([0.0, 0.0, 0.0, 0.0, 0.0, 0.0]))
         self.gate = False
-        self.attack_sample = 0
-        self.release_sample = 0
         self.attack = attack
         self.decay = decay
         self.sustain = sustain
@@ -26,53 +27,86 @@ class ADSR():
         self.state[4] = sustain
         self.state[5] = 1.0 - math.exp(threshold/(fs*release))
 
-        #init numba compile call
-        env_test = np.array([0.0, 0.0, 1.0, 1.0, 0.5, 1.0], dtype=np.float32)
-        mod_test = np.zeros((16), dtype=np.float32)
-        envelope_block(env_test, False, np.zeros((16, 2), dtype=np.float32), np.zeros((16, 2), dtype=np.float32), 0, 0, mod_test, mod_test, mod_test, mod_test, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1)
+        #params: attack, decay, sustain, release, gate
+        self.params = np.array([attack, decay, sustain, release, 0.0], dtype=np.float64)
+        self.control_period = 1
 
     def process_block(self, input, output, mod_buffers, mod_values):
-        envelope_block(self.state, self.gate, input, output, self.attack_sample, self.release_sample,
-                            mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_values[0], mod_values[1], mod_values[2], mod_values[3],
-                            self.attack, self.decay, self.sustain, self.release)
+        envelope_block_entry(self.state, self.gate, input, output,
+                                  mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_values[0], mod_values[1], mod_values[2], mod_values[3],
+                                  self.attack, self.decay, self.sustain, self.release, self.fs, self.control_period)
+
+    #move state into preallocated (voice-owned) arrays
+    def bind(self, params, state):
+        params[:] = self.params
+        state[:] = self.state
+        self.params = params
+        self.state = state
     
     def update_gate(self, newGate):
         self.gate = newGate
+        self.params[4] = float(newGate)
     
-    def update_attack_start(self, attack_sample):
-        self.attack_sample = attack_sample
-
-    def update_release_start(self, release_sample):
-        self.release_sample = release_sample
-
     def update_attack(self, newAttack):
         self.attack = newAttack
+        self.params[0] = newAttack
 
     def update_decay(self, newDecay):
         self.decay = newDecay
+        self.params[1] = newDecay
     
     def update_sustain(self, newSustain):
         self.sustain = newSustain
+        self.params[2] = newSustain
     
     def update_release(self, newRelease):
         self.release = newRelease
+        self.params[3] = newRelease
 
 #numba DSP    
+# envelope coefficients (attack c, decay c, sustain, release c) at sample n
+@njit(nogil=True, fastmath=True, cache=True, inline="always")
+def envelope_coefficients(n, att_mod, dec_mod, sus_mod, rel_mod, am_val, dm_val, sm_val, rm_val, att, dec, sus, rel, fs):
+    mod_att = max(1.0, fs*att + fs*att_mod[n]*am_val)
+    mod_dec = max(1.0, fs*dec + fs*dec_mod[n]*dm_val)
+    mod_sus = max(0.0, min(1.0, sus + sus_mod[n]*sm_val))
+    mod_rel = max(1.0, fs*rel + fs*rel_mod[n]*rm_val)
+    return 1.0 - math.exp(threshold/mod_att), 1.0 - math.exp(threshold/mod_dec), mod_sus, 1.0 - math.exp(threshold/mod_rel)
+
 # ADSR envelope (recursive 1-pole LPF)
-@staticmethod
+# coefficients are computed every control_period samples & linearly interpolated (control_period = 1: per sample)
 @njit(nogil=True, fastmath=True, cache=True)
-def envelope_block(state, gate, input, output, attack_start, release_start, att_mod, dec_mod, sus_mod, rel_mod, am_val, dm_val, sm_val, rm_val, att, dec, sus, rel):
-    for n in range(len(output)):
-        mod_att = max(1.0, fs*att + fs*att_mod[n]*am_val)
-        mod_dec = max(1.0, fs*dec + fs*dec_mod[n]*dm_val)
-        mod_sus = max(0.0, min(1.0, sus + sus_mod[n]*sm_val))
-        mod_rel = max(1.0, fs*rel + fs*rel_mod[n]*rm_val)
-        state[2] = 1.0 - math.exp(threshold/mod_att)
-        state[3] = 1.0 - math.exp(threshold/mod_dec)
-        state[4] = mod_sus
-        state[5] = 1.0 - math.exp(threshold/mod_rel)
+def envelope_block(state, gate, input, output, att_mod, dec_mod, sus_mod, rel_mod, am_val, dm_val, sm_val, rm_val, att, dec, sus, rel, fs, control_period):
+    frames = len(output)
+    next_control = 0
+    att_next, dec_next, sus_next, rel_next = 0.0, 0.0, 0.0, 0.0
+    att_step, dec_step, sus_step, rel_step = 0.0, 0.0, 0.0, 0.0
+    if frames > 0:
+        att_next, dec_next, sus_next, rel_next = envelope_coefficients(0, att_mod, dec_mod, sus_mod, rel_mod, am_val, dm_val, sm_val, rm_val, att, dec, sus, rel, fs)
+    for n in range(frames):
+        #coefficients (control rate)
+        if n == next_control:
+            state[2] = att_next
+            state[3] = dec_next
+            state[4] = sus_next
+            state[5] = rel_next
+            next_control = min(n + control_period, frames - 1)
+            if next_control > n:
+                att_next, dec_next, sus_next, rel_next = envelope_coefficients(next_control, att_mod, dec_mod, sus_mod, rel_mod, am_val, dm_val, sm_val, rm_val, att, dec, sus, rel, fs)
+                scale = 1.0/(next_control - n)
+                att_step = (att_next - state[2])*scale
+                dec_step = (dec_next - state[3])*scale
+                sus_step = (sus_next - state[4])*scale
+                rel_step = (rel_next - state[5])*scale
+            else:
+                next_control = frames
+        else:
+            state[2] += att_step
+            state[3] += dec_step
+            state[4] += sus_step
+            state[5] += rel_step
         if gate:
-            if (state[1] == 0.0) and (n >= attack_start):  #start envelope
+            if (state[1] == 0.0):   #start envelope
                 state[1] = 1.0
             elif (state[1] == 1.0): #attack
                 state[0] = state[0] + state[2]*(1.0 - state[0])
@@ -92,8 +126,7 @@ def envelope_block(state, gate, input, output, attack_start, release_start, att_
             if (state[1] == 0.0):   #envelope off
                 state[0] = 0.0
             elif (state[1] < 4.0):  #attack/decay/sustain -> release
-                if (n >= release_start):
-                    state[1] = 4.0
+                state[1] = 4.0
             else:                   #release
                 state[0] = state[0] + state[5]*(0.0 - state[0])
                 if (state[0] - .001 <= 0.0):
@@ -105,3 +138,16 @@ def envelope_block(state, gate, input, output, attack_start, release_start, att_
         sample_R = input[n, 1] * state[0]
         output[n, 0] = sample_L
         output[n, 1] = sample_R
+
+#python-level entry points (aot builds when available)
+envelope_block_entry = kernel(envelope_block, "void(float64[:], boolean, float32[:, :], float32[:, :], float32[:], float32[:], float32[:], "
+                                              "float32[:], float64, float64, float64, float64, float64, float64, float64, float64, float64, int64)")
+
+#compile jobs (see compiler.py)
+@compile_job(envelope_block_entry)
+def compile_envelope_block():
+    env = ADSR()
+    env_test = np.array([0.0, 0.0, 1.0, 1.0, 0.5, 1.0], dtype=np.float64)
+    mod_test = np.zeros((16), dtype=np.float32)
+    envelope_block_entry(env_test, False, np.zeros((16, 2), dtype=np.float32), np.zeros((16, 2), dtype=np.float32), mod_test, mod_test, mod_test, mod_test,
+                         0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, env.fs, env.control_period)
@@ -1,14 +1,21 @@
 import numpy as np
 import math
 from numba import njit
+from .aot import kernel
+from .compiler import compile_job
 
-fs = 44100
 twopi = 2*np.pi
 oneoverpi = 1/np.pi
 
-# Hal Chamberlin's digital SV Filter w/ nonlinear feedback | 8x oversampled
+#chamberlin oversampling factors (0: adaptive, see hal_oversampling)
+oversample_factors = (0, 1, 2, 4, 8)
+os_cutoff_ratio = 0.02     #1x up to ~880Hz, 8x above ~3.5kHz (44.1kHz)
+os_drive_limit = 2.0
+
+# Hal Chamberlin's digital SV Filter w/ nonlinear feedback | 1x/2x/4x/8x oversampled (default 8x) or adaptive
 class HalSVF():
-    def __init__(self, type, cutoff, resonance, drive=1.0, saturate=8.0):
+    def __init__(self, type, cutoff, resonance, drive=1.0, saturate=8.0, fs=44100):
+        self.fs = float(fs)
         self.integrators = np.ascontiguousarray(np.zeros((2, 2), dtype=np.float32))
         self.cutoff = cutoff
         self.resonance = resonance
@@ -18,53 +25,63 @@ class HalSVF():
         self.base_freq = 440.0
         self.key_tracking = 0.0
         self.mode = 0
-        self.params = np.zeros((8), dtype=np.float32)
+        #params: cutoff, resonance, drive, saturation, mode, base freq, key tracking, env amount
+        self.params = np.array([self.cutoff, self.resonance, self.drive, self.saturate, self.mode, self.base_freq, self.key_tracking, self.env_amount], dtype=np.float32)
         self.mod_values = np.zeros((5), dtype=np.float32)
-
-        #init numba compile call
-        mod_test = np.zeros((16), dtype=np.float32)
-        filt_test = np.zeros((2, 2), dtype=np.float32)
-        filt_test_in = np.zeros((16, 2), dtype=np.float32)
-        filt_test_out = np.zeros((16, 2), dtype=np.float32)
-        filt_test_env = np.ones((16, 2), dtype=np.float32)
-        filt_test_params = np.zeros((8), dtype=np.float32)
-        filt_test_mod_values = np.zeros((5), dtype=np.float32)
-        filter_block_hal(filt_test_in, filt_test_out, filt_test, filt_test_params, filt_test_env,
-                    mod_test, mod_test, mod_test, mod_test, mod_test, filt_test_mod_values)
+        self.control_period = 1
+        self.oversample = 8
     
     def process_block(self, input, output, fenv, mod_buffer, mod_values):
-        self.params[:] = [self.cutoff, self.resonance, self.drive, self.saturate, self.mode, self.base_freq, self.key_tracking, self.env_amount]
         self.mod_values[:] = [mod_values[0], mod_values[1], mod_values[2], mod_values[3], mod_values[4]]
-        filter_block_hal(input, output, self.integrators, self.params, fenv,
-                        mod_buffer[0], mod_buffer[1], mod_buffer[2], mod_buffer[3], mod_buffer[4], self.mod_values)
+        filter_block_hal_entry(input, output, self.integrators, self.params, fenv,
+                              mod_buffer[0], mod_buffer[1], mod_buffer[2], mod_buffer[3], mod_buffer[4], self.mod_values, self.fs, self.control_period, 2, self.oversample)
+
+    #move state into preallocated (voice-owned) arrays
+    def bind(self, params, integrators):
+        params[:] = self.params
+        integrators[:] = self.integrators
+        self.params = params
+        self.integrators = integrators
 
     def update_cutoff(self, freq):
         self.cutoff = freq
+        self.params[0] = freq
 
     def update_resonance(self, res):
         self.resonance = res
+        self.params[1] = res
 
     def update_drive(self, drive):
         self.drive = drive
+        self.params[2] = drive
     
     def update_type(self, type):
         self.mode = type
+        self.params[4] = type
 
     def update_saturate(self, saturate):
         self.saturate = saturate
+        self.params[3] = saturate
 
     def update_env_amount(self, amount):
         self.env_amount = amount
+        self.params[7] = amount
 
     def update_key_tracking(self, amount):
         self.key_tracking = amount
+        self.params[6] = amount
 
     def update_base_freq(self, newFreq):
         self.base_freq = newFreq
+        self.params[5] = newFreq
+
+    def update_oversample(self, factor):
+        self.oversample = factor
 
 # ZDF-solved Chamberlin SVF w/ nonlinear resonance & output soft clipping
 class ZDFSVF():
-    def __init__(self):
+    def __init__(self, fs=44100):
+        self.fs = float(fs)
         self.integrator_states = np.ascontiguousarray(np.zeros((2, 2), dtype=np.float32))
         self.cutoff = 20000.0
         self.feedback = 1.0
@@ -74,52 +91,88 @@ class ZDFSVF():
         self.base_freq = 440.0
         self.key_tracking = 0.0
         self.mode = 0
-        self.params = np.zeros((8), dtype=np.float32)
+        #params: cutoff, feedback, drive, saturation, mode, base freq, key tracking, env amount
+        self.params = np.array([self.cutoff, self.feedback, self.drive, self.saturate, self.mode, self.base_freq, self.key_tracking, self.env_amount], dtype=np.float32)
         self.mod_values = np.zeros((5), dtype=np.float32)
-
-        #init numba compile call
-        mod_test = np.zeros((16), dtype=np.float32)
-        filt_test = np.zeros((2, 2), dtype=np.float32)
-        filt_test_in = np.zeros((16, 2), dtype=np.float32)
-        filt_test_out = np.zeros((16, 2), dtype=np.float32)
-        filt_test_env = np.ones((16, 2), dtype=np.float32)
-        filt_test_params = np.zeros((8), dtype=np.float32)
-        filt_test_mod_values = np.zeros((5), dtype=np.float32)
-        filter_block_zdf(filt_test_in, filt_test_out, filt_test, filt_test_params, filt_test_env,
-                    mod_test, mod_test, mod_test, mod_test, mod_test, filt_test_mod_values)
+        self.control_period = 1
     
     def process_block(self, filt_input, filt_output, fenv, mod_buffers, mod_values):
-        self.params[:] = [self.cutoff, self.feedback, self.drive, self.saturate, self.mode, self.base_freq, self.key_tracking, self.env_amount]
         self.mod_values[:] = [mod_values[0], mod_values[1], mod_values[2], mod_values[3], mod_values[4]]
-        filter_block_zdf(filt_input, filt_output, self.integrator_states, self.params, fenv,
-                          mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_buffers[4], self.mod_values)
+        filter_block_zdf_entry(filt_input, filt_output, self.integrator_states, self.params, fenv,
+                                mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_buffers[4], self.mod_values, self.fs, self.control_period, 2)
+
+    #move state into preallocated (voice-owned) arrays
+    def bind(self, params, integrators):
+        params[:] = self.params
+        integrators[:] = self.integrator_states
+        self.params = params
+        self.integrator_states = integrators
 
     def update_cutoff(self, freq):
         self.cutoff = freq
+        self.params[0] = freq
 
     def update_resonance(self, res):
         self.feedback = res
+        self.params[1] = res
 
     def update_drive(self, drive):
         self.drive = drive
+        self.params[2] = drive
 
     def update_saturate(self, saturate):
         self.saturate = saturate
+        self.params[3] = saturate
     
     def update_type(self, type):
         self.mode = type
+        self.params[4] = type
 
     def update_env_amount(self, amount):
         self.env_amount = amount
+        self.params[7] = amount
 
     def update_key_tracking(self, amount):
         self.key_tracking = amount
+        self.params[6] = amount
 
     def update_base_freq(self, newFreq):
         self.base_freq = newFreq
+        self.params[5] = newFreq
 
+# cutoff coefficients | computed every control_period samples & linearly interpolated (control_period = 1: per sample)
 @njit(nogil=True, fastmath=True, cache=True, inline="always")
-def filter_block_hal(input, output, states, params, fenv, freq_mod, res_mod, drive_mod, sat_mod, fenv_mod, mod_vals):
+def hal_freq_coefficient(n, c, cutoff, base_freq, kt_amt, fenv_amt, fenv, freq_mod, fenv_mod, fm_val, fem_val, os_fs):
+    fenv_amount = max(-1.0, min(1.0, fenv_amt + fenv_mod[n]*fem_val))
+    fm_amount = 14080.0*freq_mod[n]*fm_val
+    fenv_mod_amount = 14080.0*fenv[n, c]*fenv_amount
+    new_cutoff = (1.0 - kt_amt)*max(0.1, min(cutoff + fm_amount + fenv_mod_amount, 14080.0)) + kt_amt*max(0.1, min(base_freq + fm_amount + fenv_mod_amount, 14080.0))
+    return 2*math.sin(np.pi*(new_cutoff/os_fs))
+
+@njit(nogil=True, fastmath=True, cache=True, inline="always")
+def zdf_freq_coefficient(n, c, cutoff, base_freq, kt_amt, fenv_amt, fenv, freq_mod, fenv_mod, fm_val, fem_val, fs):
+    fenv_amount = max(-1.0, min(1.0, fenv_amt + fenv_mod[n]*fem_val))
+    fm_amount = 20000.0*freq_mod[n]*fm_val
+    fenv_mod_amount = 20000.0*fenv[n, c]*fenv_amount
+    new_cutoff = (1.0 - kt_amt)*max(0.1, min(cutoff + fm_amount + fenv_mod_amount, 20000.0)) + kt_amt*max(0.1, min(base_freq + fm_amount + fenv_mod_amount, 20000.0))
+    return math.tan(np.pi*(new_cutoff/fs))
+
+# adaptive oversampling: lowest factor keeping the block's highest reachable cutoff under os_cutoff_ratio*(factor*fs),
+# one step higher while the drive pushes the feedback tanh into its nonlinear range (its harmonics alias)
+@njit(nogil=True, fastmath=True, cache=True, inline="always")
+def hal_oversampling(cutoff, base_freq, kt_amt, fenv_amt, drive, fm_val, dm_val, fem_val, fs):
+    max_cutoff = (1.0 - kt_amt)*cutoff + kt_amt*base_freq + 14080.0*(abs(fm_val) + min(1.0, abs(fenv_amt) + abs(fem_val)))
+    max_cutoff = min(max_cutoff, 14080.0)
+    max_drive = min(9.0, drive + 4.5*abs(dm_val))
+    oversample = 1
+    while (oversample < 8) and (max_cutoff > oversample*fs*os_cutoff_ratio):
+        oversample *= 2
+    if (max_drive > os_drive_limit) and (oversample < 8):
+        oversample *= 2
+    return oversample
+
+@njit(nogil=True, fastmath=True, cache=True, inline="always")
+def filter_block_hal(input, output, states, params, fenv, freq_mod, res_mod, drive_mod, sat_mod, fenv_mod, mod_vals, fs, control_period, channels, oversample):
     #assign scalars
     cutoff = params[0]
     resonance = params[1]
@@ -128,35 +181,52 @@ def filter_block_hal(input, output, states, params, fenv, freq_mod, res_mod, dri
     mode = params[4]
     base_freq = params[5]
     kt_amt = params[6]
-    fenv_amount = params[7]
+    fenv_amt = params[7]
     fm_val = mod_vals[0]
     rm_val = mod_vals[1]
     dm_val = mod_vals[2]
     sm_val = mod_vals[3]
     fem_val = mod_vals[4]
+    frames = len(output)
+    #oversampling factor (0: adaptive)
+    if oversample == 0:
+        oversample = hal_oversampling(cutoff, base_freq, kt_amt, fenv_amt, drive, fm_val, dm_val, fem_val, fs)
+    os_fs = oversample*fs
+    os_scale = 1.0/oversample
 
-    #main loop
-    for c in range (2):
-        for n in range(len(output)):
-            freq_mod_amt = freq_mod[n]*fm_val
+    #main loop (channels = 1: identical left/right input, filter left & copy)
+    for c in range(channels):
+        next_control = 0
+        freq_c = 0.0
+        freq_step = 0.0
+        freq_next = 0.0
+        if frames > 0:
+            freq_next = hal_freq_coefficient(0, c, cutoff, base_freq, kt_amt, fenv_amt, fenv, freq_mod, fenv_mod, fm_val, fem_val, os_fs)
+        for n in range(frames):
+            #cutoff coefficient (control rate)
+            if n == next_control:
+                freq_c = freq_next
+                next_control = min(n + control_period, frames - 1)
+                if next_control > n:
+                    freq_next = hal_freq_coefficient(next_control, c, cutoff, base_freq, kt_amt, fenv_amt, fenv, freq_mod, fenv_mod, fm_val, fem_val, os_fs)
+                    freq_step = (freq_next - freq_c)/(next_control - n)
+                else:
+                    freq_step = 0.0
+                    next_control = frames
+            else:
+                freq_c += freq_step
             res_mod_amt = res_mod[n]*rm_val
             drive_mod_amt = drive_mod[n]*dm_val
             sat_mod_amt = sat_mod[n]*sm_val
             subsample = 0.0
             prev_low = states[0, c]
             prev_band = states[1, c]
-            fenv_amount = max(-1.0, min(1.0, fenv_amount + fenv_mod[n]*fem_val))
-            
-            fm_amount = 14080.0*freq_mod_amt
-            fenv_mod_amount = 14080.0*fenv[n, c]*fenv_amount
-            new_cutoff = (1.0 - kt_amt)*max(0.1, min(cutoff + fm_amount + fenv_mod_amount, 14080.0)) + kt_amt*max(0.1, min(base_freq + fm_amount + fenv_mod_amount, 14080.0))
-            freq_c = 2*math.sin(np.pi*(new_cutoff/(8*fs)))
             res_c = max(.02, min(20.0, resonance + res_mod_amt))
             substate = mode
             new_drive = max(.025, min(9.0, drive + 4.5*drive_mod_amt))
             new_saturate = max(1.0, min(12.0, saturate + 5.5*sat_mod_amt))
             oneoverdrive = 1.0/new_drive
-            for m in range(8):
+            for m in range(oversample):
                 feedback = res_c*(np.tanh(prev_band*new_drive)*oneoverdrive)
                 high = clip_sample(input[n, c] - prev_low - feedback, new_saturate)
                 #clip band
@@ -174,11 +244,13 @@ def filter_block_hal(input, output, states, params, fenv, freq_mod, res_mod, dri
                     subsample += clip_sample(states[1, c], 1.5)
                 elif (substate == 3): #notch
                     subsample += clip_sample(notch, 1.5)
-            sample = subsample*0.125
+            sample = subsample*os_scale
             output[n, c] = sample
+    if channels == 1:
+        copy_left(output, states)
 
 @njit(nogil=True, fastmath=True, cache=True, inline="always")
-def filter_block_zdf(filt_in, filt_out, states, params, fenv, freq_mod, res_mod, drive_mod, sat_mod, fenv_mod, mod_vals):
+def filter_block_zdf(filt_in, filt_out, states, params, fenv, freq_mod, res_mod, drive_mod, sat_mod, fenv_mod, mod_vals, fs, control_period, channels):
     #assign scalars
     cutoff = params[0]
     feedback = params[1]
@@ -193,19 +265,32 @@ def filter_block_zdf(filt_in, filt_out, states, params, fenv, freq_mod, res_mod,
     dm_val = mod_vals[2]
     sm_val = mod_vals[3]
     fem_val = mod_vals[4]
+    frames = len(filt_out)
 
-    #main loop
-    for c in range(2):
-        for n in range(len(filt_out)):
-            freq_mod_amt = freq_mod[n]*fm_val
+    #main loop (channels = 1: identical left/right input, filter left & copy)
+    for c in range(channels):
+        next_control = 0
+        freq_c = 0.0
+        freq_step = 0.0
+        freq_next = 0.0
+        if frames > 0:
+            freq_next = zdf_freq_coefficient(0, c, cutoff, base_freq, kt_amt, fenv_amt, fenv, freq_mod, fenv_mod, fm_val, fem_val, fs)
+        for n in range(frames):
+            #cutoff coefficient (control rate)
+            if n == next_control:
+                freq_c = freq_next
+                next_control = min(n + control_period, frames - 1)
+                if next_control > n:
+                    freq_next = zdf_freq_coefficient(next_control, c, cutoff, base_freq, kt_amt, fenv_amt, fenv, freq_mod, fenv_mod, fm_val, fem_val, fs)
+                    freq_step = (freq_next - freq_c)/(next_control - n)
+                else:
+                    freq_step = 0.0
+                    next_control = frames
+            else:
+                freq_c += freq_step
             res_mod_amt = res_mod[n]*rm_val
             drive_mod_amt = drive_mod[n]*dm_val
             sat_mod_amt = sat_mod[n]*sm_val
-            fenv_amount = max(-1.0, min(1.0, fenv_amt + fenv_mod[n]*fem_val))
-            fm_amount = 20000.0*freq_mod_amt
-            fenv_mod_amount = 20000.0*fenv[n, c]*fenv_amount
-            new_cutoff = (1.0 - kt_amt)*max(0.1, min(cutoff + fm_amount + fenv_mod_amount, 20000.0)) + kt_amt*max(0.1, min(base_freq + fm_amount + fenv_mod_amount, 20000.0))
-            freq_c = math.tan(np.pi*(new_cutoff/fs))
             res_c = max(.02, min(20.0, feedback + res_mod_amt))
 
             new_drive = max(.025, min(9.0, drive + 4.5*drive_mod_amt))
@@ -239,6 +324,16 @@ def filter_block_zdf(filt_in, filt_out, states, params, fenv, freq_mod, res_mod,
                 filt_out[n, c] = BP_clipped
             elif mode == 3:
                 filt_out[n, c] = N_out
+    if channels == 1:
+        copy_left(filt_out, states)
+
+# mono filtering: left -> right (output & integrator states, so switching back to stereo is seamless)
+@njit(nogil=True, fastmath=True, cache=True, inline="always")
+def copy_left(output, states):
+    for n in range(len(output)):
+        output[n, 1] = output[n, 0]
+    states[0, 1] = states[0, 0]
+    states[1, 1] = states[1, 0]
 
 @njit(nogil=True, fastmath=True, cache=True)
 def trapezoidal_integrate(x, g, state):
@@ -256,4 +351,27 @@ def clip_sample(sample, threshold):
         norm_sample = sample/threshold
         clip_sample = norm_sample - (norm_sample**3) * 0.33333
         output = clip_sample * threshold
-    return output
\ No newline at end of file
+    return output
+
+#python-level entry points (aot builds when available)
+filter_block_hal_entry = kernel(filter_block_hal, "void(float32[:, :], float32[:, :], float32[:, :], float32[:], float32[:, :], float32[:], "
+                                                  "float32[:], float32[:], float32[:], float32[:], float32[:], float64, int64, int64, int64)")
+filter_block_zdf_entry = kernel(filter_block_zdf, "void(float32[:, :], float32[:, :], float32[:, :], float32[:], float32[:, :], float32[:], "
+                                                  "float32[:], float32[:], float32[:], float32[:], float32[:], float64, int64, int64)")
+
+#compile jobs (see compiler.py)
+@compile_job(filter_block_hal_entry)
+def compile_filter_block_hal():
+    filt = HalSVF(0.0, 1000.0, 1.0)
+    mod_test = np.zeros((16), dtype=np.float32)
+    filter_block_hal_entry(np.zeros((16, 2), dtype=np.float32), np.zeros((16, 2), dtype=np.float32), np.zeros((2, 2), dtype=np.float32), np.zeros((8), dtype=np.float32),
+                           np.ones((16, 2), dtype=np.float32), mod_test, mod_test, mod_test, mod_test, mod_test, np.zeros((5), dtype=np.float32),
+                           filt.fs, filt.control_period, 2, filt.oversample)
+
+@compile_job(filter_block_zdf_entry)
+def compile_filter_block_zdf():
+    filt = ZDFSVF()
+    mod_test = np.zeros((16), dtype=np.float32)
+    filter_block_zdf_entry(np.zeros((16, 2), dtype=np.float32), np.zeros((16, 2), dtype=np.float32), np.zeros((2, 2), dtype=np.float32), np.zeros((8), dtype=np.float32),
+                           np.ones((16, 2), dtype=np.float32), mod_test, mod_test, mod_test, mod_test, mod_test, np.zeros((5), dtype=np.float32),
+                           filt.fs, filt.control_period, 2)
@@ -2,105 +2,138 @@ import numpy as np
 import math
 from numba import njit
 import random
+from .wavetables import load_tables, table_band, table_read
+from .aot import kernel
+from .compiler import compile_job
 
-fs = 44100
-nyquist = 22050
-oneoverfs = 1.0/float(fs)
 twopi = 2*np.pi
 oneoverpi = 1/np.pi
 oneovertwopi = 1/twopi
 piovertwo = np.pi/2.0
-max_det_inc = twopi*(10.0/float(fs))
-integrator_gain = math.tan(np.pi * 10.0/fs)
-g_norm = 1.0/(1.0 + integrator_gain)
+
+#unison
+max_unison = 8
+unison_max_detune = 50.0    #cents (outermost copies at full spread)
+
+#per-instance sample rate coefficients
+# fs, 1/fs, nyquist, max. detune increment, leaky integrator gain (normalized), 50Hz smoothing coefficient, drift walk coefficient
+def osc_rate(fs):
+    fs = float(fs)
+    integrator_gain = math.tan(np.pi * 10.0/fs)
+    rate = np.array([fs, 1.0/fs, 0.5*fs, twopi*(10.0/fs), 1.0/(1.0 + integrator_gain), 1.0 - math.exp(-twopi*50.0/fs), .00001*(44100.0/fs)], dtype=np.float64)
+    return rate
 
 # phase-wrapped oscillator
-# alg = 0.0: sine, 1.0: BLIT sawtooth, 2.0: BLIT pulse | width = 0.0 to 1.0
+# alg = 0.0: sine, 1.0: sawtooth, 2.0: pulse, 3.0: trisaw | alg type = 0: BLIT, 1: polyBLEP, 2: wavetable | width = 0.0 to 1.0
 class WrappedOsc():
     def __init__(self, alg, amplitude, frequency, sample_rate, width=0.5):
         phase_increment = twopi * (frequency/sample_rate)
-        self.state = np.ascontiguousarray(np.array([0.0, amplitude, phase_increment], dtype=np.float32))
-        self.state2 = np.ascontiguousarray(np.array([0.0, amplitude, phase_increment], dtype=np.float32))
+        self.fs = float(sample_rate)
+        self.rate = osc_rate(sample_rate)
+        #params: alg, alg type, width, amplitude, frequency, drift, unison copies, unison spread
+        self.params = np.array([alg, 0.0, width, amplitude, frequency, 0.0, 1.0, 0.0], dtype=np.float64)
+        #packed scalar states: state (4), state2 (3), walk, blep integrator, smoothed blep width, output hpf (2)
+        self.states = np.ascontiguousarray(np.zeros((12), dtype=np.float32))
+        self.states[0:4] = [0.0, amplitude, phase_increment, 0.0]
+        self.states[4:7] = [0.0, amplitude, phase_increment]
         self.random_walk = np.ascontiguousarray(np.zeros((2048), dtype=np.float32))
-        self.walk_state = np.zeros((1), dtype=np.float32)
-        self.walk_amt = 0.0
         self.blit_integrators = np.ascontiguousarray(np.zeros((3, 2), dtype=np.float32))
-        self.blep_integrator = np.zeros((1), dtype=np.float32)
         self.blit_states = np.ascontiguousarray(np.array([[0.0, amplitude, phase_increment, 0.0], [0.0, amplitude, phase_increment, 0.0]], dtype=np.float32))
         self.blit_blocker_ins = np.zeros((1, 2), dtype=np.float32)
         self.blit_blocker_outs = np.zeros((1, 2), dtype=np.float32)
         self.blit_env_follower = np.zeros((2, 2), dtype=np.float32)
         self.blit_env_follower[0][:] = -10000.0
         self.blit_env_follower[1][:] = 10000.0
+        self.smoothed_widths = np.zeros((1, 2), dtype=np.float32)
+        self.tables = load_tables(sample_rate)
+        #unison copy phases (0 to 1, staggered so copies don't start in phase)
+        self.unison_phases = np.ascontiguousarray(np.modf(np.arange(max_unison)*0.618034)[0].astype(np.float32))
+        #packed unison spread: copies, spread, detune ratio per copy (max_unison), pan offset per copy (max_unison)
+        self.unison_spread = np.ascontiguousarray(np.zeros((2 + 2*max_unison), dtype=np.float64))
         self.alg = alg
         self.pulsewidth = width
-        self.smoothed_widths = np.zeros((1, 2), dtype=np.float32)
-        self.smoothed_blep_width = np.zeros((1), dtype=np.float32)
-        self.output_hpf = np.zeros((2), dtype=np.float32)
+        self.walk_amt = 0.0
         self.freq = frequency
         self.amp = amplitude
         self.alg_type = 0
-
-        #init compile calls
-        mod_test = np.zeros((16), dtype=np.float32)
-        test_out = np.zeros((16, 2), dtype=np.float32)
-        generate_walk(self.random_walk[:16], self.walk_state)
-        generate_sine(self.state, test_out, self.random_walk[:16], 1.0, self.pulsewidth, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 1.0, 440.0)
-        polyblep_saw(self.state, test_out, self.pulsewidth, self.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 1.0, 440.0)
-        polyblep_pulse(self.state, test_out, self.state2, 0.5, self.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 1.0, 440.0)
-        polyblep_triangle(self.state, self.blep_integrator, self.smoothed_blep_width, self.output_hpf, test_out, self.state2, 0.5, self.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 1.0, 440.0)
-        blit_saw(test_out, self.blit_states, self.blit_integrators, self.pulsewidth, self.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 0.5, 440.0)
-        blit_pulse(test_out, self.blit_states, self.blit_integrators, self.smoothed_widths, self.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 0.5, 440.0, 0.5)
-        blit_triangle(test_out, self.blit_states, self.blit_integrators, self.smoothed_widths, self.blit_env_follower, self.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 0.5, 440.0, 0.5)
+        self.set_views()
     
     def process_block(self, buffer, mod_buffers, mod_values):
         frames = len(buffer)
-        generate_walk(self.random_walk[:frames], self.walk_state)
-        if (self.alg == 0):
-            generate_sine(self.state, buffer, self.random_walk[:frames], self.walk_amt, self.pulsewidth, mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_values[0], mod_values[1], mod_values[2], mod_values[3], self.amp, self.freq)
-        elif (self.alg == 1.0):
-            if (self.alg_type == 0):
-                blit_saw(buffer, self.blit_states, self.blit_integrators, self.pulsewidth,
-                          self.random_walk[:frames], self.walk_amt, mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_values[0], mod_values[1], mod_values[2], mod_values[3], self.amp, self.freq)
-            else:
-                polyblep_saw(self.state, buffer, self.pulsewidth, self.random_walk, self.walk_amt, mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_values[0], mod_values[1], mod_values[2], mod_values[3], self.amp, self.freq)
-        elif (self.alg == 2.0):
-            if (self.alg_type == 0):
-                blit_pulse(buffer, self.blit_states, self.blit_integrators, self.smoothed_widths,
-                          self.random_walk[:frames], self.walk_amt, mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_values[0], mod_values[1], mod_values[2], mod_values[3], self.amp, self.freq, self.pulsewidth)
-            else:
-                polyblep_pulse(self.state, buffer, self.state2, self.pulsewidth, self.random_walk, self.walk_amt,
-                                    mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_values[0], mod_values[1], mod_values[2], mod_values[3], self.amp, self.freq)
-        elif (self.alg == 3.0):
-            if (self.alg_type == 0):
-                blit_triangle(buffer, self.blit_states, self.blit_integrators, self.smoothed_widths, self.blit_env_follower,
-                          self.random_walk[:frames], self.walk_amt, mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_values[0], mod_values[1], mod_values[2], mod_values[3], self.amp, self.freq, self.pulsewidth)
-            else:
-                polyblep_triangle(self.state, self.blep_integrator, self.smoothed_blep_width, self.output_hpf, buffer, self.state2, self.pulsewidth, self.random_walk, self.walk_amt,
-                                    mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_values[0], mod_values[1], mod_values[2], mod_values[3], self.amp, self.freq)
+        osc_block_entry(buffer, self.params, self.states, self.blit_states, self.blit_integrators, self.smoothed_widths, self.blit_env_follower, self.tables,
+                        self.random_walk[:frames], mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_values[0], mod_values[1], mod_values[2], mod_values[3], self.rate)
+
+    #unison copies, panned & summed into a stereo buffer (pan mod = mod_buffers[4], mod_values[4])
+    def process_unison(self, buffer, mod_buffers, mod_values, position=0.0, gain=1.0):
+        frames = len(buffer)
+        generate_walk_entry(self.random_walk[:frames], self.walk_state, self.rate[6])
+        unison_block_entry(buffer, self.params, self.unison_phases, self.unison_spread, self.smoothed_widths, self.tables,
+                           self.random_walk[:frames], mod_buffers[0], mod_buffers[1], mod_buffers[2], mod_buffers[3], mod_values[0], mod_values[1], mod_values[2], mod_values[3],
+                           position, mod_buffers[4], mod_values[4], gain, self.rate)
+
+    #move state into preallocated (voice-owned) arrays
+    def bind(self, params, states, blit_states, blit_integrators, smoothed_widths, blit_env_follower, random_walk, unison_phases, unison_spread):
+        params[:] = self.params
+        states[:] = self.states
+        blit_states[:] = self.blit_states
+        blit_integrators[:] = self.blit_integrators
+        smoothed_widths[:] = self.smoothed_widths
+        blit_env_follower[:] = self.blit_env_follower
+        random_walk[:] = self.random_walk
+        unison_phases[:] = self.unison_phases
+        unison_spread[:] = self.unison_spread
+        self.params = params
+        self.states = states
+        self.blit_states = blit_states
+        self.blit_integrators = blit_integrators
+        self.smoothed_widths = smoothed_widths
+        self.blit_env_follower = blit_env_follower
+        self.random_walk = random_walk
+        self.unison_phases = unison_phases
+        self.unison_spread = unison_spread
+        self.set_views()
+
+    def set_views(self):
+        self.state = self.states[0:4]
+        self.state2 = self.states[4:7]
+        self.walk_state = self.states[7:8]
+        self.blep_integrator = self.states[8:9]
+        self.smoothed_blep_width = self.states[9:10]
+        self.output_hpf = self.states[10:12]
 
     def update_pitch(self, newPitch):
         self.freq = newPitch
-        new_increment = twopi * (newPitch/fs)
+        self.params[4] = newPitch
+        new_increment = twopi * (newPitch/self.fs)
         self.state[2] = new_increment
         self.state2[2] = new_increment
 
     def update_amplitude(self, newAmp):
         self.amp = newAmp
+        self.params[3] = newAmp
         self.state[1] = newAmp
         self.state2[1] = newAmp
 
     def update_width(self, newWidth):
         self.pulsewidth = newWidth
+        self.params[2] = newWidth
     
     def update_algorithm(self, newAlg):
         self.alg = newAlg
+        self.params[0] = newAlg
 
     def update_drift(self, newDrift):
         self.walk_amt = newDrift
+        self.params[5] = newDrift
 
     def update_type(self, newType):
         self.alg_type = newType
+        self.params[1] = newType
+
+    #copies (1 = off, up to 8) & spread (0 to 1: detune up to +/-50 cents, stereo spread up to hard left/right)
+    def update_unison(self, copies, spread):
+        self.params[6] = max(1, min(max_unison, int(copies)))
+        self.params[7] = max(0.0, min(1.0, spread))
 
     def reset_buffers(self):
         self.blit_integrators[:, :] = 0.0
@@ -110,18 +143,20 @@ class WrappedOsc():
         self.blit_env_follower[0][:] = -10000.0
         self.blit_env_follower[1][:] = 10000.0
 
-#numba DSP - oscillators
+#numba DSP - oscillators (mono | the panners expand to stereo)
 #-naive
 #--sinusoid (w/ bipolar "width" mod (amplitude))
 @njit(nogil=True, fastmath=True, cache=True)
-def generate_sine(state, outdata, walk_mod, walk_amt, width, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp=1.0, freq=440.0):
+def generate_sine(state, outdata, walk_mod, walk_amt, width, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate):
+    oneoverfs = rate[1]
+    max_det_inc = rate[3]
     base_inc = twopi*freq*oneoverfs
     for n in range(len(outdata)):
         state[2] = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*det_mod[n]*dm_amt + max_det_inc*walk_mod[n]*walk_amt
         mod_width = 2*np.abs(0.5 - (width + width_mod[n]*wm_amt))
         mod_amp = max(-1.0, min(1.0, (amp + amp_mod[n]*am_amt)*(1.0 - mod_width)))
         sample = math.sin(state[0])*mod_amp
-        outdata[n, :] = sample
+        outdata[n] = sample
         state[0] += state[2]
         if (state[0] > twopi):
             state[0] -= twopi
@@ -129,7 +164,9 @@ def generate_sine(state, outdata, walk_mod, walk_amt, width, pitch_mod, det_mod,
 #-polyBLEP
 #--anti-aliased sawtooth
 @njit(nogil=True, fastmath=True, cache=True)
-def polyblep_saw(state, outdata, width, walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp=1.0, freq=440.0):
+def polyblep_saw(state, outdata, width, walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate):
+    oneoverfs = rate[1]
+    max_det_inc = rate[3]
     frames = len(outdata)
     base_inc = twopi*freq*oneoverfs
     for n in range(frames):
@@ -171,12 +208,13 @@ def polyblep_saw(state, outdata, width, walk_mod, walk_amt, pitch_mod, det_mod,
         mod_amp = max(-1.0, min(1.0, amp + amp_mod[n]*am_amt))
         out_sample = (1.0 - mod_width)*sample + mod_width*sample_d
         out_sample *= mod_amp
-        outdata[n, 0] = out_sample
-        outdata[n, 1] = out_sample
+        outdata[n] = out_sample
 
 #--anti-aliased pulse
 @njit(nogil=True, fastmath=True, cache=True)
-def polyblep_pulse(state, outdata, state2, width, walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp=1.0, freq=440.0):
+def polyblep_pulse(state, outdata, state2, width, walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate):
+    oneoverfs = rate[1]
+    max_det_inc = rate[3]
     frames = len(outdata)
     base_inc = twopi*freq*oneoverfs
     for n in range(frames):
@@ -216,16 +254,17 @@ def polyblep_pulse(state, outdata, state2, width, walk_mod, walk_amt, pitch_mod,
         #output
         sample -= sample2
         sample *= state[1]
-        outdata[n, 0] = sample*(amp - amp_mod[n]*am_amt)
-        outdata[n, 1] = sample*(amp - amp_mod[n]*am_amt)
+        outdata[n] = sample*(amp - amp_mod[n]*am_amt)
 
 #--anti-aliased trisaw
 #---(width=0.5: triangle, width≈0.0: sawtooth, width≈1.0: ramp)
 @njit(nogil=True, fastmath=True, cache=True)
-def polyblep_triangle(state, integrator, smoothed_width, hpf, outdata, state2, width, walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp=1.0, freq=440.0):
+def polyblep_triangle(state, integrator, smoothed_width, hpf, outdata, state2, width, walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate):
+    oneoverfs = rate[1]
+    max_det_inc = rate[3]
     frames = len(outdata)
     base_inc = twopi*freq*oneoverfs
-    alpha = 1.0 - math.exp(-twopi*50.0*oneoverfs)
+    alpha = rate[5]
     for n in range(frames):
         #modulate phase increment
         state[2] = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*det_mod[n]*dm_amt + max_det_inc*walk_mod[n]*walk_amt
@@ -279,166 +318,455 @@ def polyblep_triangle(state, integrator, smoothed_width, hpf, outdata, state2, w
         scale = (state[2]*oneovertwopi)/(smoothed_width[0]*(1.0 - smoothed_width[0]))
         output_sample = hpf_out*scale*(amp - amp_mod[n]*am_amt)
 
-        outdata[n, 0] = output_sample
-        outdata[n, 1] = output_sample
+        outdata[n] = output_sample
 
 #-BLIT
+# (state arrays keep a second channel row, unused while the oscillators are mono)
 #--anti-aliased sawtooth
 @njit(nogil=True, fastmath=True, cache=True, inline="always")
 def blit_saw(outdata, states, integrators, width,
-                walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp=1.0, freq=440.0):
+                walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate):
+    fs = rate[0]
+    oneoverfs = rate[1]
+    nyquist = rate[2]
+    max_det_inc = rate[3]
+    g_norm = rate[4]
     frames = len(outdata)
     base_inc = freq*oneoverfs
     for n in range(0, frames):
-        for c in range(0, 2):
-            mod_inc = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*walk_mod[n]*walk_amt + max_det_inc*det_mod[n]*dm_amt
-            mod_inc_d = mod_inc*2
-            new_freq = max(1e-9, mod_inc)*fs
-            new_freq_d = max(1e-9, mod_inc_d)*fs
-            harmonics = 2*int(nyquist/new_freq) + 1
-            harmonics_d = 2*int(nyquist/new_freq_d) + 1
-            phase = states[c, 0]
-            phase_d = states[c, 3]
-            #leak_c = 1.0 - twopi*mod_inc*.1
-            kernel_den = math.sin(np.pi*phase)
-            kernel_den_d = math.sin(np.pi*phase_d)
-
-            if phase < .0000001:
-                slope = 1.0-harmonics
-            else:
-                slope = 1.0-math.sin(np.pi*harmonics*phase)/kernel_den
-            if phase_d < .0000001:
-                slope_d = 1.0-harmonics_d
-            else:
-                slope_d = 1.0-math.sin(np.pi*harmonics_d*phase_d)/kernel_den_d
-
-            slope *= mod_inc*2
-            slope_d *= mod_inc_d*2
-            v1, integrators[0, c] = leaky_trapezoidal_integrate(slope, integrators[0, c])
-            v1_d, integrators[1, c] = leaky_trapezoidal_integrate(slope_d, integrators[1, c])
-            states[c, 0] += mod_inc
-            states[c, 3] += mod_inc_d
-            states[c, 0] -= np.floor(states[c, 0])
-            states[c, 3] -= np.floor(states[c, 3])
-
-            mod_width = 2*np.abs(0.5 - (width + width_mod[n]*wm_amt))
-            output_sample = v1*(1.0 - mod_width) + v1_d*mod_width
-            mod_amp = max(-1.0, min(1.0, amp + amp_mod[n]*am_amt))
-            outdata[n, c] = output_sample*mod_amp
+        mod_inc = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*walk_mod[n]*walk_amt + max_det_inc*det_mod[n]*dm_amt
+        mod_inc_d = mod_inc*2
+        new_freq = max(1e-9, mod_inc)*fs
+        new_freq_d = max(1e-9, mod_inc_d)*fs
+        harmonics = 2*int(nyquist/new_freq) + 1
+        harmonics_d = 2*int(nyquist/new_freq_d) + 1
+        phase = states[0, 0]
+        phase_d = states[0, 3]
+        #leak_c = 1.0 - twopi*mod_inc*.1
+        kernel_den = math.sin(np.pi*phase)
+        kernel_den_d = math.sin(np.pi*phase_d)
+
+        if phase < .0000001:
+            slope = 1.0-harmonics
+        else:
+            slope = 1.0-math.sin(np.pi*harmonics*phase)/kernel_den
+        if phase_d < .0000001:
+            slope_d = 1.0-harmonics_d
+        else:
+            slope_d = 1.0-math.sin(np.pi*harmonics_d*phase_d)/kernel_den_d
+
+        slope *= mod_inc*2
+        slope_d *= mod_inc_d*2
+        v1, integrators[0, 0] = leaky_trapezoidal_integrate(slope, integrators[0, 0], g_norm)
+        v1_d, integrators[1, 0] = leaky_trapezoidal_integrate(slope_d, integrators[1, 0], g_norm)
+        states[0, 0] += mod_inc
+        states[0, 3] += mod_inc_d
+        states[0, 0] -= np.floor(states[0, 0])
+        states[0, 3] -= np.floor(states[0, 3])
+
+        mod_width = 2*np.abs(0.5 - (width + width_mod[n]*wm_amt))
+        output_sample = v1*(1.0 - mod_width) + v1_d*mod_width
+        mod_amp = max(-1.0, min(1.0, amp + amp_mod[n]*am_amt))
+        outdata[n] = output_sample*mod_amp
 
 #--anti-aliased pulse
 @njit(nogil=True, fastmath=True, cache=True, inline="always")
 def blit_pulse(outdata, states, integrators, smoothed_widths,
-                walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp=1.0, freq=440.0, width=0.5):
+                walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, width, rate):
+    fs = rate[0]
+    oneoverfs = rate[1]
+    nyquist = rate[2]
+    max_det_inc = rate[3]
+    g_norm = rate[4]
     frames = len(outdata)
     base_inc = freq*oneoverfs
-    alpha = 1.0 - math.exp(-twopi*50.0*oneoverfs)
+    alpha = rate[5]
     for n in range(0, frames):
-        for c in range(0, 2):
-            mod_inc = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*walk_mod[n]*walk_amt + max_det_inc*det_mod[n]*dm_amt
-            new_freq = max(1e-9, mod_inc)*fs
-            harmonics = 2*int(nyquist/new_freq) + 1
-            new_width = max(0.0, min(1.0, width + width_mod[n]*wm_amt))
-            smoothed_widths[0, c] += alpha*(new_width - smoothed_widths[0, c])
-            smoothed_width = smoothed_widths[0, c]
-            phase1 = states[c, 0]
-            phase2 = phase1 + smoothed_width
-            phase2 -= np.floor(phase2)
-            kernel_den_1 = math.sin(np.pi*phase1)
-            kernel_den_2 = math.sin(np.pi*phase2)
-            if phase1 < 1e-9:
-                slope1 = 1.0-harmonics
-            else:
-                slope1 = 1.0-math.sin(np.pi*harmonics*phase1)/kernel_den_1
-            if phase2 < 1e-9:
-                slope2 = 1.0-harmonics
-            else:
-                slope2 = 1.0-math.sin(np.pi*harmonics*phase2)/kernel_den_2
-            slope1 *= mod_inc*2
-            slope2 *= mod_inc*2
-            v1, integrators[0, c] = leaky_trapezoidal_integrate(slope1, integrators[0, c])
-            v2, integrators[1, c] = leaky_trapezoidal_integrate(slope2, integrators[1, c])
-            states[c, 0] += mod_inc
-            states[c, 0] -= np.floor(states[c, 0])
-
-            output_sample = v1 - v2
-            mod_amp = max(-1.0, min(1.0, amp + amp_mod[n]*am_amt))
-            outdata[n, c] = output_sample*mod_amp
+        mod_inc = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*walk_mod[n]*walk_amt + max_det_inc*det_mod[n]*dm_amt
+        new_freq = max(1e-9, mod_inc)*fs
+        harmonics = 2*int(nyquist/new_freq) + 1
+        new_width = max(0.0, min(1.0, width + width_mod[n]*wm_amt))
+        smoothed_widths[0, 0] += alpha*(new_width - smoothed_widths[0, 0])
+        smoothed_width = smoothed_widths[0, 0]
+        phase1 = states[0, 0]
+        phase2 = phase1 + smoothed_width
+        phase2 -= np.floor(phase2)
+        kernel_den_1 = math.sin(np.pi*phase1)
+        kernel_den_2 = math.sin(np.pi*phase2)
+        if phase1 < 1e-9:
+            slope1 = 1.0-harmonics
+        else:
+            slope1 = 1.0-math.sin(np.pi*harmonics*phase1)/kernel_den_1
+        if phase2 < 1e-9:
+            slope2 = 1.0-harmonics
+        else:
+            slope2 = 1.0-math.sin(np.pi*harmonics*phase2)/kernel_den_2
+        slope1 *= mod_inc*2
+        slope2 *= mod_inc*2
+        v1, integrators[0, 0] = leaky_trapezoidal_integrate(slope1, integrators[0, 0], g_norm)
+        v2, integrators[1, 0] = leaky_trapezoidal_integrate(slope2, integrators[1, 0], g_norm)
+        states[0, 0] += mod_inc
+        states[0, 0] -= np.floor(states[0, 0])
+
+        output_sample = v1 - v2
+        mod_amp = max(-1.0, min(1.0, amp + amp_mod[n]*am_amt))
+        outdata[n] = output_sample*mod_amp
 
 #--anti-aliased trisaw (BLIT)
 #---(width=0.5: triangle, width≈0.0: sawtooth, width≈1.0: ramp)
 @njit(nogil=True, fastmath=True, cache=True, inline="always")
 def blit_triangle(outdata, states, integrators, smoothed_widths, followers,
-                walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp=1.0, freq=440.0, width=0.5):
+                walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, width, rate):
+    fs = rate[0]
+    oneoverfs = rate[1]
+    nyquist = rate[2]
+    max_det_inc = rate[3]
+    g_norm = rate[4]
+    frames = len(outdata)
+    base_inc = freq*oneoverfs
+    alpha = rate[5]
+    for n in range(0, frames):
+        mod_inc = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*walk_mod[n]*walk_amt + max_det_inc*det_mod[n]*dm_amt
+        new_freq = max(1e-9, mod_inc)*fs
+        nyquist_by_nf = nyquist/new_freq
+        harmonics = 2*int(nyquist_by_nf) + 1
+        harmonic_f = nyquist_by_nf - int(nyquist_by_nf)
+        new_width = max(.01, min(.99, width + width_mod[n]*wm_amt))
+        smoothed_widths[0, 0] += alpha*(new_width - smoothed_widths[0, 0])
+        smoothed_width = smoothed_widths[0, 0]
+        phase1 = states[0, 0]
+        phase2 = phase1 + smoothed_width
+        phase2 -= np.floor(phase2)
+        kernel_den_1 = math.sin(np.pi*phase1)
+        kernel_den_2 = math.sin(np.pi*phase2)
+        if phase1 < 1e-9:
+            slope1 = 1.0-harmonics
+        else:
+            slope1 = 1.0-math.sin(np.pi*harmonics*phase1)/kernel_den_1
+        if phase2 < 1e-9:
+            slope2 = 1.0-harmonics
+        else:
+            slope2 = 1.0-math.sin(np.pi*harmonics*phase2)/kernel_den_2
+        slope1 *= mod_inc*2
+        slope2 *= mod_inc*2
+        slope1 -= mod_inc*4*harmonic_f*math.cos(twopi*phase1*int(nyquist_by_nf + 1))
+        slope2 -= mod_inc*4*harmonic_f*math.cos(twopi*phase2*int(nyquist_by_nf + 1))             
+        v1, integrators[0, 0] = leaky_trapezoidal_integrate(slope1, integrators[0, 0], g_norm)
+        v2, integrators[1, 0] = leaky_trapezoidal_integrate(slope2, integrators[1, 0], g_norm)
+        states[0, 0] += mod_inc
+        states[0, 0] -= np.floor(states[0, 0])
+
+        blit_pulse = (v1 - v2)
+        v3, integrators[2, 0] = leaky_trapezoidal_integrate(blit_pulse, integrators[2, 0], g_norm)
+        
+        if v3 > followers[0, 0]:
+            followers[0, 0] = v3
+        if v3 < followers[1, 0]:
+            followers[1, 0] = v3
+
+        dc_correct = (followers[0, 0] + followers[1, 0]) / 2.0
+        v3 = v3 - dc_correct
+
+        scale = (mod_inc)/(smoothed_width*(1.0 - smoothed_width))
+        output_sample = v3*scale
+        mod_amp = max(-1.0, min(1.0, amp + amp_mod[n]*am_amt))
+        outdata[n] = output_sample*mod_amp
+
+        follower_leak = 1.0 - (mod_inc*10.0)
+        followers[0, 0] *= follower_leak
+        followers[1, 0] *= follower_leak
+
+#-wavetable (per-octave band-limited tables | phase & smoothed width shared with the BLIT state rows)
+#--anti-aliased sawtooth
+@njit(nogil=True, fastmath=True, cache=True, inline="always")
+def table_saw(outdata, states, tables, width,
+                walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate):
+    fs = rate[0]
+    oneoverfs = rate[1]
+    max_det_inc = rate[3]
+    frames = len(outdata)
+    base_inc = freq*oneoverfs
+    for n in range(0, frames):
+        mod_inc = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*walk_mod[n]*walk_amt + max_det_inc*det_mod[n]*dm_amt
+        mod_inc_d = mod_inc*2
+        v1 = table_read(tables[0, table_band(mod_inc, fs)], states[0, 0])
+        v1_d = table_read(tables[0, table_band(mod_inc_d, fs)], states[0, 3])
+        states[0, 0] += mod_inc
+        states[0, 3] += mod_inc_d
+        states[0, 0] -= np.floor(states[0, 0])
+        states[0, 3] -= np.floor(states[0, 3])
+
+        mod_width = 2*np.abs(0.5 - (width + width_mod[n]*wm_amt))
+        output_sample = v1*(1.0 - mod_width) + v1_d*mod_width
+        mod_amp = max(-1.0, min(1.0, amp + amp_mod[n]*am_amt))
+        outdata[n] = output_sample*mod_amp
+
+#--anti-aliased pulse (difference of two phase-offset saws)
+@njit(nogil=True, fastmath=True, cache=True, inline="always")
+def table_pulse(outdata, states, smoothed_widths, tables,
+                walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, width, rate):
+    fs = rate[0]
+    oneoverfs = rate[1]
+    max_det_inc = rate[3]
+    frames = len(outdata)
+    base_inc = freq*oneoverfs
+    alpha = rate[5]
+    for n in range(0, frames):
+        mod_inc = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*walk_mod[n]*walk_amt + max_det_inc*det_mod[n]*dm_amt
+        new_width = max(0.0, min(1.0, width + width_mod[n]*wm_amt))
+        smoothed_widths[0, 0] += alpha*(new_width - smoothed_widths[0, 0])
+        phase1 = states[0, 0]
+        phase2 = phase1 + smoothed_widths[0, 0]
+        phase2 -= np.floor(phase2)
+        table = tables[0, table_band(mod_inc, fs)]
+        output_sample = table_read(table, phase1) - table_read(table, phase2)
+        states[0, 0] += mod_inc
+        states[0, 0] -= np.floor(states[0, 0])
+
+        mod_amp = max(-1.0, min(1.0, amp + amp_mod[n]*am_amt))
+        outdata[n] = output_sample*mod_amp
+
+#--anti-aliased trisaw (difference of two phase-offset parabolas, i.e. the integrated pulse)
+#---(width=0.5: triangle, width≈0.0: sawtooth, width≈1.0: ramp)
+@njit(nogil=True, fastmath=True, cache=True, inline="always")
+def table_triangle(outdata, states, smoothed_widths, tables,
+                walk_mod, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, width, rate):
+    fs = rate[0]
+    oneoverfs = rate[1]
+    max_det_inc = rate[3]
     frames = len(outdata)
     base_inc = freq*oneoverfs
-    alpha = 1.0 - math.exp(-twopi*50.0*oneoverfs)
+    alpha = rate[5]
     for n in range(0, frames):
-        for c in range(0, 2):
-            mod_inc = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*walk_mod[n]*walk_amt + max_det_inc*det_mod[n]*dm_amt
-            new_freq = max(1e-9, mod_inc)*fs
-            nyquist_by_nf = nyquist/new_freq
-            harmonics = 2*int(nyquist_by_nf) + 1
-            harmonic_f = nyquist_by_nf - int(nyquist_by_nf)
-            new_width = max(.01, min(.99, width + width_mod[n]*wm_amt))
-            smoothed_widths[0, c] += alpha*(new_width - smoothed_widths[0, c])
-            smoothed_width = smoothed_widths[0, c]
-            phase1 = states[c, 0]
-            phase2 = phase1 + smoothed_width
-            phase2 -= np.floor(phase2)
-            kernel_den_1 = math.sin(np.pi*phase1)
-            kernel_den_2 = math.sin(np.pi*phase2)
-            if phase1 < 1e-9:
-                slope1 = 1.0-harmonics
+        mod_inc = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*walk_mod[n]*walk_amt + max_det_inc*det_mod[n]*dm_amt
+        new_width = max(.01, min(.99, width + width_mod[n]*wm_amt))
+        smoothed_widths[0, 0] += alpha*(new_width - smoothed_widths[0, 0])
+        smoothed_width = smoothed_widths[0, 0]
+        phase1 = states[0, 0]
+        phase2 = phase1 + smoothed_width
+        phase2 -= np.floor(phase2)
+        table = tables[1, table_band(mod_inc, fs)]
+        output_sample = (table_read(table, phase1) - table_read(table, phase2))/(smoothed_width*(1.0 - smoothed_width))
+        states[0, 0] += mod_inc
+        states[0, 0] -= np.floor(states[0, 0])
+
+        mod_amp = max(-1.0, min(1.0, amp + amp_mod[n]*am_amt))
+        outdata[n] = output_sample*mod_amp
+
+#-dispatch
+#--(alg = 0: sine, 1: sawtooth, 2: pulse, 3: trisaw | alg type = 0: BLIT, 1: polyBLEP, 2: wavetable)
+@njit(nogil=True, fastmath=True, cache=True)
+def osc_block(outdata, params, states, blit_states, blit_integrators, smoothed_widths, followers, tables,
+                walk, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, rate):
+    alg = params[0]
+    alg_type = params[1]
+    width = params[2]
+    amp = params[3]
+    freq = params[4]
+    walk_amt = params[5]
+    state = states[0:4]
+    state2 = states[4:7]
+    blep_integrator = states[8:9]
+    smoothed_blep_width = states[9:10]
+    output_hpf = states[10:12]
+    generate_walk(walk, states[7:8], rate[6])
+    if (alg == 0):
+        generate_sine(state, outdata, walk, walk_amt, width, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate)
+    elif (alg == 1.0):
+        if (alg_type == 0):
+            blit_saw(outdata, blit_states, blit_integrators, width,
+                      walk, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate)
+        elif (alg_type == 2):
+            table_saw(outdata, blit_states, tables, width,
+                      walk, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate)
+        else:
+            polyblep_saw(state, outdata, width, walk, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate)
+    elif (alg == 2.0):
+        if (alg_type == 0):
+            blit_pulse(outdata, blit_states, blit_integrators, smoothed_widths,
+                      walk, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, width, rate)
+        elif (alg_type == 2):
+            table_pulse(outdata, blit_states, smoothed_widths, tables,
+                      walk, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, width, rate)
+        else:
+            polyblep_pulse(state, outdata, state2, width, walk, walk_amt,
+                                pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate)
+    elif (alg == 3.0):
+        if (alg_type == 0):
+            blit_triangle(outdata, blit_states, blit_integrators, smoothed_widths, followers,
+                      walk, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, width, rate)
+        elif (alg_type == 2):
+            table_triangle(outdata, blit_states, smoothed_widths, tables,
+                      walk, walk_amt, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, width, rate)
+        else:
+            polyblep_triangle(state, blep_integrator, smoothed_blep_width, output_hpf, outdata, state2, width, walk, walk_amt,
+                                pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, amp, freq, rate)
+
+#-unison (detuned, stereo-spread copies from the wavetables | phase per copy, shared width smoothing)
+#--(copies spread evenly over +/-spread in detune & pan | sum scaled by gain/sqrt(copies))
+@njit(nogil=True, fastmath=True, cache=True)
+def unison_block(outdata, params, phases, spread_state, smoothed_widths, tables,
+                 walk_mod, pitch_mod, det_mod, amp_mod, width_mod, pm_amt, dm_amt, am_amt, wm_amt, position, pan_mod, pan_amt, gain, rate):
+    alg = params[0]
+    width = params[2]
+    amp = params[3]
+    freq = params[4]
+    walk_amt = params[5]
+    copies = max(1, min(max_unison, int(params[6])))
+    spread = params[7]
+    fs = rate[0]
+    oneoverfs = rate[1]
+    max_det_inc = rate[3]
+    alpha = rate[5]
+    frames = len(outdata)
+    base_inc = freq*oneoverfs
+    #per copy: increment ratio, pan offset (recomputed when copies or spread change)
+    ratios = spread_state[2:2 + max_unison]
+    offsets = spread_state[2 + max_unison:2 + 2*max_unison]
+    if (spread_state[0] != copies) or (spread_state[1] != spread):
+        spread_state[0] = copies
+        spread_state[1] = spread
+        for c in range(0, copies):
+            spread_pos = (2.0*c/(copies - 1) - 1.0) if copies > 1 else 0.0
+            ratios[c] = 2**(spread*spread_pos*unison_max_detune/1200.0)
+            offsets[c] = spread*spread_pos
+    copy_gain = gain/math.sqrt(copies)
+    for n in range(0, frames):
+        mod_inc = base_inc + base_inc*pitch_mod[n]*pm_amt + max_det_inc*walk_mod[n]*walk_amt + max_det_inc*det_mod[n]*dm_amt
+        mod_amp = max(-1.0, min(1.0, amp + amp_mod[n]*am_amt))
+        pan_pos = position + pan_mod[n]*pan_amt
+        if (alg == 2.0) or (alg == 3.0):
+            if alg == 2.0:
+                new_width = max(0.0, min(1.0, width + width_mod[n]*wm_amt))
             else:
-                slope1 = 1.0-math.sin(np.pi*harmonics*phase1)/kernel_den_1
-            if phase2 < 1e-9:
-                slope2 = 1.0-harmonics
+                new_width = max(.01, min(.99, width + width_mod[n]*wm_amt))
+            smoothed_widths[0, 0] += alpha*(new_width - smoothed_widths[0, 0])
+        smoothed_width = smoothed_widths[0, 0]
+        mod_width = 2*np.abs(0.5 - (width + width_mod[n]*wm_amt))
+        left = 0.0
+        right = 0.0
+        for c in range(0, copies):
+            inc = mod_inc*ratios[c]
+            phase = phases[c]
+            if alg == 0.0:
+                sample = math.sin(twopi*phase)*(1.0 - mod_width)
+            elif alg == 1.0:
+                phase_d = 2.0*phase
+                phase_d -= np.floor(phase_d)
+                sample = (table_read(tables[0, table_band(inc, fs)], phase)*(1.0 - mod_width)
+                          + table_read(tables[0, table_band(2.0*inc, fs)], phase_d)*mod_width)
             else:
-                slope2 = 1.0-math.sin(np.pi*harmonics*phase2)/kernel_den_2
-            slope1 *= mod_inc*2
-            slope2 *= mod_inc*2
-            slope1 -= mod_inc*4*harmonic_f*math.cos(twopi*phase1*int(nyquist_by_nf + 1))
-            slope2 -= mod_inc*4*harmonic_f*math.cos(twopi*phase2*int(nyquist_by_nf + 1))             
-            v1, integrators[0, c] = leaky_trapezoidal_integrate(slope1, integrators[0, c])
-            v2, integrators[1, c] = leaky_trapezoidal_integrate(slope2, integrators[1, c])
-            states[c, 0] += mod_inc
-            states[c, 0] -= np.floor(states[c, 0])
-
-            blit_pulse = (v1 - v2)
-            v3, integrators[2, c] = leaky_trapezoidal_integrate(blit_pulse, integrators[2, c])
-            
-            if v3 > followers[0, c]:
-                followers[0, c] = v3
-            if v3 < followers[1, c]:
-                followers[1, c] = v3
-
-            dc_correct = (followers[0, c] + followers[1, c]) / 2.0
-            v3 = v3 - dc_correct
-
-            scale = (mod_inc)/(smoothed_width*(1.0 - smoothed_width))
-            output_sample = v3*scale
-            mod_amp = max(-1.0, min(1.0, amp + amp_mod[n]*am_amt))
-            outdata[n, c] = output_sample*mod_amp
-
-            follower_leak = 1.0 - (mod_inc*10.0)
-            followers[0, c] *= follower_leak
-            followers[1, c] *= follower_leak
+                phase2 = phase + smoothed_width
+                phase2 -= np.floor(phase2)
+                if alg == 2.0:
+                    table = tables[0, table_band(inc, fs)]
+                    sample = table_read(table, phase) - table_read(table, phase2)
+                else:
+                    table = tables[1, table_band(inc, fs)]
+                    sample = (table_read(table, phase) - table_read(table, phase2))/(smoothed_width*(1.0 - smoothed_width))
+            phase += inc
+            phases[c] = phase - np.floor(phase)
+            pan = max(-1.0, min(1.0, pan_pos + offsets[c]))
+            left += sample*(1.0 - pan)
+            right += sample*(1.0 + pan)
+        outdata[n, 0] += left*mod_amp*copy_gain
+        outdata[n, 1] += right*mod_amp*copy_gain
 
 #-utilities
 #--random walk generator
 @njit(nogil=True, fastmath=True, cache=True)
-def generate_walk(output, walk_state):
+def generate_walk(output, walk_state, walk_c):
     frames = len(output)
     walk_offset = 2*random.random() - 1.0
     for n in range(0, frames):
-        walk_state[0] = walk_state[0]*.99999 + .00001*walk_offset
+        walk_state[0] = walk_state[0]*(1.0 - walk_c) + walk_c*walk_offset
         output[n] = walk_state[0]
 
 #--leaky integrator (BLT)
 @njit(nogil=True, fastmath=True, cache=True)
-def leaky_trapezoidal_integrate(x, state, gn=g_norm):
+def leaky_trapezoidal_integrate(x, state, gn):
     x = x*0.5
     v = (x + state)*gn
     next_state = 2*v - state
-    return v, next_state
\ No newline at end of file
+    return v, next_state
+
+#python-level entry points (aot builds when available)
+osc_block_entry = kernel(osc_block, "void(float32[:], float64[:], float32[:], float32[:, :], float32[:, :], float32[:, :], float32[:, :], "
+                                    "float32[:, :, :], float32[:], float32[:], float32[:], float32[:], float32[:], float64, float64, float64, "
+                                    "float64, float64[:])")
+unison_block_entry = kernel(unison_block, "void(float32[:, :], float64[:], float32[:], float64[:], float32[:, :], float32[:, :, :], float32[:], "
+                                          "float32[:], float32[:], float32[:], float32[:], float64, float64, float64, float64, float64, float32[:], "
+                                          "float64, float64, float64[:])")
+generate_walk_entry = kernel(generate_walk, "void(float32[:], float32[:], float64)")
+
+#compile jobs (see compiler.py)
+def test_osc():
+    return WrappedOsc(1, 0.5, 440.0, 44100), np.zeros((16), dtype=np.float32), np.zeros((16), dtype=np.float32)
+
+@compile_job(generate_walk_entry)
+def compile_generate_walk():
+    osc, test_out, mod_test = test_osc()
+    generate_walk_entry(osc.random_walk[:16], osc.walk_state, osc.rate[6])
+
+@compile_job(generate_sine, callee=True)
+def compile_generate_sine():
+    osc, test_out, mod_test = test_osc()
+    generate_sine(osc.state, test_out, osc.random_walk[:16], 1.0, osc.pulsewidth, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 1.0, 440.0, osc.rate)
+
+@compile_job(polyblep_saw, callee=True)
+def compile_polyblep_saw():
+    osc, test_out, mod_test = test_osc()
+    polyblep_saw(osc.state, test_out, osc.pulsewidth, osc.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 1.0, 440.0, osc.rate)
+
+@compile_job(polyblep_pulse, callee=True)
+def compile_polyblep_pulse():
+    osc, test_out, mod_test = test_osc()
+    polyblep_pulse(osc.state, test_out, osc.state2, 0.5, osc.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 1.0, 440.0, osc.rate)
+
+@compile_job(polyblep_triangle, callee=True)
+def compile_polyblep_triangle():
+    osc, test_out, mod_test = test_osc()
+    polyblep_triangle(osc.state, osc.blep_integrator, osc.smoothed_blep_width, osc.output_hpf, test_out, osc.state2, 0.5, osc.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 1.0, 440.0, osc.rate)
+
+@compile_job(blit_saw, callee=True)
+def compile_blit_saw():
+    osc, test_out, mod_test = test_osc()
+    blit_saw(test_out, osc.blit_states, osc.blit_integrators, osc.pulsewidth, osc.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 0.5, 440.0, osc.rate)
+
+@compile_job(blit_pulse, callee=True)
+def compile_blit_pulse():
+    osc, test_out, mod_test = test_osc()
+    blit_pulse(test_out, osc.blit_states, osc.blit_integrators, osc.smoothed_widths, osc.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 0.5, 440.0, 0.5, osc.rate)
+
+@compile_job(blit_triangle, callee=True)
+def compile_blit_triangle():
+    osc, test_out, mod_test = test_osc()
+    blit_triangle(test_out, osc.blit_states, osc.blit_integrators, osc.smoothed_widths, osc.blit_env_follower, osc.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 0.5, 440.0, 0.5, osc.rate)
+
+@compile_job(table_saw, callee=True)
+def compile_table_saw():
+    osc, test_out, mod_test = test_osc()
+    table_saw(test_out, osc.blit_states, osc.tables, osc.pulsewidth, osc.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 0.5, 440.0, osc.rate)
+
+@compile_job(table_pulse, callee=True)
+def compile_table_pulse():
+    osc, test_out, mod_test = test_osc()
+    table_pulse(test_out, osc.blit_states, osc.smoothed_widths, osc.tables, osc.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 0.5, 440.0, 0.5, osc.rate)
+
+@compile_job(table_triangle, callee=True)
+def compile_table_triangle():
+    osc, test_out, mod_test = test_osc()
+    table_triangle(test_out, osc.blit_states, osc.smoothed_widths, osc.tables, osc.random_walk[:16], 1.0, mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 0.5, 440.0, 0.5, osc.rate)
+
+@compile_job(osc_block_entry)
+def compile_osc_block():
+    osc, test_out, mod_test = test_osc()
+    osc_block_entry(test_out, osc.params, osc.states, osc.blit_states, osc.blit_integrators, osc.smoothed_widths, osc.blit_env_follower, osc.tables,
+                    osc.random_walk[:16], mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, osc.rate)
+
+@compile_job(unison_block_entry)
+def compile_unison_block():
+    osc, test_out, mod_test = test_osc()
+    stereo_test = np.zeros((16, 2), dtype=np.float32)
+    unison_block_entry(stereo_test, osc.params, osc.unison_phases, osc.unison_spread, osc.smoothed_widths, osc.tables,
+                       osc.random_walk[:16], mod_test, mod_test, mod_test, mod_test, 0.0, 0.0, 0.0, 0.0, 0.0, mod_test, 0.0, 0.33, osc.rate)
@@ -0,0 +1,77 @@
+import numpy as np
+from time import perf_counter
+
+#per-block stages (engine render_block order)
+# voices: voice render (all render threads), modulators: delay modulators,
+# sum+delay: voice sum & delay (part_block, every part), recorder/limiter/scope: dc blocker, recorder, limiter & scope write (bus_block)
+stage_names = ("voices", "modulators", "sum+delay", "recorder/limiter/scope")
+voice_stage, modulator_stage, part_stage, bus_stage = range(0, len(stage_names))
+
+#dsp load meter
+# the audio thread writes one ring slot per callback (wall time, deadline, stage times) & then publishes it (written += 1)
+# readers copy published slots without locking (single writer | a slot is only reused after length more callbacks)
+class LoadMeter():
+    def __init__(self, fs, length=256):
+        self.fs = float(fs)
+        self.length = length
+        self.callback_times = np.zeros((length), dtype=np.float64)
+        self.deadlines = np.zeros((length), dtype=np.float64)
+        self.stage_times = np.zeros((length, len(stage_names)), dtype=np.float64)
+        self.block_stages = np.zeros((len(stage_names)), dtype=np.float64)    #current callback (summed over sub-blocks)
+        #counters
+        self.written = 0
+        self.xruns = 0
+        self.max_load = 0.0
+
+    #audio thread
+    def start_callback(self):
+        self.block_stages[:] = 0.0
+        return perf_counter()
+
+    #add the time since start to a stage | returns now (start of the next stage)
+    def mark(self, stage, start):
+        now = perf_counter()
+        self.block_stages[stage] += now - start
+        return now
+
+    def end_callback(self, start, frames, underflow):
+        elapsed = perf_counter() - start
+        deadline = frames/self.fs
+        slot = self.written % self.length
+        self.callback_times[slot] = elapsed
+        self.deadlines[slot] = deadline
+        self.stage_times[slot] = self.block_stages
+        if underflow:
+            self.xruns += 1
+        if deadline > 0.0:
+            self.max_load = max(self.max_load, elapsed/deadline)
+        self.written += 1
+
+    #readers
+    #last count callbacks (oldest first): wall times, deadlines, stage times (seconds)
+    def recent(self, count=64):
+        written = self.written
+        count = min(count, written, self.length)
+        slots = np.arange(written - count, written) % self.length
+        return self.callback_times[slots], self.deadlines[slots], self.stage_times[slots]
+
+    #load = callback wall time/block deadline
+    # (mean load, max load over the last count callbacks, max load since reset, xruns, callbacks)
+    def get_stats(self, count=64):
+        callback_times, deadlines, _ = self.recent(count)
+        if len(callback_times) == 0:
+            return (0.0, 0.0, self.max_load, self.xruns, self.written)
+        loads = callback_times/np.maximum(deadlines, 1e-9)
+        return (float(np.mean(loads)), float(np.max(loads)), self.max_load, self.xruns, self.written)
+
+    #mean seconds per callback for each stage (last count callbacks)
+    def get_stage_times(self, count=64):
+        _, _, stage_times = self.recent(count)
+        if len(stage_times) == 0:
+            return dict.fromkeys(stage_names, 0.0)
+        means = np.mean(stage_times, axis=0)
+        return {name: float(means[n]) for n, name in enumerate(stage_names)}
+
+    def reset_stats(self):
+        self.xruns = 0
+        self.max_load = 0.0
@@ -1,127 +1,121 @@
 import numpy as np
 from numba import njit
+from .aot import kernel
+from .compiler import compile_job
 import math
 
 #constants
-fs = 44100.0
 twopi = 2*math.pi
 oneoverpi = 1.0/math.pi
 oneovertwopi = 1.0/twopi
-oneoverfs = 1.0/44100.0
-max_increment = twopi*10.0*oneoverfs
 log_threshold = math.log(.0001)
+menv_threshold = np.float32(.0001)
 
 class LFO():
     def __init__(self, fs, freq=10.0, offset=0.0, shape=0):
         self.fs = float(fs)
         self.oneoverfs = 1.0/self.fs
         self.output = np.ascontiguousarray(np.zeros((2048), dtype=np.float32))
-        self.current_phase = np.zeros((1), dtype=np.float32)
         self.phase_increment = np.float32(twopi*(freq/float(fs)))
         self.frequency = freq
         self.phase_offset = np.float32(offset)
         self.shape = shape
-        self.held_value = np.zeros((1), dtype=np.float32)
-        self.held_value[0] = 2*np.random.random() - 1.0
-        self.slew_buffer = np.zeros((1), dtype=np.float32)
-
-        #init numba compile calls
-        test_out = np.zeros((16), dtype=np.float32)
-        mod_test = np.zeros((16), dtype=np.float32)
-        phase_test = np.zeros((1), dtype=np.float32)
-        f32_increment = np.float32(0.1)
-        f32_offset = np.float32(0.0)
-        generate_sine(phase_test, f32_offset, f32_increment, test_out, mod_test, mod_test, 0.0, 0.0)
-        generate_triangle(phase_test, f32_offset, f32_increment, test_out, mod_test, mod_test, 0.0, 0.0)
-        generate_ramp(phase_test, f32_offset, f32_increment, test_out, mod_test, mod_test, 0.0, 0.0)
-        generate_sawtooth(phase_test, f32_offset, f32_increment, test_out, mod_test, mod_test, 0.0, 0.0)
-        generate_square(phase_test, f32_offset, f32_increment, test_out, mod_test, mod_test, 0.0, 0.0)
-        sample_and_hold(phase_test, f32_offset, f32_increment, test_out, np.zeros((1), dtype=np.float32), np.zeros((1), dtype=np.float32), mod_test, mod_test, 0.0, 0.0)
+        #params: phase increment, phase offset, shape, max. increment (10Hz), 1/fs
+        self.params = np.array([self.phase_increment, self.phase_offset, shape, twopi*10.0*self.oneoverfs, self.oneoverfs], dtype=np.float32)
+        #states: phase, held value, slew
+        self.states = np.zeros((3), dtype=np.float32)
+        self.states[1] = 2*np.random.random() - 1.0
+        self.set_views()
 
     def process_block(self, frames, mod_buffers, mod_values):
-        if self.shape == 0:
-            generate_sine(self.current_phase, self.phase_offset, self.phase_increment, self.output[:frames], mod_buffers[0], mod_buffers[1], mod_values[0], mod_values[1])
-        elif self.shape == 1:
-            generate_triangle(self.current_phase, self.phase_offset, self.phase_increment, self.output[:frames], mod_buffers[0], mod_buffers[1], mod_values[0], mod_values[1])
-        elif self.shape == 2:
-            generate_ramp(self.current_phase, self.phase_offset, self.phase_increment, self.output[:frames], mod_buffers[0], mod_buffers[1], mod_values[0], mod_values[1])
-        elif self.shape == 3:
-            generate_sawtooth(self.current_phase, self.phase_offset, self.phase_increment, self.output[:frames], mod_buffers[0], mod_buffers[1], mod_values[0], mod_values[1])
-        elif self.shape == 4:
-            generate_square(self.current_phase, self.phase_offset, self.phase_increment, self.output[:frames], mod_buffers[0], mod_buffers[1], mod_values[0], mod_values[1])
-        elif self.shape == 5:
-            sample_and_hold(self.current_phase, self.phase_offset, self.phase_increment, self.output, self.held_value, self.slew_buffer, mod_buffers[0], mod_buffers[1], mod_values[0], mod_values[1])
+        lfo_block_entry(self.params, self.states, self.output[:frames], mod_buffers[0], mod_buffers[1], mod_values[0], mod_values[1])
+
+    #move state into preallocated (voice-owned) arrays
+    def bind(self, params, states, output):
+        params[:] = self.params
+        states[:] = self.states
+        output[:] = self.output
+        self.params = params
+        self.states = states
+        self.output = output
+        self.set_views()
+
+    def set_views(self):
+        self.current_phase = self.states[0:1]
+        self.held_value = self.states[1:2]
+        self.slew_buffer = self.states[2:3]
 
     def set_frequency(self, new_freq):
         self.frequency = np.float32(new_freq)
         self.phase_increment = np.float32(twopi*(self.frequency/self.fs))
+        self.params[0] = self.phase_increment
     
     def set_offset(self, new_offset):
         self.phase_offset = np.float32(twopi*new_offset)
+        self.params[1] = self.phase_offset
 
     def set_shape(self, new_shape):
         self.shape = new_shape
+        self.params[2] = new_shape
     
 
 class ModEnv():
     def __init__(self, fs, attack=0.5, release=0.5, mode=0):
         self.output = np.ascontiguousarray(np.zeros((2048), dtype=np.float32))
         self.value = np.zeros((1), dtype=np.float32)
-        self.state = np.zeros((1), dtype=np.int32)
-        self.run = np.zeros((1), dtype=np.int32)
+        #flags: state, run
+        self.flags = np.zeros((2), dtype=np.int32)
         self.gate = False
         self.prev_gate = [False]
         self.attack = attack
         self.release = release
         self.mode = mode
         self.fs = float(fs)
-        self.threshold = np.float32(.0001)
-        self.attack_sample = 0
-        self.release_sample = 0
-
-        #init numba compile calls
-        f64_attack_c = 0.1
-        f64_release_c = 0.1
-        f32_threshold = np.float32(.0001)
-        mod_test = np.zeros((16), dtype=np.float32)
-        gen_AR_oneshot(np.zeros((1), dtype=np.float32), np.zeros((1), dtype=np.int32), True, np.zeros((1), dtype=np.int32),
-                      f64_attack_c, f64_release_c, f32_threshold, np.zeros((16), dtype=np.float32), 0, 0, mod_test, mod_test, 0.0, 0.0)
-        gen_AR_loop(np.zeros((1), dtype=np.float32), np.zeros((1), dtype=np.int32), True,
-                   f64_attack_c, f64_release_c, f32_threshold, np.zeros((16), dtype=np.float32), 0, 0, mod_test, mod_test, 0.0, 0.0)
-        gen_AHR(np.zeros((1), dtype=np.float32), np.zeros((1), dtype=np.int32), True,
-               f64_attack_c, f64_release_c, f32_threshold, np.zeros((16), dtype=np.float32), 0, 0, mod_test, mod_test, 0.0, 0.0)
+        self.threshold = menv_threshold
+        #params: attack, release, mode, gate, fs
+        self.params = np.array([attack, release, mode, 0.0, self.fs], dtype=np.float64)
+        self.set_views()
 
     def process_block(self, frames, mod_buffers, mod_values):
-        if self.mode == 0:
-            gen_AR_oneshot(self.value, self.state, self.gate, self.run, self.attack, self.release, self.threshold, self.output[:frames], self.attack_sample, self.release_sample, mod_buffers[0], mod_buffers[1], mod_values[0], mod_values[1])
-        elif self.mode == 1:
-            gen_AHR(self.value, self.state, self.gate, self.attack, self.release, self.threshold, self.output[:frames], self.attack_sample, self.release_sample, mod_buffers[0], mod_buffers[1], mod_values[0], mod_values[1])
-        elif self.mode == 2:
-            gen_AR_loop(self.value, self.state, self.gate, self.attack, self.release, self.threshold, self.output[:frames], self.attack_sample, self.release_sample, mod_buffers[0], mod_buffers[1], mod_values[0], mod_values[1])
+        menv_block_entry(self.params, self.value, self.flags, self.output[:frames], mod_buffers[0], mod_buffers[1], mod_values[0], mod_values[1])
+
+    #move state into preallocated (voice-owned) arrays
+    def bind(self, params, value, flags, output):
+        params[:] = self.params
+        value[:] = self.value
+        flags[:] = self.flags
+        output[:] = self.output
+        self.params = params
+        self.value = value
+        self.flags = flags
+        self.output = output
+        self.set_views()
+
+    def set_views(self):
+        self.state = self.flags[0:1]
+        self.run = self.flags[1:2]
 
     def set_attack(self, new_attack):
         self.attack = new_attack
+        self.params[0] = new_attack
     
     def set_release(self, new_release):
         self.release = new_release
+        self.params[1] = new_release
 
     def set_mode(self, new_mode):
         self.mode = new_mode
+        self.params[2] = new_mode
 
     def update_gate(self, new_gate):
         self.gate = new_gate
-
-    def update_attack_start(self, attack_sample):
-        self.attack_sample = attack_sample
-
-    def update_release_start(self, release_sample):
-        self.release_sample = release_sample
+        self.params[3] = float(new_gate)
 
 #numba DSP
 #-modulators (waveforms)
 #--sinusoid
 @njit(nogil=True, fastmath=True, cache=True)
-def generate_sine(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt):
+def generate_sine(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt, max_increment):
     frames = len(output)
     for n in range(0, frames):
         mod_increment = max(0.0, min(max_increment, increment + max_increment*freq_mod[n]*fm_amt))
@@ -133,7 +127,7 @@ def generate_sine(phase, offset, increment, output, freq_mod, phase_mod, fm_amt,
 
 #--triangle  
 @njit(nogil=True, fastmath=True, cache=True)
-def generate_triangle(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt):
+def generate_triangle(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt, max_increment):
     frames = len(output)
     for n in range(0, frames):
         mod_increment = max(0.0, min(max_increment, increment + max_increment*freq_mod[n]*fm_amt))
@@ -148,7 +142,7 @@ def generate_triangle(phase, offset, increment, output, freq_mod, phase_mod, fm_
 
 #--ramp
 @njit(nogil=True, fastmath=True, cache=True)
-def generate_ramp(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt):
+def generate_ramp(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt, max_increment):
     frames = len(output)
     for n in range(0, frames):
         mod_increment = max(0.0, min(max_increment, increment + max_increment*freq_mod[n]*fm_amt))
@@ -163,7 +157,7 @@ def generate_ramp(phase, offset, increment, output, freq_mod, phase_mod, fm_amt,
 
 #--sawtooth
 @njit(nogil=True, fastmath=True, cache=True)
-def generate_sawtooth(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt):
+def generate_sawtooth(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt, max_increment):
     frames = len(output)
     for n in range(0, frames):
         mod_increment = max(0.0, min(max_increment, increment + max_increment*freq_mod[n]*fm_amt))
@@ -178,7 +172,7 @@ def generate_sawtooth(phase, offset, increment, output, freq_mod, phase_mod, fm_
 
 #--square (+pwm)
 @njit(nogil=True, fastmath=True, cache=True)
-def generate_square(phase, offset, increment, output, freq_mod, width_mod, fm_amt, wm_amt):
+def generate_square(phase, offset, increment, output, freq_mod, width_mod, fm_amt, wm_amt, max_increment):
     frames = len(output)
     width = offset*oneovertwopi
     for n in range(0, frames):
@@ -193,7 +187,7 @@ def generate_square(phase, offset, increment, output, freq_mod, width_mod, fm_am
 
 #--sample & hold (+slew)
 @njit(nogil=True, fastmath=True, cache=True)
-def sample_and_hold(phase, offset, increment, output, held_value, slew_buffer, freq_mod, slew_mod, fm_amt, sm_amt):
+def sample_and_hold(phase, offset, increment, output, held_value, slew_buffer, freq_mod, slew_mod, fm_amt, sm_amt, max_increment, oneoverfs):
     frames = len(output)
     norm_offset = offset*oneovertwopi
     cutoff = 25.0*norm_offset
@@ -211,7 +205,7 @@ def sample_and_hold(phase, offset, increment, output, held_value, slew_buffer, f
 #-modulators (functions)
 #--attack/release envelope (oneshot)
 @njit(nogil=True, fastmath=True, cache=True)
-def gen_AR_oneshot(value, state, gate, run, attack, release, threshold, output, attack_start, release_start, attack_mod, release_mod, am_amt, rm_amt):
+def gen_AR_oneshot(value, state, gate, run, attack, release, threshold, output, attack_mod, release_mod, am_amt, rm_amt, fs):
     frames = len(output)
     top_threshold =  1.0 - threshold
     for n in range(0, frames):
@@ -229,7 +223,7 @@ def gen_AR_oneshot(value, state, gate, run, attack, release, threshold, output,
                 value[0] = 0.0
         else:
             if not run[0]:
-                if (state[0] == 0) and (n >= attack_start):       #start
+                if state[0] == 0:                                 #start
                     state[0] = 1
                 elif state[0] == 1:                               #attack
                     if value[0] < top_threshold:
@@ -248,7 +242,7 @@ def gen_AR_oneshot(value, state, gate, run, attack, release, threshold, output,
 
 #--attack/release envelope (loop)
 @njit(nogil=True, fastmath=True, cache=True)
-def gen_AR_loop(value, state, gate, attack, release, threshold, output, attack_start, release_start, attack_mod, release_mod, am_amt, rm_amt):
+def gen_AR_loop(value, state, gate, attack, release, threshold, output, attack_mod, release_mod, am_amt, rm_amt, fs):
     frames = len(output)
     top_threshold =  1.0 - threshold
     for n in range(0, frames):
@@ -263,7 +257,7 @@ def gen_AR_loop(value, state, gate, attack, release, threshold, output, attack_s
             else:                           #stop
                 value[0] = 0.0
         else:
-            if state[0] == 0  and (n >= attack_start):               #start
+            if state[0] == 0:               #start
                 state[0] = 1
             elif state[0] == 1:             #attack
                 if value[0] < top_threshold:
@@ -281,7 +275,7 @@ def gen_AR_loop(value, state, gate, attack, release, threshold, output, attack_s
 
 #--attack/hold/release envelope
 @njit(nogil=True, fastmath=True, cache=True)
-def gen_AHR(value, state, gate, attack, release, threshold, output, attack_start, release_start, attack_mod, release_mod, am_amt, rm_amt):
+def gen_AHR(value, state, gate, attack, release, threshold, output, attack_mod, release_mod, am_amt, rm_amt, fs):
     frames = len(output)
     top_threshold =  1.0 - threshold
     for n in range(0, frames):
@@ -296,7 +290,7 @@ def gen_AHR(value, state, gate, attack, release, threshold, output, attack_start
             else:                           #stop
                 value[0] = 0.0
         else:
-            if state[0] == 0  and (n >= attack_start):               #start
+            if state[0] == 0:               #start
                 state[0] = 1
             elif state[0] == 1:             #attack
                 if value[0] < top_threshold:
@@ -309,4 +303,119 @@ def gen_AHR(value, state, gate, attack, release, threshold, output, attack_start
                     value[0] += attack_c*(1.0 - value[0])
                 else:
                     value[0] = 1.0
-        output[n] = value[0]
\ No newline at end of file
+        output[n] = value[0]
+
+#-dispatch
+#--lfo (shape = 0: sine, 1: triangle, 2: ramp, 3: sawtooth, 4: square, 5: sample & hold)
+@njit(nogil=True, fastmath=True, cache=True)
+def lfo_block(params, states, output, freq_mod, phase_mod, fm_amt, pm_amt):
+    increment = params[0]
+    offset = params[1]
+    shape = params[2]
+    max_increment = params[3]
+    phase = states[0:1]
+    if shape == 0:
+        generate_sine(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt, max_increment)
+    elif shape == 1:
+        generate_triangle(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt, max_increment)
+    elif shape == 2:
+        generate_ramp(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt, max_increment)
+    elif shape == 3:
+        generate_sawtooth(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt, max_increment)
+    elif shape == 4:
+        generate_square(phase, offset, increment, output, freq_mod, phase_mod, fm_amt, pm_amt, max_increment)
+    elif shape == 5:
+        sample_and_hold(phase, offset, increment, output, states[1:2], states[2:3], freq_mod, phase_mod, fm_amt, pm_amt, max_increment, params[4])
+
+#--mod envelope (mode = 0: AR, 1: AHR, 2: loop)
+@njit(nogil=True, fastmath=True, cache=True)
+def menv_block(params, value, flags, output, attack_mod, release_mod, am_amt, rm_amt):
+    attack = params[0]
+    release = params[1]
+    mode = params[2]
+    gate = params[3] != 0.0
+    fs = params[4]
+    if mode == 0:
+        gen_AR_oneshot(value, flags[0:1], gate, flags[1:2], attack, release, menv_threshold, output, attack_mod, release_mod, am_amt, rm_amt, fs)
+    elif mode == 1:
+        gen_AHR(value, flags[0:1], gate, attack, release, menv_threshold, output, attack_mod, release_mod, am_amt, rm_amt, fs)
+    elif mode == 2:
+        gen_AR_loop(value, flags[0:1], gate, attack, release, menv_threshold, output, attack_mod, release_mod, am_amt, rm_amt, fs)
+
+#python-level entry points (aot builds when available)
+lfo_block_entry = kernel(lfo_block, "void(float32[:], float32[:], float32[:], float32[:], float32[:], float64, float64)")
+menv_block_entry = kernel(menv_block, "void(float64[:], float32[:], int32[:], float32[:], float32[:], float32[:], float64, float64)")
+
+#compile jobs (see compiler.py)
+@compile_job(generate_sine, callee=True)
+def compile_lfo_sine():
+    lfo = LFO(44100)
+    test_out = np.zeros((16), dtype=np.float32)
+    mod_test = np.zeros((16), dtype=np.float32)
+    generate_sine(np.zeros((1), dtype=np.float32), np.float32(0.0), np.float32(0.1), test_out, mod_test, mod_test, 0.0, 0.0, lfo.params[3])
+
+@compile_job(generate_triangle, callee=True)
+def compile_lfo_triangle():
+    lfo = LFO(44100)
+    test_out = np.zeros((16), dtype=np.float32)
+    mod_test = np.zeros((16), dtype=np.float32)
+    generate_triangle(np.zeros((1), dtype=np.float32), np.float32(0.0), np.float32(0.1), test_out, mod_test, mod_test, 0.0, 0.0, lfo.params[3])
+
+@compile_job(generate_ramp, callee=True)
+def compile_lfo_ramp():
+    lfo = LFO(44100)
+    test_out = np.zeros((16), dtype=np.float32)
+    mod_test = np.zeros((16), dtype=np.float32)
+    generate_ramp(np.zeros((1), dtype=np.float32), np.float32(0.0), np.float32(0.1), test_out, mod_test, mod_test, 0.0, 0.0, lfo.params[3])
+
+@compile_job(generate_sawtooth, callee=True)
+def compile_lfo_sawtooth():
+    lfo = LFO(44100)
+    test_out = np.zeros((16), dtype=np.float32)
+    mod_test = np.zeros((16), dtype=np.float32)
+    generate_sawtooth(np.zeros((1), dtype=np.float32), np.float32(0.0), np.float32(0.1), test_out, mod_test, mod_test, 0.0, 0.0, lfo.params[3])
+
+@compile_job(generate_square, callee=True)
+def compile_lfo_square():
+    lfo = LFO(44100)
+    test_out = np.zeros((16), dtype=np.float32)
+    mod_test = np.zeros((16), dtype=np.float32)
+    generate_square(np.zeros((1), dtype=np.float32), np.float32(0.0), np.float32(0.1), test_out, mod_test, mod_test, 0.0, 0.0, lfo.params[3])
+
+@compile_job(sample_and_hold, callee=True)
+def compile_sample_and_hold():
+    lfo = LFO(44100)
+    test_out = np.zeros((16), dtype=np.float32)
+    mod_test = np.zeros((16), dtype=np.float32)
+    sample_and_hold(np.zeros((1), dtype=np.float32), np.float32(0.0), np.float32(0.1), test_out, np.zeros((1), dtype=np.float32), np.zeros((1), dtype=np.float32),
+                    mod_test, mod_test, 0.0, 0.0, lfo.params[3], lfo.params[4])
+
+@compile_job(lfo_block_entry)
+def compile_lfo_block():
+    lfo = LFO(44100)
+    mod_test = np.zeros((16), dtype=np.float32)
+    lfo_block_entry(lfo.params, np.zeros((3), dtype=np.float32), np.zeros((16), dtype=np.float32), mod_test, mod_test, 0.0, 0.0)
+
+@compile_job(gen_AR_oneshot, callee=True)
+def compile_gen_AR_oneshot():
+    mod_test = np.zeros((16), dtype=np.float32)
+    gen_AR_oneshot(np.zeros((1), dtype=np.float32), np.zeros((1), dtype=np.int32), True, np.zeros((1), dtype=np.int32),
+                   0.1, 0.1, menv_threshold, np.zeros((16), dtype=np.float32), mod_test, mod_test, 0.0, 0.0, 44100.0)
+
+@compile_job(gen_AR_loop, callee=True)
+def compile_gen_AR_loop():
+    mod_test = np.zeros((16), dtype=np.float32)
+    gen_AR_loop(np.zeros((1), dtype=np.float32), np.zeros((1), dtype=np.int32), True,
+                0.1, 0.1, menv_threshold, np.zeros((16), dtype=np.float32), mod_test, mod_test, 0.0, 0.0, 44100.0)
+
+@compile_job(gen_AHR, callee=True)
+def compile_gen_AHR():
+    mod_test = np.zeros((16), dtype=np.float32)
+    gen_AHR(np.zeros((1), dtype=np.float32), np.zeros((1), dtype=np.int32), True,
+            0.1, 0.1, menv_threshold, np.zeros((16), dtype=np.float32), mod_test, mod_test, 0.0, 0.0, 44100.0)
+
+@compile_job(menv_block_entry)
+def compile_menv_block():
+    menv = ModEnv(44100)
+    mod_test = np.zeros((16), dtype=np.float32)
+    menv_block_entry(menv.params, np.zeros((1), dtype=np.float32), np.zeros((2), dtype=np.int32), np.zeros((16), dtype=np.float32), mod_test, mod_test, 0.0, 0.0)
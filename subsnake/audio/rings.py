@@ -0,0 +1,52 @@
+import numpy as np
+
+#single-producer/single-consumer ring of fixed-size records (preallocated numpy array, plain or structured dtype)
+# the producer writes a slot & then publishes it (written += 1) | the consumer copies published slots & then frees them (read += 1)
+# each counter has a single writer, so neither side locks or allocates a queue entry | a full ring drops new records (counted)
+class SPSCRing():
+    def __init__(self, dtype, length=256):
+        self.records = np.zeros((length), dtype=dtype)
+        self.length = length
+        self.written = 0
+        self.read = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.written - self.read
+
+    #producer
+    # record: scalar (plain dtype) or tuple of fields (structured dtype)
+    def push(self, record):
+        written = self.written
+        if (written - self.read) >= self.length:
+            self.dropped += 1
+            return False
+        self.records[written % self.length] = record
+        self.written = written + 1
+        return True
+
+    #consumer
+    #copy up to len(out) published records into out (oldest first) | returns the count
+    def pop_into(self, out):
+        read = self.read
+        count = min(self.written - read, len(out))
+        if count > 0:
+            start = read % self.length
+            first = min(count, self.length - start)
+            out[:first] = self.records[start:start + first]
+            out[first:count] = self.records[:count - first]
+            self.read = read + count
+        return count
+
+    #copy the oldest published record into out[0] (caller-provided 1-element array of the ring's dtype) | returns False if empty
+    def pop(self, out):
+        read = self.read
+        if read == self.written:
+            return False
+        out[0] = self.records[read % self.length]
+        self.read = read + 1
+        return True
+
+    #consumer only (discard published records)
+    def clear(self):
+        self.read = self.written
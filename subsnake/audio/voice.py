@@ -1,365 +1,543 @@
 import numpy as np
-from .generators import WrappedOsc
-from .filters import HalSVF, ZDFSVF
-from .envelopes import ADSR
-from .modulators import LFO, ModEnv
-from .effects import Panner
+from numba import njit
+from .generators import WrappedOsc, osc_block, osc_rate, unison_block, generate_walk, max_unison
+from .wavetables import load_tables
+from .filters import HalSVF, ZDFSVF, filter_block_hal, filter_block_zdf
+from .envelopes import ADSR, envelope_block
+from .modulators import LFO, ModEnv, lfo_block, menv_block
+from .effects import Panner, pan_mono
+from .aot import kernel
+from .compiler import compile_job
 
-fs = 44100
+twopi = 2*np.pi
+
+#internal buffer length (max. frames per render call)
+max_block_size = 2048
+
+#mod destinations (index into VoiceBank.mod_modes & VoiceBank.mod_amounts)
+mod_destinations = ["osc_freq", "osc_det", "osc_amp", "osc_width",
+                    "osc2_freq", "osc2_det", "osc2_amp", "osc2_width",
+                    "osc3_freq", "osc3_det", "osc3_amp", "osc3_width",
+                    "osc_pan", "osc2_pan", "osc3_pan",
+                    "filt_freq", "filt_res", "filt_drive", "filt_sat", "fenv_amt",
+                    "fenv_att", "fenv_dec", "fenv_sus", "fenv_rel",
+                    "env_att", "env_dec", "env_sus", "env_rel",
+                    "lfo1_freq", "lfo1_phase", "lfo2_freq", "lfo2_phase",
+                    "menv1_att", "menv1_rel", "menv2_att", "menv2_rel"]
+mod_index = {name: index for index, name in enumerate(mod_destinations)}
+#first destination of each module group
+osc_mods = 0
+pan_mods = 12
+filt_mods = 15
+fenv_mods = 20
+env_mods = 24
+lfo_mods = 28
+menv_mods = 32
+
+#shared parameters (index into VoiceBank.shared_params) & defaults
+# written by the gui/midi (one slot per change), snapshot by the audio thread once per block
+shared_defaults = {"osc1_alg": 2.0, "osc1_type": 0.0, "osc1_width": 0.5, "osc1_amp": 0.5, "osc1_pitch": 0.0, "osc1_detune": 0.0,
+                   "osc2_alg": 2.0, "osc2_type": 0.0, "osc2_width": 0.5, "osc2_amp": 0.5, "osc2_pitch": 0.0, "osc2_detune": 0.0,
+                   "osc3_alg": 2.0, "osc3_type": 0.0, "osc3_width": 0.5, "osc3_amp": 0.5, "osc3_pitch": 0.0, "osc3_detune": 0.0,
+                   "osc_drift": 0.0, "osc_unison": 1.0, "osc_spread": 0.0,
+                   "pan1": 0.0, "pan2": 0.0, "pan3": 0.0,
+                   "filt_cutoff": 3520.0, "filt_res": 10.0, "filt_drive": 1.0, "filt_sat": 8.0, "filt_type": 0.0,
+                   "filt_track": 0.0, "fenv_amt": 0.0, "filt_mode": 0.0, "filt_oversample": 8.0,
+                   "env_att": 0.01, "env_dec": 1.0, "env_sus": 0.5, "env_rel": 1.0,
+                   "fenv_att": 0.01, "fenv_dec": 0.5, "fenv_sus": 0.5, "fenv_rel": 0.5,
+                   "lfo1_freq": 5.0, "lfo1_phase": 0.0, "lfo1_shape": 0.0, "lfo2_freq": 5.0, "lfo2_phase": 0.0, "lfo2_shape": 1.0,
+                   "menv1_att": 0.5, "menv1_rel": 0.5, "menv1_mode": 0.0, "menv2_att": 0.5, "menv2_rel": 0.5, "menv2_mode": 1.0}
+shared_names = list(shared_defaults)
+shared_index = {name: index for index, name in enumerate(shared_names)}
+#first slot of each module group
+osc_slots = 0
+pan_slots = 21
+filt_slots = 24
+env_slots = 33
+fenv_slots = 37
+lfo_slots = 41
+menv_slots = 47
+#slots within each group (oscillators & modulators repeat every *_stride slots)
+osc_stride = 6
+osc_alg, osc_type, osc_width, osc_amp, osc_pitch, osc_detune = 0, 1, 2, 3, 4, 5
+osc_drift_slot = shared_index["osc_drift"]
+osc_unison_slot = shared_index["osc_unison"]
+osc_spread_slot = shared_index["osc_spread"]
+filt_cutoff, filt_res, filt_drive, filt_sat, filt_type, filt_track, filt_fenv, filt_mode, filt_oversample = 0, 1, 2, 3, 4, 5, 6, 7, 8
+env_stride = 4
+lfo_stride = 3
+menv_stride = 3
+
+#active stage flags (VoiceBank.block_active, from mixer levels, pans, fenv amount & mod routing | see route_block)
+# oscillators 1-3, filter envelope, stereo (off: centred pans, left = right), mod sources (none, lfo 1, lfo 2, menv 1, menv 2)
+fenv_flag = 3
+stereo_flag = 4
+source_flags = 5
+
+class VoiceBank():
+    def __init__(self, voices=16, fs=44100, control_period=1):
+        self.voices = voices
+        self.fs = float(fs)
+        self.osc_rate = osc_rate(fs)
+        #filter/envelope coefficient update period (samples, 1 = per sample)
+        self.control_period = control_period
+        #audio buffers
+        self.outputs = np.ascontiguousarray(np.zeros((voices, max_block_size, 2), dtype=np.float32))
+        self.osc_outs = np.ascontiguousarray(np.zeros((voices, 3, max_block_size), dtype=np.float32))
+        self.osc_sums = np.ascontiguousarray(np.zeros((voices, max_block_size, 2), dtype=np.float32))
+        self.filt_outs = np.ascontiguousarray(np.zeros((voices, max_block_size, 2), dtype=np.float32))
+        self.fenv_ins = np.ascontiguousarray(np.ones((voices, max_block_size, 2), dtype=np.float32))
+        self.fenv_outs = np.ascontiguousarray(np.zeros((voices, max_block_size, 2), dtype=np.float32))
+        #mod sources (none, lfo 1, lfo 2, menv 1, menv 2)
+        self.mod_sources = np.ascontiguousarray(np.zeros((voices, 5, max_block_size), dtype=np.float32))
+        #shared parameters & mod routing (written by gui/midi) | block snapshots (read by the kernels)
+        self.shared_params = np.array([shared_defaults[name] for name in shared_names], dtype=np.float64)
+        self.mod_modes = np.zeros((len(mod_destinations)), dtype=np.int64)
+        self.mod_amounts = np.zeros((len(mod_destinations)), dtype=np.float64)
+        self.block_params = self.shared_params.copy()
+        self.block_mod_modes = self.mod_modes.copy()
+        self.block_mod_amounts = self.mod_amounts.copy()
+        self.block_active = np.ones((source_flags + 5), dtype=np.int64)
+        #oscillators
+        self.osc_params = np.zeros((voices, 3, 8), dtype=np.float64)
+        self.osc_states = np.zeros((voices, 3, 12), dtype=np.float32)
+        self.osc_blit_states = np.zeros((voices, 3, 2, 4), dtype=np.float32)
+        self.osc_blit_integrators = np.zeros((voices, 3, 3, 2), dtype=np.float32)
+        self.osc_smoothed_widths = np.zeros((voices, 3, 1, 2), dtype=np.float32)
+        self.osc_followers = np.zeros((voices, 3, 2, 2), dtype=np.float32)
+        self.osc_walks = np.zeros((voices, 3, max_block_size), dtype=np.float32)
+        self.osc_unison_phases = np.zeros((voices, 3, max_unison), dtype=np.float32)
+        self.osc_unison_spreads = np.zeros((voices, 3, 2 + 2*max_unison), dtype=np.float64)
+        self.osc_tables = load_tables(fs)
+        #panners
+        self.pan_params = np.zeros((voices, 3, 1), dtype=np.float64)
+        #filters (hal, zdf)
+        self.filt_params = np.zeros((voices, 2, 8), dtype=np.float32)
+        self.filt_states = np.zeros((voices, 2, 2, 2), dtype=np.float32)
+        #envelopes (amp, filter)
+        self.env_params = np.zeros((voices, 2, 5), dtype=np.float64)
+        self.env_states = np.zeros((voices, 2, 6), dtype=np.float64)
+        #lfos
+        self.lfo_params = np.zeros((voices, 2, 5), dtype=np.float32)
+        self.lfo_states = np.zeros((voices, 2, 3), dtype=np.float32)
+        #mod envelopes
+        self.menv_params = np.zeros((voices, 2, 5), dtype=np.float64)
+        self.menv_values = np.zeros((voices, 2, 1), dtype=np.float32)
+        self.menv_flags = np.zeros((voices, 2, 2), dtype=np.int32)
+        #velocity, filter mode, base note, detune offsets (osc 1-3), filter oversampling (0: adaptive)
+        self.voice_params = np.zeros((voices, 7), dtype=np.float64)
+
+    #copy shared parameters & mod routing for the next block, flag the stages that reach the output (audio thread, block boundary)
+    def snapshot(self):
+        self.block_params[:] = self.shared_params
+        self.block_mod_modes[:] = self.mod_modes
+        self.block_mod_amounts[:] = self.mod_amounts
+        route_block_entry(self.block_params, self.block_mod_modes, self.block_mod_amounts, self.block_active)
+
+    #single slot writes (gui/midi)
+    def set_param(self, name, value):
+        self.shared_params[shared_index[name]] = value
+
+    def update_mod_mode(self, name, mode):
+        if name in mod_index:
+            self.mod_modes[mod_index[name]] = mode
+
+    def update_mod_value(self, name, value):
+        if name in mod_index:
+            self.mod_amounts[mod_index[name]] = value
+
+    #render a batch of voices (indices) into their output buffers
+    def render(self, batch, frames):
+        bank_block_entry(batch, frames, self.outputs, self.osc_outs, self.osc_sums, self.filt_outs, self.fenv_ins, self.fenv_outs,
+                         self.mod_sources, self.block_mod_modes, self.block_mod_amounts, self.block_params,
+                         self.osc_params, self.osc_states, self.osc_blit_states, self.osc_blit_integrators,
+                         self.osc_smoothed_widths, self.osc_followers, self.osc_walks, self.osc_unison_phases, self.osc_unison_spreads, self.osc_tables, self.pan_params,
+                         self.filt_params, self.filt_states, self.env_params, self.env_states,
+                         self.lfo_params, self.lfo_states, self.menv_params, self.menv_values, self.menv_flags,
+                         self.voice_params, self.block_active, self.osc_rate, self.fs, self.control_period)
+
+    #sum voice outputs (indices) into outdata
+    def mix(self, active, outdata, frames):
+        sum_voices_entry(outdata, self.outputs, active, frames)
 
 class Voice():
-    def __init__(self, mod_dial_values, mod_dial_modes):
+    def __init__(self, mod_dial_values, mod_dial_modes, bank=None, index=0):
         #mod dial refs
         self.mod_dial_values = mod_dial_values
         self.mod_dial_modes = mod_dial_modes
 
+        #voice bank slot (state arrays are views into the bank)
+        if bank is None:
+            bank = VoiceBank(1)
+            index = 0
+        self.bank = bank
+        self.index = index
+
         #audio buffers
-        self.osc_out = np.ascontiguousarray(np.zeros((2048, 2), dtype=np.float32))
-        self.osc2_out = np.ascontiguousarray(np.zeros((2048, 2), dtype=np.float32))
-        self.osc3_out = np.ascontiguousarray(np.zeros((2048, 2), dtype=np.float32))
-        self.osc_sum = np.ascontiguousarray(np.zeros((2048, 2), dtype=np.float32))
-        self.filt_out = np.ascontiguousarray(np.zeros((2048, 2), dtype=np.float32))
-        self.voice_output = np.ascontiguousarray(np.zeros((2048, 2), dtype=np.float32))
+        self.osc_outs = bank.osc_outs[index]
+        self.osc_out = self.osc_outs[0]
+        self.osc2_out = self.osc_outs[1]
+        self.osc3_out = self.osc_outs[2]
+        self.osc_sum = bank.osc_sums[index]
+        self.filt_out = bank.filt_outs[index]
+        self.voice_output = bank.outputs[index]
 
         #mod buffers
-         #fenv i/o & no modulation
-        self.fenv_in = np.ascontiguousarray(np.ones((2048, 2), dtype=np.float32))
-        self.fenv_out = np.ascontiguousarray(np.zeros((2048, 2), dtype=np.float32))
-        self.no_mod = np.ascontiguousarray(np.zeros((2048), dtype=np.float32))
-         #modulators
-          #lfo 1
-        self.lfo1_mod_buffers = [self.assign_mod_buffer(self.mod_dial_modes["lfo1_freq"])]
-        self.lfo1_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["lfo1_phase"]))
-          #lfo 2
-        self.lfo2_mod_buffers = [self.assign_mod_buffer(self.mod_dial_modes["lfo2_freq"])]
-        self.lfo2_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["lfo2_phase"]))
-          #menv 1
-        self.menv1_mod_buffers = [self.assign_mod_buffer(self.mod_dial_modes["menv1_att"])]
-        self.menv1_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["menv1_rel"]))
-          #menv 2
-        self.menv2_mod_buffers = [self.assign_mod_buffer(self.mod_dial_modes["menv2_att"])]
-        self.menv2_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["menv2_rel"]))
-         #oscillators
-          #1
-        self.osc1_mod_buffers = [self.assign_mod_buffer(self.mod_dial_modes["osc_freq"])]
-        self.osc1_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["osc_det"]))
-        self.osc1_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["osc_amp"]))
-        self.osc1_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["osc_width"]))
-          #2
-        self.osc2_mod_buffers = [self.assign_mod_buffer(self.mod_dial_modes["osc2_freq"])]
-        self.osc2_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["osc2_det"]))
-        self.osc2_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["osc2_amp"]))
-        self.osc2_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["osc2_width"]))
-          #3
-        self.osc3_mod_buffers = [self.assign_mod_buffer(self.mod_dial_modes["osc3_freq"])]
-        self.osc3_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["osc3_det"]))
-        self.osc3_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["osc3_amp"]))
-        self.osc3_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["osc3_width"]))
-         #panners
-        self.osc1_pan_buffer = [self.assign_mod_buffer(self.mod_dial_modes["osc_pan"])]
-        self.osc2_pan_buffer = [self.assign_mod_buffer(self.mod_dial_modes["osc2_pan"])]
-        self.osc3_pan_buffer = [self.assign_mod_buffer(self.mod_dial_modes["osc3_pan"])]
-         #filter envelope
-        self.fenv_mod_buffers = [self.assign_mod_buffer(self.mod_dial_modes["fenv_att"])]
-        self.fenv_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["fenv_dec"]))
-        self.fenv_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["fenv_sus"]))
-        self.fenv_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["fenv_rel"]))
-         #filter
-        self.filt_mod_buffers = [self.assign_mod_buffer(self.mod_dial_modes["filt_freq"])]
-        self.filt_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["filt_res"]))
-        self.filt_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["filt_drive"]))
-        self.filt_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["filt_sat"]))
-        self.filt_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["fenv_amt"]))
-         #amp. envelope
-        self.env_mod_buffers = [self.assign_mod_buffer(self.mod_dial_modes["env_att"])]
-        self.env_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["env_dec"]))
-        self.env_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["env_sus"]))
-        self.env_mod_buffers.append(self.assign_mod_buffer(self.mod_dial_modes["env_rel"]))
-
-        #mod values
-         #modulators
-        self.lfo1_mod_values = [self.mod_dial_values["lfo1_freq"], self.mod_dial_values["lfo1_phase"]]
-        self.lfo2_mod_values = [self.mod_dial_values["lfo2_freq"], self.mod_dial_values["lfo2_phase"]]
-        self.menv1_mod_values = [self.mod_dial_values["menv1_att"], self.mod_dial_values["menv1_rel"]]
-        self.menv2_mod_values = [self.mod_dial_values["menv2_att"], self.mod_dial_values["menv2_rel"]]
-         #oscillators
-        self.osc1_mod_values = [self.mod_dial_values["osc_freq"], self.mod_dial_values["osc_det"],
-                            self.mod_dial_values["osc_amp"], self.mod_dial_values["osc_width"]]
-        self.osc2_mod_values = [self.mod_dial_values["osc2_freq"], self.mod_dial_values["osc2_det"],
-                            self.mod_dial_values["osc2_amp"], self.mod_dial_values["osc2_width"]]
-        self.osc3_mod_values = [self.mod_dial_values["osc3_freq"], self.mod_dial_values["osc3_det"],
-                            self.mod_dial_values["osc3_amp"], self.mod_dial_values["osc3_width"]]
-         #panners
-        self.osc1_pan_value = [self.mod_dial_values["osc_pan"]]
-        self.osc2_pan_value = [self.mod_dial_values["osc2_pan"]]
-        self.osc3_pan_value = [self.mod_dial_values["osc3_pan"]]
-         #filter env
-        self.fenv_mod_values = [self.mod_dial_values["fenv_att"], self.mod_dial_values["fenv_dec"],
-                            self.mod_dial_values["fenv_sus"], self.mod_dial_values["fenv_rel"]]
-         #filter
-        self.filt_mod_values = [self.mod_dial_values["filt_freq"], self.mod_dial_values["filt_res"],
-                            self.mod_dial_values["filt_drive"], self.mod_dial_values["filt_sat"], self.mod_dial_values["fenv_amt"]]
-         #amp env
-        self.env_mod_values = [self.mod_dial_values["env_att"], self.mod_dial_values["env_dec"],
-                            self.mod_dial_values["env_sus"], self.mod_dial_values["env_rel"]]
+         #fenv i/o
+        self.fenv_in = bank.fenv_ins[index]
+        self.fenv_out = bank.fenv_outs[index]
+         #sources: none, lfo 1, lfo 2, menv 1, menv 2
+        self.mod_sources = bank.mod_sources[index]
+        self.no_mod = self.mod_sources[0]
+         #routing (source per destination) & amounts | shared by all voices in the bank
+        for name in mod_destinations:
+            self.bank.update_mod_mode(name, self.mod_dial_modes[name])
+            self.bank.update_mod_value(name, self.mod_dial_values[name])
 
         #modules
+        fs = bank.fs
         self.osc = WrappedOsc(2, 0.5, 55, fs, .5)
         self.osc2 = WrappedOsc(2, 0.5, 55, fs, .5)
         self.osc3 = WrappedOsc(2, 0.5, 55, fs, .5)
         self.pan1 = Panner()
         self.pan2 = Panner()
         self.pan3 = Panner()
-        self.filt = HalSVF(0.0, 3520, 10, 1.0)
-        self.filt2 = ZDFSVF()
-        self.env = ADSR(.01, 1.0, 0.5, 1.0)
-        self.fenv = ADSR(.01, .5, .5, .5)
+        self.filt = HalSVF(0.0, 3520, 10, 1.0, fs=fs)
+        self.filt2 = ZDFSVF(fs)
+        self.env = ADSR(.01, 1.0, 0.5, 1.0, fs)
+        self.fenv = ADSR(.01, .5, .5, .5, fs)
         self.lfo1 = LFO(fs, 5, 0, 0)
         self.lfo2 = LFO(fs, 5, 0, 1)
         self.menv1 = ModEnv(fs, 0.5, 0.5, 0)
         self.menv2 = ModEnv(fs, 0.5, 0.5, 1)
 
+        #packed module state (modules keep views into the bank)
+         #oscillators
+        self.osc_params = bank.osc_params[index]
+        self.osc_states = bank.osc_states[index]
+        self.osc_blit_states = bank.osc_blit_states[index]
+        self.osc_blit_integrators = bank.osc_blit_integrators[index]
+        self.osc_smoothed_widths = bank.osc_smoothed_widths[index]
+        self.osc_followers = bank.osc_followers[index]
+        self.osc_walks = bank.osc_walks[index]
+        self.osc_unison_phases = bank.osc_unison_phases[index]
+        self.osc_unison_spreads = bank.osc_unison_spreads[index]
+        for i, osc in enumerate([self.osc, self.osc2, self.osc3]):
+            osc.bind(self.osc_params[i], self.osc_states[i], self.osc_blit_states[i], self.osc_blit_integrators[i],
+                     self.osc_smoothed_widths[i], self.osc_followers[i], self.osc_walks[i], self.osc_unison_phases[i], self.osc_unison_spreads[i])
+         #panners
+        self.pan_params = bank.pan_params[index]
+        for i, pan in enumerate([self.pan1, self.pan2, self.pan3]):
+            pan.bind(self.pan_params[i])
+         #filters (hal, zdf)
+        self.filt_params = bank.filt_params[index]
+        self.filt_states = bank.filt_states[index]
+        self.filt.bind(self.filt_params[0], self.filt_states[0])
+        self.filt2.bind(self.filt_params[1], self.filt_states[1])
+         #envelopes (amp, filter)
+        self.env_params = bank.env_params[index]
+        self.env_states = bank.env_states[index]
+        self.env.bind(self.env_params[0], self.env_states[0])
+        self.fenv.bind(self.env_params[1], self.env_states[1])
+         #lfos
+        self.lfo_params = bank.lfo_params[index]
+        self.lfo_states = bank.lfo_states[index]
+        self.lfo1.bind(self.lfo_params[0], self.lfo_states[0], self.mod_sources[1])
+        self.lfo2.bind(self.lfo_params[1], self.lfo_states[1], self.mod_sources[2])
+         #mod envelopes
+        self.menv_params = bank.menv_params[index]
+        self.menv_values = bank.menv_values[index]
+        self.menv_flags = bank.menv_flags[index]
+        self.menv1.bind(self.menv_params[0], self.menv_values[0], self.menv_flags[0], self.mod_sources[3])
+        self.menv2.bind(self.menv_params[1], self.menv_values[1], self.menv_flags[1], self.mod_sources[4])
+         #velocity, filter mode, base note, detune offsets, filter oversampling
+        self.voice_params = bank.voice_params[index]
+
         #attributes
-        self.filt_mode = 0
         self.base_note = 0
         self.velocity = 0.0
         self.status = 1
-        self.index = 0
         self.detune_offset_1 = 0.0
         self.detune_offset_2 = 0.0
         self.detune_offset_3 = 0.0
 
     def callback(self, output, frames):
         if self.status != 0:
-            #modulators
-            # lfo 1
-            self.lfo1.process_block(frames, self.lfo1_mod_buffers, self.lfo1_mod_values)
-            # lfo 2
-            self.lfo2.process_block(frames, self.lfo2_mod_buffers, self.lfo2_mod_values)
-            # menv 1
-            self.menv1.process_block(frames, self.menv1_mod_buffers, self.menv1_mod_values)
-            # menv 2
-            self.menv2.process_block(frames, self.menv2_mod_buffers, self.menv2_mod_values)
-
-            #oscillators
-            # 1
-            self.osc.process_block(self.osc_out[:frames], self.osc1_mod_buffers, self.osc1_mod_values)
-            self.pan1.process_block(self.osc_out[:frames], self.osc_out[:frames], self.osc1_pan_buffer[0], self.osc1_pan_value[0])
-            # 2
-            self.osc2.process_block(self.osc2_out[:frames], self.osc2_mod_buffers, self.osc2_mod_values)
-            self.pan2.process_block(self.osc2_out[:frames], self.osc2_out[:frames], self.osc2_pan_buffer[0], self.osc2_pan_value[0])
-            # 3
-            self.osc3.process_block(self.osc3_out[:frames], self.osc3_mod_buffers, self.osc3_mod_values)
-            self.pan3.process_block(self.osc3_out[:frames], self.osc3_out[:frames], self.osc3_pan_buffer[0], self.osc3_pan_value[0])
-            # sum & scale
-            self.osc_sum = self.osc_out
-            self.osc_sum += self.osc2_out
-            self.osc_sum += self.osc3_out
-            self.osc_sum *= 0.33
-
-            # filter envelope
-            self.fenv.process_block(self.fenv_in[:frames], self.fenv_out[:frames], self.fenv_mod_buffers, self.fenv_mod_values)
-
-            # filter
-            if self.filt_mode == 0:
-                self.filt.process_block(self.osc_sum[:frames], self.filt_out[:frames], self.fenv_out[:frames], self.filt_mod_buffers, self.filt_mod_values)
-            else:
-                self.filt2.process_block(self.osc_sum[:frames], self.filt_out[:frames], self.fenv_out[:frames], self.filt_mod_buffers, self.filt_mod_values)
-
-            # amplitude envelope
-            self.env.process_block(self.filt_out[:frames], output, self.env_mod_buffers, self.env_mod_values)
-
-            # output
-            output *= self.velocity
+            self.update_params()
+            self.bank.snapshot()
+            apply_shared_params_entry(self.bank.block_params, self.bank.osc_rate, self.osc_params, self.osc_states, self.pan_params, self.filt_params,
+                                      self.env_params, self.lfo_params, self.menv_params, self.voice_params)
+            voice_block_entry(output, self.osc_outs, self.osc_sum, self.filt_out, self.fenv_in, self.fenv_out,
+                              self.mod_sources, self.bank.block_mod_modes, self.bank.block_mod_amounts,
+                              self.osc_params, self.osc_states, self.osc_blit_states, self.osc_blit_integrators,
+                              self.osc_smoothed_widths, self.osc_followers, self.osc_walks, self.osc_unison_phases, self.osc_unison_spreads, self.bank.osc_tables, self.pan_params,
+                              self.filt_params, self.filt_states, self.env_params, self.env_states,
+                              self.lfo_params, self.lfo_states, self.menv_params, self.menv_values, self.menv_flags,
+                              self.voice_params, self.bank.block_active, self.bank.osc_rate, self.bank.fs, self.bank.control_period)
         else:
             output *= 0.0
-        if (self.env.state[0] == 0.0) and (self.status > 0):  
+        self.update_status()
+
+    #copy python-side (per voice) attributes into the bank before rendering
+    def update_params(self):
+        self.voice_params[0] = self.velocity
+        self.voice_params[2:6] = (self.base_note, self.detune_offset_1, self.detune_offset_2, self.detune_offset_3)
+
+    #stop voice once the amp. envelope has finished (returns True if the voice just stopped)
+    def update_status(self):
+        #stop when the amp envelope is off (level 0 & stage 0 | an attack starting on a block's last sample is still at level 0)
+        if (self.env.state[0] == 0.0) and (self.env.state[1] == 0.0) and (self.status > 0):
             self.status = 0
+            return True
+        return False
 
-    #mod dial helpers
-    def update_mod_mode(self, name, mode):
-        new_buffer = self.assign_mod_buffer(mode)
-        if name.startswith("osc"):
-            if "2" in name:
-                if name.endswith("freq"):
-                    self.osc2_mod_buffers[0] = new_buffer
-                elif name.endswith("det"):
-                    self.osc2_mod_buffers[1] = new_buffer
-                elif name.endswith("amp"):
-                    self.osc2_mod_buffers[2] = new_buffer
-                elif name.endswith("width"):
-                    self.osc2_mod_buffers[3] = new_buffer
-                elif name.endswith("pan"):
-                    self.osc2_pan_buffer[0] = new_buffer
-            elif "3" in name:
-                if name.endswith("freq"):
-                    self.osc3_mod_buffers[0] = new_buffer
-                elif name.endswith("det"):
-                    self.osc3_mod_buffers[1] = new_buffer
-                elif name.endswith("amp"):
-                    self.osc3_mod_buffers[2] = new_buffer
-                elif name.endswith("width"):
-                    self.osc3_mod_buffers[3] = new_buffer
-                elif name.endswith("pan"):
-                    self.osc3_pan_buffer[0] = new_buffer
-            else:
-                if name.endswith("freq"):
-                    self.osc1_mod_buffers[0] = new_buffer
-                elif name.endswith("det"):
-                    self.osc1_mod_buffers[1] = new_buffer
-                elif name.endswith("amp"):
-                    self.osc1_mod_buffers[2] = new_buffer
-                elif name.endswith("width"):
-                    self.osc1_mod_buffers[3] = new_buffer
-                elif name.endswith("pan"):
-                    self.osc1_pan_buffer[0] = new_buffer
-        elif name.startswith("filt"):
-            if name.endswith("freq"):
-                self.filt_mod_buffers[0] = new_buffer
-            elif name.endswith("res"):
-                self.filt_mod_buffers[1] = new_buffer
-            elif name.endswith("drive"):
-                self.filt_mod_buffers[2] = new_buffer
-            elif name.endswith("sat"):
-                self.filt_mod_buffers[3] = new_buffer
-        elif name.startswith("fenv"):
-            if name.endswith("att"):
-                self.fenv_mod_buffers[0] = new_buffer
-            elif name.endswith("dec"):
-                self.fenv_mod_buffers[1] = new_buffer
-            elif name.endswith("sus"):
-                self.fenv_mod_buffers[2] = new_buffer
-            elif name.endswith("rel"):
-                self.fenv_mod_buffers[3] = new_buffer
-            elif name.endswith("amt"):
-                self.filt_mod_buffers[4] = new_buffer
-        elif name.startswith("env"):
-            if name.endswith("att"):
-                self.env_mod_buffers[0] = new_buffer
-            elif name.endswith("dec"):
-                self.env_mod_buffers[1] = new_buffer
-            elif name.endswith("sus"):
-                self.env_mod_buffers[2] = new_buffer
-            elif name.endswith("rel"):
-                self.env_mod_buffers[3] = new_buffer
-        elif name.startswith("lfo"):
-            if "1" in name:
-                if name.endswith("freq"):
-                    self.lfo1_mod_buffers[0] = new_buffer
-                elif name.endswith("phase"):
-                    self.lfo1_mod_buffers[1] = new_buffer
-            elif "2" in name:
-                if name.endswith("freq"):
-                    self.lfo2_mod_buffers[0] = new_buffer
-                elif name.endswith("phase"):
-                    self.lfo2_mod_buffers[1] = new_buffer
-        elif name.startswith("menv"):
-            if "1" in name:
-                if name.endswith("att"):
-                    self.menv1_mod_buffers[0] = new_buffer
-                elif name.endswith("rel"):
-                    self.menv1_mod_buffers[1] = new_buffer
-            elif "2" in name:
-                if name.endswith("att"):
-                    self.menv2_mod_buffers[0] = new_buffer
-                elif name.endswith("rel"):
-                    self.menv2_mod_buffers[1] = new_buffer
+#numba DSP
+# active stages: oscillators with a level (or level mod), filter env with an amount (or amount mod) & mod sources routed to them
+# a mod source counts if a live destination uses it with a non-zero amount (followed through modulator -> modulator chains)
+@njit(nogil=True, fastmath=True, cache=True)
+def route_block(shared, mod_modes, mod_amounts, active):
+    for o in range(0, 3):
+        d = osc_mods + 4*o + 2
+        routed = (mod_modes[d] != 0) and (mod_amounts[d] != 0.0)
+        active[o] = 1 if (shared[osc_slots + osc_stride*o + osc_amp] != 0.0) or routed else 0
+    sounding = (active[0] + active[1] + active[2]) > 0
+    d = filt_mods + 4
+    routed = (mod_modes[d] != 0) and (mod_amounts[d] != 0.0)
+    active[fenv_flag] = 1 if sounding and ((shared[filt_slots + filt_fenv] != 0.0) or routed) else 0
+    active[stereo_flag] = 0
+    spread = (shared[osc_unison_slot] > 1.0) and (shared[osc_spread_slot] != 0.0)
+    for o in range(0, 3):
+        d = pan_mods + o
+        routed = (mod_modes[d] != 0) and (mod_amounts[d] != 0.0)
+        if (active[o] != 0) and ((shared[pan_slots + o] != 0.0) or routed or spread):
+            active[stereo_flag] = 1
+    for s in range(0, 5):
+        active[source_flags + s] = 0
+    #voice destinations (oscillators/panners, filter, filter env, amp env)
+    for d in range(0, lfo_mods):
+        if (mod_modes[d] == 0) or (mod_amounts[d] == 0.0):
+            continue
+        if d < pan_mods:
+            live = active[(d - osc_mods)//4] != 0
+        elif d < filt_mods:
+            live = active[d - pan_mods] != 0
+        elif d < fenv_mods:
+            live = sounding
+        elif d < env_mods:
+            live = active[fenv_flag] != 0
+        else:
+            live = True
+        if live:
+            active[source_flags + mod_modes[d]] = 1
+    #modulator destinations (lfo 1, lfo 2, menv 1, menv 2 -> sources 1-4)
+    for _ in range(0, 4):
+        for d in range(lfo_mods, len(mod_modes)):
+            if (active[source_flags + 1 + (d - lfo_mods)//2] != 0) and (mod_modes[d] != 0) and (mod_amounts[d] != 0.0):
+                active[source_flags + mod_modes[d]] = 1
+    active[source_flags] = 1
 
-    def update_mod_value(self, name, value):
-        if name.startswith("osc"):
-            if "2" in name:
-                if name.endswith("freq"):
-                    self.osc2_mod_values[0] = value
-                elif name.endswith("det"):
-                    self.osc2_mod_values[1] = value
-                elif name.endswith("amp"):
-                    self.osc2_mod_values[2] = value
-                elif name.endswith("width"):
-                    self.osc2_mod_values[3] = value
-                elif name.endswith("pan"):
-                    self.osc2_pan_value[0] = value
-            elif "3" in name:
-                if name.endswith("freq"):
-                    self.osc3_mod_values[0] = value
-                elif name.endswith("det"):
-                    self.osc3_mod_values[1] = value
-                elif name.endswith("amp"):
-                    self.osc3_mod_values[2] = value
-                elif name.endswith("width"):
-                    self.osc3_mod_values[3] = value
-                elif name.endswith("pan"):
-                    self.osc3_pan_value[0] = value
-            else:
-                if name.endswith("freq"):
-                    self.osc1_mod_values[0] = value
-                elif name.endswith("det"):
-                    self.osc1_mod_values[1] = value
-                elif name.endswith("amp"):
-                    self.osc1_mod_values[2] = value
-                elif name.endswith("width"):
-                    self.osc1_mod_values[3] = value
-                elif name.endswith("pan"):
-                    self.osc1_pan_value[0] = value
-        elif name.startswith("filt"):
-            if name.endswith("freq"):
-                self.filt_mod_values[0] = value
-            elif name.endswith("res"):
-                self.filt_mod_values[1] = value
-            elif name.endswith("drive"):
-                self.filt_mod_values[2] = value
-            elif name.endswith("sat"):
-                self.filt_mod_values[3] = value
-        elif name.startswith("fenv"):
-            if name.endswith("att"):
-                self.fenv_mod_values[0] = value
-            elif name.endswith("dec"):
-                self.fenv_mod_values[1] = value
-            elif name.endswith("sus"):
-                self.fenv_mod_values[2] = value
-            elif name.endswith("rel"):
-                self.fenv_mod_values[3] = value
-            elif name.endswith("amt"):
-                self.filt_mod_values[4] = value
-        elif name.startswith("env"):
-            if name.endswith("att"):
-                self.env_mod_values[0] = value
-            elif name.endswith("dec"):
-                self.env_mod_values[1] = value
-            elif name.endswith("sus"):
-                self.env_mod_values[2] = value
-            elif name.endswith("rel"):
-                self.env_mod_values[3] = value
-        elif name.startswith("lfo"):
-            if "1" in name:
-                if name.endswith("freq"):
-                    self.lfo1_mod_values[0] = value
-                elif name.endswith("phase"):
-                    self.lfo1_mod_values[1] = value
-            elif "2" in name:
-                if name.endswith("freq"):
-                    self.lfo2_mod_values[0] = value
-                elif name.endswith("phase"):
-                    self.lfo2_mod_values[1] = value
-        elif name.startswith("menv"):
-            if "1" in name:
-                if name.endswith("att"):
-                    self.menv1_mod_values[0] = value
-                elif name.endswith("rel"):
-                    self.menv1_mod_values[1] = value
-            elif "2" in name:
-                if name.endswith("att"):
-                    self.menv2_mod_values[0] = value
-                elif name.endswith("rel"):
-                    self.menv2_mod_values[1] = value
-
-    def assign_mod_buffer(self, mode):
-        if mode == 0:
-            return self.no_mod
-        elif mode == 1:
-            return self.lfo1.output
-        elif mode == 2:
-            return self.lfo2.output
-        elif mode == 3:
-            return self.menv1.output
-        elif mode == 4:
-            return self.menv2.output
\ No newline at end of file
+# shared parameter snapshot -> voice params (oscillator pitch from base note, pitch offset & detune)
+@njit(nogil=True, fastmath=True, cache=True)
+def apply_shared_params(shared, osc_rate, osc_params, osc_states, pan_params, filt_params, env_params, lfo_params, menv_params, voice_params):
+    base_note = voice_params[2]
+    for o in range(0, 3):
+        p = osc_slots + osc_stride*o
+        amp = shared[p + osc_amp]
+        freq = 440.0 * 2**(base_note/12.0 + shared[p + osc_pitch]) + shared[p + osc_detune]*voice_params[3 + o]
+        osc_params[o, 0] = shared[p + osc_alg]
+        osc_params[o, 1] = shared[p + osc_type]
+        osc_params[o, 2] = shared[p + osc_width]
+        osc_params[o, 5] = shared[osc_drift_slot]
+        osc_params[o, 6] = shared[osc_unison_slot]
+        osc_params[o, 7] = shared[osc_spread_slot]
+        if osc_params[o, 3] != amp:
+            osc_params[o, 3] = amp
+            osc_states[o, 1] = amp
+            osc_states[o, 5] = amp
+        if osc_params[o, 4] != freq:
+            osc_params[o, 4] = freq
+            increment = twopi*(freq/osc_rate[0])
+            osc_states[o, 2] = increment
+            osc_states[o, 6] = increment
+        pan_params[o, 0] = shared[pan_slots + o]
+    for f in range(0, 2):
+        filt_params[f, 0] = shared[filt_slots + filt_cutoff]
+        filt_params[f, 1] = shared[filt_slots + filt_res]
+        filt_params[f, 2] = shared[filt_slots + filt_drive]
+        filt_params[f, 3] = shared[filt_slots + filt_sat]
+        filt_params[f, 4] = shared[filt_slots + filt_type]
+        filt_params[f, 6] = shared[filt_slots + filt_track]
+        filt_params[f, 7] = shared[filt_slots + filt_fenv]
+    voice_params[1] = shared[filt_slots + filt_mode]
+    voice_params[6] = shared[filt_slots + filt_oversample]
+    for e in range(0, 2):
+        p = env_slots + env_stride*e
+        for i in range(0, env_stride):
+            env_params[e, i] = shared[p + i]
+    for m in range(0, 2):
+        p = lfo_slots + lfo_stride*m
+        lfo_params[m, 0] = twopi*(shared[p]*lfo_params[m, 4])
+        lfo_params[m, 1] = twopi*shared[p + 1]
+        lfo_params[m, 2] = shared[p + 2]
+        p = menv_slots + menv_stride*m
+        menv_params[m, 0] = shared[p]
+        menv_params[m, 1] = shared[p + 1]
+        menv_params[m, 2] = shared[p + 2]
+
+# full voice chain: modulators -> oscillators (mono)/panners -> filter env -> filter (mono while centred) -> amp env
+@njit(nogil=True, fastmath=True, cache=True)
+def voice_block(output, osc_outs, osc_sum, filt_out, fenv_in, fenv_out, mod_sources, mod_modes, mod_amounts,
+                osc_params, osc_states, osc_blit_states, osc_blit_integrators, osc_smoothed_widths, osc_followers, osc_walks, osc_unison_phases, osc_unison_spreads, osc_tables,
+                pan_params, filt_params, filt_states, env_params, env_states,
+                lfo_params, lfo_states, menv_params, menv_values, menv_flags, voice_params, active, osc_rate, fs, control_period):
+    frames = len(output)
+
+    #modulators (read the previous block of any modulator rendered after them | skipped when unrouted)
+    for m in range(0, 2):
+        if active[source_flags + 1 + m] == 0:
+            continue
+        d = lfo_mods + 2*m
+        lfo_block(lfo_params[m], lfo_states[m], mod_sources[1 + m, :frames],
+                  mod_sources[mod_modes[d]], mod_sources[mod_modes[d + 1]], mod_amounts[d], mod_amounts[d + 1])
+    for m in range(0, 2):
+        if active[source_flags + 3 + m] == 0:
+            continue
+        d = menv_mods + 2*m
+        menv_block(menv_params[m], menv_values[m], menv_flags[m], mod_sources[3 + m, :frames],
+                   mod_sources[mod_modes[d]], mod_sources[mod_modes[d + 1]], mod_amounts[d], mod_amounts[d + 1])
+
+    #oscillators (mono, skipped at zero level) & panners (stereo, sum & scale) | unison copies pan straight into the sum
+    sounding = active[0] + active[1] + active[2]
+    for n in range(0, frames):
+        osc_sum[n, 0] = 0.0
+        osc_sum[n, 1] = 0.0
+    for o in range(0, 3):
+        if active[o] == 0:
+            continue
+        d = osc_mods + 4*o
+        if osc_params[o, 6] > 1.0:
+            generate_walk(osc_walks[o, :frames], osc_states[o, 7:8], osc_rate[6])
+            unison_block(osc_sum[:frames], osc_params[o], osc_unison_phases[o], osc_unison_spreads[o], osc_smoothed_widths[o], osc_tables, osc_walks[o, :frames],
+                         mod_sources[mod_modes[d]], mod_sources[mod_modes[d + 1]], mod_sources[mod_modes[d + 2]], mod_sources[mod_modes[d + 3]],
+                         mod_amounts[d], mod_amounts[d + 1], mod_amounts[d + 2], mod_amounts[d + 3],
+                         pan_params[o, 0], mod_sources[mod_modes[pan_mods + o]], mod_amounts[pan_mods + o], 0.33, osc_rate)
+            continue
+        osc_out = osc_outs[o, :frames]
+        osc_block(osc_out, osc_params[o], osc_states[o], osc_blit_states[o], osc_blit_integrators[o],
+                  osc_smoothed_widths[o], osc_followers[o], osc_tables, osc_walks[o, :frames],
+                  mod_sources[mod_modes[d]], mod_sources[mod_modes[d + 1]], mod_sources[mod_modes[d + 2]], mod_sources[mod_modes[d + 3]],
+                  mod_amounts[d], mod_amounts[d + 1], mod_amounts[d + 2], mod_amounts[d + 3], osc_rate)
+        pan_mono(osc_out, osc_sum, pan_params[o, 0], mod_sources[mod_modes[pan_mods + o]], mod_amounts[pan_mods + o], 0.33)
+
+    #filter envelope (skipped at zero amount)
+    d = fenv_mods
+    if active[fenv_flag] != 0:
+        envelope_block(env_states[1], env_params[1, 4] != 0.0, fenv_in[:frames], fenv_out[:frames],
+                       mod_sources[mod_modes[d]], mod_sources[mod_modes[d + 1]], mod_sources[mod_modes[d + 2]], mod_sources[mod_modes[d + 3]],
+                       mod_amounts[d], mod_amounts[d + 1], mod_amounts[d + 2], mod_amounts[d + 3],
+                       env_params[1, 0], env_params[1, 1], env_params[1, 2], env_params[1, 3], fs, control_period)
+
+    #filter (skipped with every oscillator silent | left only with centred pans)
+    d = filt_mods
+    channels = 2 if active[stereo_flag] != 0 else 1
+    if sounding == 0:
+        for n in range(0, frames):
+            filt_out[n, 0] = 0.0
+            filt_out[n, 1] = 0.0
+    elif voice_params[1] == 0:
+        filter_block_hal(osc_sum[:frames], filt_out[:frames], filt_states[0], filt_params[0], fenv_out[:frames],
+                         mod_sources[mod_modes[d]], mod_sources[mod_modes[d + 1]], mod_sources[mod_modes[d + 2]],
+                         mod_sources[mod_modes[d + 3]], mod_sources[mod_modes[d + 4]], mod_amounts[d:d + 5], fs, control_period, channels, int(voice_params[6]))
+    else:
+        filter_block_zdf(osc_sum[:frames], filt_out[:frames], filt_states[1], filt_params[1], fenv_out[:frames],
+                         mod_sources[mod_modes[d]], mod_sources[mod_modes[d + 1]], mod_sources[mod_modes[d + 2]],
+                         mod_sources[mod_modes[d + 3]], mod_sources[mod_modes[d + 4]], mod_amounts[d:d + 5], fs, control_period, channels)
+
+    #amplitude envelope
+    d = env_mods
+    envelope_block(env_states[0], env_params[0, 4] != 0.0, filt_out[:frames], output,
+                   mod_sources[mod_modes[d]], mod_sources[mod_modes[d + 1]], mod_sources[mod_modes[d + 2]], mod_sources[mod_modes[d + 3]],
+                   mod_amounts[d], mod_amounts[d + 1], mod_amounts[d + 2], mod_amounts[d + 3],
+                   env_params[0, 0], env_params[0, 1], env_params[0, 2], env_params[0, 3], fs, control_period)
+
+    #output
+    velocity = voice_params[0]
+    for n in range(0, frames):
+        output[n, 0] *= velocity
+        output[n, 1] *= velocity
+
+# voice bank: render a batch of voices
+@njit(nogil=True, fastmath=True, cache=True)
+def bank_block(batch, frames, outputs, osc_outs, osc_sums, filt_outs, fenv_ins, fenv_outs, mod_sources, mod_modes, mod_amounts, shared,
+               osc_params, osc_states, osc_blit_states, osc_blit_integrators, osc_smoothed_widths, osc_followers, osc_walks, osc_unison_phases, osc_unison_spreads, osc_tables,
+               pan_params, filt_params, filt_states, env_params, env_states,
+               lfo_params, lfo_states, menv_params, menv_values, menv_flags, voice_params, active, osc_rate, fs, control_period):
+    for i in range(len(batch)):
+        v = batch[i]
+        apply_shared_params(shared, osc_rate, osc_params[v], osc_states[v], pan_params[v], filt_params[v], env_params[v], lfo_params[v], menv_params[v], voice_params[v])
+        voice_block(outputs[v, :frames], osc_outs[v], osc_sums[v], filt_outs[v], fenv_ins[v], fenv_outs[v],
+                    mod_sources[v], mod_modes, mod_amounts,
+                    osc_params[v], osc_states[v], osc_blit_states[v], osc_blit_integrators[v],
+                    osc_smoothed_widths[v], osc_followers[v], osc_walks[v], osc_unison_phases[v], osc_unison_spreads[v], osc_tables, pan_params[v],
+                    filt_params[v], filt_states[v], env_params[v], env_states[v],
+                    lfo_params[v], lfo_states[v], menv_params[v], menv_values[v], menv_flags[v],
+                    voice_params[v], active, osc_rate, fs, control_period)
+
+# sum active voice outputs
+@njit(nogil=True, fastmath=True, cache=True)
+def sum_voices(outdata, outputs, active, frames):
+    for i in range(len(active)):
+        v = active[i]
+        for n in range(0, frames):
+            outdata[n, 0] += outputs[v, n, 0]
+            outdata[n, 1] += outputs[v, n, 1]
+
+#python-level entry points (aot builds when available)
+route_block_entry = kernel(route_block, "void(float64[:], int64[:], float64[:], int64[:])")
+apply_shared_params_entry = kernel(apply_shared_params, "void(float64[:], float64[:], float64[:, :], float32[:, :], float64[:, :], float32[:, :], "
+                                                        "float64[:, :], float32[:, :], float64[:, :], float64[:])")
+voice_block_entry = kernel(voice_block, "void(float32[:, :], float32[:, :], float32[:, :], float32[:, :], float32[:, :], float32[:, :], "
+                                        "float32[:, :], int64[:], float64[:], float64[:, :], float32[:, :], float32[:, :, :], float32[:, :, :], "
+                                        "float32[:, :, :], float32[:, :, :], float32[:, :], float32[:, :], float64[:, :], float32[:, :, :], "
+                                        "float64[:, :], float32[:, :], float32[:, :, :], float64[:, :], float64[:, :], float32[:, :], float32[:, :], "
+                                        "float64[:, :], float32[:, :], int32[:, :], float64[:], int64[:], float64[:], float64, int64)")
+bank_block_entry = kernel(bank_block, "void(int64[:], int64, float32[:, :, :], float32[:, :, :], float32[:, :, :], float32[:, :, :], "
+                                      "float32[:, :, :], float32[:, :, :], float32[:, :, :], int64[:], float64[:], float64[:], float64[:, :, :], "
+                                      "float32[:, :, :], float32[:, :, :, :], float32[:, :, :, :], float32[:, :, :, :], float32[:, :, :, :], "
+                                      "float32[:, :, :], float32[:, :, :], float64[:, :, :], float32[:, :, :], float64[:, :, :], float32[:, :, :], "
+                                      "float32[:, :, :, :], float64[:, :, :], float64[:, :, :], float32[:, :, :], float32[:, :, :], "
+                                      "float64[:, :, :], float32[:, :, :], int32[:, :, :], float64[:, :], int64[:], float64[:], float64, int64)")
+sum_voices_entry = kernel(sum_voices, "void(float32[:, :], float32[:, :, :], int64[:], int64)")
+
+#compile jobs (see compiler.py | no active voices)
+@compile_job(route_block_entry)
+def compile_route_block():
+    VoiceBank(1).snapshot()
+
+@compile_job(bank_block_entry)
+def compile_bank_block():
+    VoiceBank(1).render(np.zeros((0), dtype=np.int64), 16)
+
+@compile_job(sum_voices_entry)
+def compile_sum_voices():
+    VoiceBank(1).mix(np.zeros((0), dtype=np.int64), np.zeros((16, 2), dtype=np.float32), 16)
+
+def test_voice():
+    return Voice(dict.fromkeys(mod_destinations, 0.0), dict.fromkeys(mod_destinations, 0))
+
+@compile_job(apply_shared_params_entry)
+def compile_apply_shared_params():
+    voice = test_voice()
+    apply_shared_params_entry(voice.bank.block_params, voice.bank.osc_rate, voice.osc_params, voice.osc_states, voice.pan_params, voice.filt_params,
+                              voice.env_params, voice.lfo_params, voice.menv_params, voice.voice_params)
+
+@compile_job(voice_block_entry)
+def compile_voice_block():
+    voice = test_voice()
+    voice_block_entry(voice.voice_output[:0], voice.osc_outs, voice.osc_sum, voice.filt_out, voice.fenv_in, voice.fenv_out,
+                      voice.mod_sources, voice.bank.block_mod_modes, voice.bank.block_mod_amounts,
+                      voice.osc_params, voice.osc_states, voice.osc_blit_states, voice.osc_blit_integrators,
+                      voice.osc_smoothed_widths, voice.osc_followers, voice.osc_walks, voice.osc_unison_phases, voice.osc_unison_spreads, voice.bank.osc_tables, voice.pan_params,
+                      voice.filt_params, voice.filt_states, voice.env_params, voice.env_states,
+                      voice.lfo_params, voice.lfo_states, voice.menv_params, voice.menv_values, voice.menv_flags,
+                      voice.voice_params, voice.bank.block_active, voice.bank.osc_rate, voice.bank.fs, voice.bank.control_period)
@@ -0,0 +1,86 @@
+import numpy as np
+import math
+from pathlib import Path
+from numba import njit
+from platformdirs import user_data_dir
+
+#band-limited wavetables (mip-mapped per octave)
+# table 0: rising saw (-1 to 1), table 1: saw integral (parabola, zero mean) | pulse & trisaw are built from phase-offset pairs
+table_size = 4096
+table_bands = 12
+band_base = 10.0        #band b covers fundamentals from band_base*2^b to band_base*2^(b + 1)
+max_harmonics = table_size//4
+table_version = 1
+
+#built/loaded tables (per sample rate, shared by every oscillator in the process)
+loaded_tables = {}
+
+def table_path(fs):
+    return Path(user_data_dir("subsnake", "rainbow-carrots")) / "wavetables" / f"tables_v{table_version}_{int(fs)}.npy"
+
+#harmonics per band (partials above nyquist may only fold back above 20kHz)
+def band_harmonics(fs):
+    fs = float(fs)
+    harmonics = np.zeros((table_bands), dtype=np.int64)
+    for b in range(0, table_bands):
+        top_freq = band_base*2**(b + 1)
+        limit = max(0.5*fs, fs - 20000.0)
+        harmonics[b] = max(1, min(max_harmonics, int(limit/top_freq)))
+    return harmonics
+
+def build_tables(fs):
+    tables = np.zeros((2, table_bands, table_size + 1), dtype=np.float32)
+    harmonics = band_harmonics(fs)
+    for b in range(0, table_bands):
+        k = np.arange(1, harmonics[b] + 1)
+        #saw: -(2/pi)*sum(sin(2pi*k*p)/k) | parabola: (1/pi^2)*sum(cos(2pi*k*p)/k^2)
+        saw_spectrum = np.zeros((table_size//2 + 1), dtype=np.complex128)
+        saw_spectrum[k] = 1j*(table_size/np.pi)/k
+        parabola_spectrum = np.zeros((table_size//2 + 1), dtype=np.complex128)
+        parabola_spectrum[k] = (table_size/(2*np.pi**2))/(k*k)
+        tables[0, b, :table_size] = np.fft.irfft(saw_spectrum, table_size)
+        tables[1, b, :table_size] = np.fft.irfft(parabola_spectrum, table_size)
+    #guard point (interpolation past the last index)
+    tables[:, :, table_size] = tables[:, :, 0]
+    return tables
+
+#load from the disk cache (or build & save) | returns the tables for fs
+def load_tables(fs):
+    key = int(fs)
+    if key in loaded_tables:
+        return loaded_tables[key]
+    path = table_path(fs)
+    tables = None
+    try:
+        cached = np.load(path)
+        if (cached.shape == (2, table_bands, table_size + 1)) and (cached.dtype == np.float32):
+            tables = cached
+    except (OSError, ValueError):
+        pass
+    if tables is None:
+        tables = build_tables(fs)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.save(path, tables)
+        except OSError:
+            pass
+    tables = np.ascontiguousarray(tables)
+    loaded_tables[key] = tables
+    return tables
+
+#numba DSP - table reads
+#-band for a phase increment (cycles per sample)
+@njit(nogil=True, fastmath=True, cache=True, inline="always")
+def table_band(inc, fs):
+    #octave = binary exponent of freq/band_base (frexp mantissa is 0.5 to 1)
+    octave = math.frexp(abs(inc)*fs*(1.0/band_base))[1] - 1
+    return max(0, min(table_bands - 1, octave))
+
+#-linear interpolated read (phase 0 to 1)
+@njit(nogil=True, fastmath=True, cache=True, inline="always")
+def table_read(table, phase):
+    position = phase*table_size
+    index = int(position)
+    frac = position - index
+    index = min(index, table_size - 1)
+    return table[index] + frac*(table[index + 1] - table[index])
@@ -1,127 +1,175 @@
-from PySide6.QtCore import QRunnable
-import time
 import numpy as np
+import threading
+import time
+import os
+from .rings import SPSCRing
+
+#midi channel message status bytes (high nibble)
+note_off_status = 0x80
+note_on_status = 0x90
+control_change_status = 0xB0
+
+#queued event: perf_counter arrival time & raw channel message (status, data 1, data 2)
+midi_event_dtype = np.dtype([("timestamp", np.float64), ("status", np.uint8), ("data1", np.uint8), ("data2", np.uint8)])
+#block event: frame offset in the current block & raw channel message
+block_event_dtype = np.dtype([("frame", np.int64), ("status", np.int64), ("data1", np.int64), ("data2", np.int64)])
+
+#mido message -> (status, data 1, data 2) | None for messages longer than 3 bytes (sysex)
+def message_bytes(message):
+    data = message.bytes()
+    if len(data) > 3:
+        return None
+    data += [0]*(3 - len(data))
+    return data[0], data[1], data[2]
+
+#[(frame offset, mido message)] -> block event records (offline rendering)
+def event_records(events):
+    records = [(frame,) + data for frame, data in ((frame, message_bytes(message)) for frame, message in events) if data is not None]
+    return np.array(records, dtype=block_event_dtype)
+
+#note/cc event dispatcher
+# producers (midi callback, gui keys) stamp events on the perf_counter clock & push raw bytes into their own SPSC ring
+# the audio callback drains every ring once per block (no polling thread, no locks)
+midi_source = 0
+key_source = 1
+
+class EventDispatcher():
+    def __init__(self, fs, length=1024):
+        self.fs = fs
+        self.rings = [SPSCRing(midi_event_dtype, length) for source in (midi_source, key_source)]
+        self.pending = np.zeros((length*len(self.rings)), dtype=midi_event_dtype)
+        self.events = np.zeros((length*len(self.rings)), dtype=block_event_dtype)   #current block
+        #field views (read & written per event without building record tuples)
+        self.pending_times = self.pending["timestamp"]
+        self.event_frames = self.events["frame"]
+        self.event_bytes = [(self.events[field], self.pending[field]) for field in ("status", "data1", "data2")]
+        #counters
+        self.dispatched = 0
+        self.queue_depth = 0            #events drained by the last block
+        self.max_queue_depth = 0
+        self.dispatch_lag = 0.0         #seconds from arrival to scheduled frame (last event)
+        self.max_dispatch_lag = 0.0
+
+    #producer side (one thread per source)
+    def put(self, message, timestamp=None, source=midi_source):
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        data = message_bytes(message)
+        if data is not None:
+            self.rings[source].push((timestamp,) + data)
+
+    #convert queued events to frame offsets in the block starting now
+    # events are delayed by one block: constant latency, no jitter
+    def drain(self, frames):
+        block_time = time.perf_counter()
+        count = 0
+        sources = 0
+        for ring in self.rings:
+            drained = ring.pop_into(self.pending[count:])
+            count += drained
+            sources += (drained > 0)
+        #merge sources in arrival order
+        if sources > 1:
+            self.pending[:count].sort(order="timestamp", kind="stable")
+        for n in range(0, count):
+            timestamp = self.pending_times[n]
+            event_frame = max(0, min(frames - 1, frames - int((block_time - timestamp)*self.fs)))
+            self.event_frames[n] = event_frame
+            self.dispatch_lag = (block_time - timestamp) + event_frame/self.fs
+            self.max_dispatch_lag = max(self.max_dispatch_lag, self.dispatch_lag)
+        for event_field, pending_field in self.event_bytes:
+            event_field[:count] = pending_field[:count]
+        self.queue_depth = count
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        self.dispatched += self.queue_depth
+        return self.events[:count]
+
+    def get_stats(self):
+        return (self.dispatched, self.queue_depth, self.max_queue_depth, self.dispatch_lag, self.max_dispatch_lag)
+
+    def reset_stats(self):
+        self.max_queue_depth = 0
+        self.max_dispatch_lag = 0.0
+
+#persistent voice render threads (one pool per stream | shared by every part of a MultiEngine)
+# the calling (audio) thread renders the first batch, workers render the rest
+class RenderWorkers():
+    def __init__(self, voices, workers=None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.count = max(1, min(workers, voices))
+        self.running = True
+        self.batches = [[] for n in range(0, self.count)]    #[(bank, voice indices)] per thread
+        self.frames = 0
+        self.wake_events = [threading.Event() for n in range(1, self.count)]
+        self.barrier = threading.Barrier(self.count)
+        #timing stats (seconds, per worker | index 0 = audio thread)
+        self.render_times = np.zeros((self.count), dtype=np.float64)
+        self.max_render_times = np.zeros((self.count), dtype=np.float64)
+        self.batch_sizes = np.zeros((self.count), dtype=np.int64)
+        self.threads = []
+        for n in range(1, self.count):
+            thread = threading.Thread(target=self.run, args=(n,), name=f"subsnake-render-{n}", daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    #render active voices into their banks' outputs (summed by the engine's master bus)
+    # jobs: [(bank, active voice indices)] | the voices of every bank are split into contiguous batches, one per thread
+    def render(self, jobs, frames):
+        active_count = 0
+        for bank, active in jobs:
+            active_count += len(active)
+        self.frames = frames
+        for n in range(0, self.count):
+            start = (n*active_count)//self.count
+            end = ((n + 1)*active_count)//self.count
+            batch = self.batches[n]
+            batch.clear()
+            offset = 0
+            for bank, active in jobs:
+                first = max(0, start - offset)
+                last = min(len(active), end - offset)
+                if last > first:
+                    batch.append((bank, active[first:last]))
+                offset += len(active)
+        for event in self.wake_events:
+            event.set()
+        self.render_batch(0)
+        if self.count > 1:
+            self.barrier.wait()
+
+    def render_batch(self, n):
+        start = time.perf_counter()
+        batch_size = 0
+        for bank, batch in self.batches[n]:
+            bank.render(batch, self.frames)
+            batch_size += len(batch)
+        elapsed = time.perf_counter() - start
+        self.render_times[n] = elapsed
+        self.max_render_times[n] = max(self.max_render_times[n], elapsed)
+        self.batch_sizes[n] = batch_size
+
+    def run(self, n):
+        event = self.wake_events[n - 1]
+        while True:
+            event.wait()
+            event.clear()
+            if not self.running:
+                break
+            try:
+                self.render_batch(n)
+            finally:
+                self.barrier.wait()
+
+    def get_stats(self):
+        return (self.render_times.copy(), self.max_render_times.copy(), self.batch_sizes.copy())
 
-middle_a = 69
-sleeptime = 0.0025
-
-class KeyEventWorker(QRunnable):
-    def __init__(self, engine):
-        super().__init__()
-        self.engine = engine
-        self.midi_queue = engine.midi_in_queue
-        self.frames_queue = engine.frame_times
-        self.frame_width = 0
-        self.frame_start = 0
-        self.frame_end = 0
-        self.frames = 2048
-        self.pending_event = None
-        self.steal_voice = 0
-
-    def run(self):
-        while self.engine.run_threads:
-            if not self.midi_queue.empty():
-                if self.pending_event is None:
-                    self.pending_event = self.midi_queue.get_nowait()
-            if self.pending_event is not None:
-                message, timestamp = self.pending_event
-                target_time = timestamp + self.engine.stream.latency
-                if (target_time >= self.frame_end):
-                    pass    #save pending event for next iteration
-                else:
-                    time_offset = timestamp - self.frame_start
-                    sample_offset = max(0, int((time_offset/self.frame_width)*self.frames))
-                    if (message.type == 'note_on') and (message.channel == self.engine.midi_channel):
-                        if (message.velocity > 0):
-                            self.key_pressed((message.note - middle_a, message.velocity, sample_offset))
-                        else:
-                            self.key_released((message.note - middle_a, sample_offset))
-                    elif (message.type == 'note_off') and (message.channel == self.engine.midi_channel):
-                        self.key_released((message.note - middle_a, sample_offset))
-                    elif (message.type == "control_change") and (message.channel == self.engine.midi_channel):
-                        if (message.control in self.engine.midi_cc_functions):
-                            self.engine.midi_cc_values.update({message.control: message.value})
-                            cc_update_function = self.engine.midi_cc_functions[message.control]
-                            cc_update_function(message.value)
-                    self.pending_event = None
-            if not self.frames_queue.empty():
-                new_frame_times = self.frames_queue.get_nowait()
-                self.frame_width, self.frame_start, self.frame_end, self.frames = new_frame_times
-            time.sleep(sleeptime)
-
-    def key_pressed(self, press_event):
-        note, velocity, sample_offset = press_event
-        new_voice = self.assign_voice(note)
-        if new_voice is not None:
-            new_pitch = 440.0 * 2**((float(note))/12.0 + self.engine.pitch_offset_1) + self.engine.detune_1*new_voice.detune_offset_1
-            new_pitch2 = 440.0 * 2**((float(note))/12.0 + self.engine.pitch_offset_2) + self.engine.detune_2*new_voice.detune_offset_2
-            new_pitch3 = 440.0 * 2**((float(note))/12.0 + self.engine.pitch_offset_3) + self.engine.detune_3*new_voice.detune_offset_3
-            new_voice.base_note = note
-            new_voice.filt.update_base_freq(new_pitch)
-            new_voice.filt2.update_base_freq(new_pitch)
-            new_voice.osc.update_pitch(new_pitch)
-            new_voice.osc2.update_pitch(new_pitch2)
-            new_voice.osc3.update_pitch(new_pitch3)
-            new_voice.velocity = float(velocity)/127.0
-            new_voice.env.update_attack_start(sample_offset)
-            new_voice.env.update_gate(True)
-            new_voice.fenv.update_attack_start(sample_offset)
-            new_voice.fenv.update_gate(True)
-            new_voice.menv1.update_attack_start(sample_offset)
-            new_voice.menv1.update_gate(True)
-            new_voice.menv2.update_attack_start(sample_offset)
-            new_voice.menv2.update_gate(True)
-            new_voice.status = 2
-        self.engine.delay_modulators[2].update_gate(True)
-        self.engine.delay_modulators[3].update_gate(True)
-
-    def key_released(self, release_event):
-        note, sample_offset = release_event
-        for voice in self.engine.voices:
-            if voice.base_note == note: 
-                voice.env.update_release_start(sample_offset)
-                voice.env.update_gate(False)
-                voice.fenv.update_release_start(sample_offset)
-                voice.fenv.update_gate(False)
-                voice.menv1.update_release_start(sample_offset)
-                voice.menv1.update_gate(False)
-                voice.menv2.update_release_start(sample_offset)
-                voice.menv2.update_gate(False)
-                voice.status = 1
-        self.engine.delay_modulators[2].update_gate(False)
-        self.engine.delay_modulators[3].update_gate(False)
-        
-
-    def assign_voice(self, note):
-        for voice in self.engine.voices:           #voice of same note
-            if voice.base_note == note:
-                return voice
-        for voice in self.engine.voices:           #first stopped voice
-            if voice.status == 0:
-                voice = self.reset_voice(voice)
-                return voice
-        for voice in self.engine.voices:           #first releasing voice
-            if voice.status == 1:
-                voice = self.fade_voice(voice)
-                voice = self.reset_voice(voice)
-                return voice
-        self.steal_voice += 1                      #steal voice (round-robin)
-        if self.steal_voice > 11:
-            self.steal_voice = 0
-        voice = self.engine.voices[self.steal_voice]
-        voice = self.fade_voice(voice)
-        voice = self.reset_voice(voice)
-        return voice
-    
-    def fade_voice(self, voice):
-        linear_fade = np.linspace(1.0, 0.0, 100)
-        for n in linear_fade:
-            voice.velocity = voice.velocity*n
-        return voice
-    
-    def reset_voice(self, voice):
-        voice.osc.reset_buffers()
-        voice.osc2.reset_buffers()
-        voice.osc3.reset_buffers()
-        return voice
+    def reset_stats(self):
+        self.max_render_times[:] = 0.0
 
+    def stop(self):
+        self.running = False
+        for event in self.wake_events:
+            event.set()
+        for thread in self.threads:
+            thread.join()
@@ -1,16 +1,20 @@
+import numpy as np
 from PySide6.QtCore import QTimer
+from subsnake.audio.effects import rec_stop
 
 class UpdateGUI(QTimer):
     def __init__(self, engine, window):
         super().__init__()
         self.engine = engine
         self.window = window
-        self.scope = window.scope_group
         self.row_ccs = window.midi_group.row_ccs
         self.cc_values = engine.midi_cc_values
         self.cc_sliders = window.midi_cc_sliders
         self.cc_displays = window.midi_cc_displays
-        self.rec_queue = engine.recorder.event_queue
+        self.rec_events = engine.recorder.event_ring
+        self.rec_event = np.zeros((1), dtype=np.int32)
+        self.meter = window.synth_group
+        self.meter_ticks = 0
         self.setInterval(34)   #~30fps
         self.timeout.connect(self.update_gui)
 
@@ -27,9 +31,8 @@ class UpdateGUI(QTimer):
                     if cc in self.cc_displays:
                         display, module, param = self.cc_displays[cc]
                         self.update_cc_display(display, module, param, scaled_value)
-        if not self.rec_queue.empty():
-            rec_event = self.rec_queue.get_nowait()
-            if rec_event == "stop":
+        if self.rec_events.pop(self.rec_event):
+            if self.rec_event[0] == rec_stop:
                 play_button = self.window.recorder.play_button
                 rec_button = self.window.recorder.record_button
                 del_button = self.window.recorder.delete_button
@@ -45,7 +48,11 @@ class UpdateGUI(QTimer):
         current_mins, current_secs, max_mins, max_secs = engine_recorder.get_time()
         window_recorder.current_time_label.setText(f"{current_mins:02}:{current_secs:02}")
         window_recorder.end_time_label.setText(f"{max_mins:02}:{max_secs:02}")
-        self.scope.update_display()
+        #dsp load meter (~4 updates/s)
+        self.meter_ticks += 1
+        if self.meter_ticks >= 8:
+            self.meter_ticks = 0
+            self.meter.update_meter(self.engine.get_load_stats(), self.engine.get_stage_times())
 
 
     def assign_cc_slider(self, module, param):
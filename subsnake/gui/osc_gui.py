@@ -196,7 +196,7 @@ class OscillatorGUI(QGroupBox):
             )
 
             if title_rect.contains(event.position().toPoint()):
-                if self.type < 1:
+                if self.type < 2:
                     self.type += 1
                 else:
                     self.type = 0
@@ -204,6 +204,8 @@ class OscillatorGUI(QGroupBox):
                     type_text = "BLIT"
                 elif self.type == 1:
                     type_text = "PolyBLEP"
+                elif self.type == 2:
+                    type_text = "Wavetable"
                 self.type_changed.emit(1, self.type)
                 QToolTip.showText(event.globalPos(), type_text)
                 event.accept()
@@ -225,6 +227,8 @@ class OscillatorGUI(QGroupBox):
                     type_text = "BLIT"
                 elif self.type == 1:
                     type_text = "PolyBLEP"
+                elif self.type == 2:
+                    type_text = "Wavetable"
                 QToolTip.showText(event.globalPos(), type_text)
             else:
                 QToolTip.hideText()
@@ -20,7 +20,7 @@ class PatchManager(QGroupBox):
         self.save_patch = QPushButton("save")
         self.new_patch = QPushButton("new")
         self.patch_dialog = NewPatchDialog()
-        self.default_patch = {"osc_drift": 0, "osc_det": 0, "osc_freq": 0, "osc_amp": 500, "osc_width": 250, "osc_wave": "pulse", "osc_type": 0,
+        self.default_patch = {"osc_drift": 0, "osc_unison": 1, "osc_spread": 0, "osc_det": 0, "osc_freq": 0, "osc_amp": 500, "osc_width": 250, "osc_wave": "pulse", "osc_type": 0,
                             "osc2_freq": 0, "osc2_det": 0, "osc2_amp": 0, "osc2_width": 250, "osc2_wave": "saw", "osc2_type": 0,
                             "osc3_freq": 0, "osc3_det": 0, "osc3_amp": 0, "osc3_width": 250, "osc3_wave": "saw", "osc3_type": 0,
                             "osc_pan": 0, "osc2_pan": 0, "osc3_pan": 0,
@@ -167,6 +167,7 @@ class PatchManager(QGroupBox):
         self.current_patch.update({"menv1_mode": menv1_mode_button.text()})
         self.current_patch.update({"menv2_mode": menv2_mode_button.text()})
         self.current_patch.update({"filt_mode": self.modules_dict["filt_group"].mode})
+        self.current_patch.update({"filt_oversample": self.modules_dict["synth_group"].oversample})
         self.current_patch.update({"osc_type": self.modules_dict["osc_group"].type})
         self.current_patch.update({"osc2_type": self.modules_dict["osc2_group"].type})
         self.current_patch.update({"osc3_type": self.modules_dict["osc3_group"].type})
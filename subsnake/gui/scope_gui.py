@@ -1,38 +1,61 @@
 from PySide6.QtCore import QPointF, Qt, QTimer
 from PySide6.QtWidgets import (
     QGroupBox, QGraphicsScene, QSizePolicy, QGraphicsDropShadowEffect,
-    QGraphicsView, QGraphicsPathItem, QGridLayout, QGraphicsItem
+    QGraphicsView, QGridLayout, QGraphicsItem
 )
 from PySide6.QtGui import (
-    QPolygonF, QPainterPath, QPen,
+    QPolygonF, QPen,
     QColor, QPainter
 )
 import shiboken6
 import numpy as np
 from numba import njit
+from subsnake.audio import aot
+from subsnake.audio.compiler import compile_job
 kernel = np.ones(15, dtype=np.float32) / 15.0
+display_length = 2048                       #samples on screen
+trace_length = display_length + 4096        #trigger search window + display window
 
+#scope trace item
+# draws the persistent min/max polygon (written in place by update_display_math) | no path rebuilt per frame
+class ScopeTrace(QGraphicsItem):
+    def __init__(self, rect):
+        super().__init__()
+        self.rect = rect
+        self.polygon = QPolygonF()
+        self.trace_pen = QPen()
+
+    def pen(self):
+        return QPen(self.trace_pen)
+
+    def setPen(self, pen):
+        self.trace_pen = QPen(pen)
+        self.update()
+
+    def boundingRect(self):
+        return self.rect
+
+    def paint(self, painter, option, widget=None):
+        painter.setPen(self.trace_pen)
+        painter.drawPolyline(self.polygon)
+
+#oscilloscope
+# runs on its own timer while visible: reads the last trace_length samples straight from the engine's ring,
+# triggers on a rising zero crossing & decimates the display window to one min/max pair per pixel column
 class ScopeGUI(QGroupBox):
     def __init__(self, scope_buffer, scope_head):
         super().__init__()
         self.scope_buffer = scope_buffer
         self.scope_head = scope_head
-        self.scope_flat = np.copy(self.scope_buffer)
-        self.stable_scope = np.ascontiguousarray(np.zeros((2048, 2), dtype=np.float32))
-        self.x_coords = np.ascontiguousarray(np.arange(2048, dtype=np.float32))
-        self.base_x_coords = np.ascontiguousarray(np.arange(2048, dtype=np.float32))
-        self.valid_crossings = np.ascontiguousarray(np.zeros((2048), dtype=np.int32))
-        self.valid_crossings_count = np.zeros((1), dtype=np.int32)
-
-        self.test_data_x = np.arange(4096)
-        self.test_data_y = np.arange(4096) / 2048.0
+        self.trace = np.ascontiguousarray(np.zeros((trace_length), dtype=np.float32))
+        self.columns = 0
 
         self.scope_timer = QTimer()
         self.scope_timer.setInterval(33) #~30fps
         self.scope_timer.timeout.connect(self.update_display)
 
         self.scope_scene = QGraphicsScene()
-        self.scope_scene.setSceneRect(0.0, 0.0, 2048.0, 2.0)
+        self.scope_scene.setSceneRect(0.0, 0.0, float(display_length), 2.0)
         self.scope_scene.setBackgroundBrush(Qt.GlobalColor.transparent)
         self.scope_view = QGraphicsView(self.scope_scene)
         self.scope_view.setRenderHint(QPainter.Antialiasing)
@@ -43,33 +66,20 @@ class ScopeGUI(QGroupBox):
 
         scope_size_policy = QSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
         self.scope_view.setSizePolicy(scope_size_policy)
-        
-        self.scope_points_list = [self.test_data_x, self.test_data_y]
-        self.scope_points_buffer = np.column_stack(self.scope_points_list)
-        self.scope_points = [QPointF(0.0, 0.0)] * 2048
-        self.scope_polygon = QPolygonF(self.scope_points)
-        _scope_polygon = self.scope_polygon.data()
-        sp_bytes = 2048 * 2 * 8
-        scope_polygon_ptr = shiboken6.VoidPtr(_scope_polygon, sp_bytes, True)
-        self.scope_polygon_view = np.frombuffer(scope_polygon_ptr, dtype=np.float64).reshape(2048, 2)
-        self.scope_polygon_view[:, 0] = self.x_coords
-
-        self.scope_painter_path = QPainterPath()
-        self.scope_painter_path.addPolygon(self.scope_polygon)
 
         self.scope_pen = QPen(QColor("#b4b4d2"))
         self.scope_pen.setWidth(2)
         self.scope_pen.setCosmetic(True)
         self.scope_pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
-        self.scope_path = QGraphicsPathItem(self.scope_painter_path)
+        self.scope_path = ScopeTrace(self.scope_scene.sceneRect())
         self.scope_path.setPen(self.scope_pen)
+        self.set_columns(256)
 
         self.scope_glow = QGraphicsDropShadowEffect()
         self.scope_glow.setOffset(0.0, 0.0)
         self.scope_glow.setBlurRadius(12)
         self.scope_glow.setColor(QColor("#b4b4d2"))
         self.scope_path.setGraphicsEffect(self.scope_glow)
-        self.scope_path.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
 
         self.scope_scene.addItem(self.scope_path)
 
@@ -79,60 +89,92 @@ class ScopeGUI(QGroupBox):
         self.setLayout(layout)
         self.setTitle("scope")
         self.setObjectName("scope_group")
-        
-        ScopeGUI.update_display_math(self.base_x_coords, self.scope_flat, self.stable_scope, self.x_coords, self.valid_crossings, self.valid_crossings_count)
+
+    #one min/max point pair per column | the polygon is reallocated only when the width changes
+    def set_columns(self, columns):
+        columns = max(1, min(display_length, columns))
+        if columns == self.columns:
+            return
+        self.columns = columns
+        self.scope_polygon = QPolygonF([QPointF(0.0, 1.0)] * (2*columns))
+        sp_bytes = 2*columns * 2 * 8
+        scope_polygon_ptr = shiboken6.VoidPtr(self.scope_polygon.data(), sp_bytes, True)
+        self.scope_polygon_view = np.frombuffer(scope_polygon_ptr, dtype=np.float64).reshape(2*columns, 2)
+        self.scope_path.polygon = self.scope_polygon
 
     def update_display(self):
-            np.concatenate((self.scope_buffer[self.scope_head[0]:], self.scope_buffer[:self.scope_head[0]]), axis=0, out=self.scope_flat)
-            self.update_display_math(self.base_x_coords, self.scope_flat,
-                                     self.stable_scope, self.x_coords, self.valid_crossings, self.valid_crossings_count)
-            self.scope_points_list[1] = np.mean(self.stable_scope, axis=1)
-            self.scope_polygon_view[:, 0] = self.x_coords
-            self.scope_polygon_view[:, 1] = self.scope_points_list[1] + 1.0
-            self.scope_painter_path = QPainterPath()
-            self.scope_painter_path.addPolygon(self.scope_polygon)
-            self.scope_path.setPath(self.scope_painter_path)
+        update_display_math_entry(self.scope_buffer, self.scope_head[0], self.trace, self.scope_polygon_view, self.columns)
+        self.scope_path.update()
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
         self.scope_view.fitInView(self.scope_scene.sceneRect(), Qt.IgnoreAspectRatio)
+        self.set_columns(self.scope_view.viewport().width())
 
     def showEvent(self, event):
         super().showEvent(event)
         self.scope_view.fitInView(self.scope_scene.sceneRect(), Qt.IgnoreAspectRatio)
+        self.set_columns(self.scope_view.viewport().width())
+        self.scope_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.scope_timer.stop()
 
     @staticmethod
     @njit(nogil=True, fastmath=True, cache=True)
-    def update_display_math(base_x_coords, scope_flat, stable_scope, x_coords, valid_crossings, vc_count):
-        search_start = max(0, len(scope_flat) - 6144)
-        search_end = len(scope_flat) - 2048
-        search_window = np.sum(scope_flat[search_start:search_end], axis=1)
-
-        smoothed_window = np.convolve(search_window, kernel, mode="same")
+    def update_display_math(scope_buffer, head, trace, polygon, columns):
+        #last trace_length samples (channel sum) straight from the ring
+        buffer_length = len(scope_buffer)
+        trace_length = len(trace)
+        for i in range(0, trace_length):
+            index = (head - trace_length + i) % buffer_length
+            trace[i] = scope_buffer[index, 0] + scope_buffer[index, 1]
+        search_end = trace_length - display_length
+        smoothed_window = np.convolve(trace[:search_end], kernel, mode="same")
 
         peak_amp = np.max(np.abs(smoothed_window))
         hysteresis_thresh = -0.1*peak_amp if peak_amp > 0 else -.01
-            
-        zero_crossings = np.where((smoothed_window[:-1] <= 0) & (smoothed_window[1:] > 0))[0]
-
-        vc_count[0] = 0
-        for c in zero_crossings:
-            lookback = smoothed_window[max(0, c - 1000):c]
-            if len(lookback) > 0 and np.min(lookback) < hysteresis_thresh:
-                valid_crossings[vc_count[0]] = c
-                vc_count[0] += 1
-
-        if vc_count[0] > 0:
-            last_crossing_index = valid_crossings[vc_count[0]-1]
-            y1 = smoothed_window[last_crossing_index]
-            y2 = smoothed_window[last_crossing_index + 1]
-            fraction = (0.0 - y1) / (y2 - y1) if y2 != y1 else 0.0
-            trigger_index = last_crossing_index + search_start
-            stable_scope[:] = scope_flat[trigger_index:trigger_index + 2048]
-            x_coords[:] = base_x_coords[:] - fraction
-        else:
-            stable_scope[:] = scope_flat[-2048:]
-            x_coords[:] = base_x_coords[:]
-        
-
-        
\ No newline at end of file
+
+        #last rising zero crossing preceded (within 1000 samples) by a dip below the threshold
+        trigger_index = search_end
+        fraction = 0.0
+        for c in range(search_end - 2, 0, -1):
+            if (smoothed_window[c] <= 0) and (smoothed_window[c + 1] > 0):
+                if np.min(smoothed_window[max(0, c - 1000):c]) < hysteresis_thresh:
+                    y1 = smoothed_window[c]
+                    y2 = smoothed_window[c + 1]
+                    fraction = (0.0 - y1) / (y2 - y1) if y2 != y1 else 0.0
+                    trigger_index = c
+                    break
+
+        #min/max pair per column (channel mean, 0..2 scene units)
+        # each pair starts at the end nearest the previous point (no zigzag reversals to stroke)
+        column_width = display_length / columns
+        last = trace[trigger_index]
+        for column in range(0, columns):
+            start = trigger_index + (column*display_length)//columns
+            end = trigger_index + ((column + 1)*display_length)//columns
+            low = trace[start]
+            high = trace[start]
+            for i in range(start + 1, end):
+                low = min(low, trace[i])
+                high = max(high, trace[i])
+            if abs(last - low) > abs(last - high):
+                low, high = high, low
+            last = high
+            x = (column + 0.5)*column_width - fraction
+            polygon[2*column, 0] = x
+            polygon[2*column, 1] = 0.5*low + 1.0
+            polygon[2*column + 1, 0] = x
+            polygon[2*column + 1, 1] = 0.5*high + 1.0
+
+
+#python-level entry point (aot build when available)
+update_display_math_entry = aot.kernel(ScopeGUI.update_display_math, "void(float32[:, :], int64, float32[:], float64[:, :], int64)")
+
+#compile job (see subsnake/audio/compiler.py)
+@compile_job(update_display_math_entry)
+def compile_update_display_math():
+    update_display_math_entry(np.zeros((16384, 2), dtype=np.float32), 0, np.zeros((trace_length), dtype=np.float32),
+                              np.zeros((512, 2), dtype=np.float64), 256)
@@ -1,6 +1,6 @@
 from PySide6.QtWidgets import (
     QGroupBox, QGridLayout, QPushButton,
-    QLabel, QSlider, QLCDNumber,
+    QLabel, QSlider, QLCDNumber, QComboBox,
     QDialog, QDialogButtonBox, QLineEdit
 )
 from PySide6.QtCore import Signal, Qt
@@ -13,6 +13,11 @@ class SynthSettings(QGroupBox):
     drift_changed = Signal(float)
     key_tracking_changed = Signal(float)
     key_velocity_changed = Signal(int)
+    latency_changed = Signal(int)
+    oversample_changed = Signal(int)
+    unison_changed = Signal(int)
+    spread_changed = Signal(float)
+    meter_reset = Signal()
 
     def __init__(self, display_color=QColor("black")):
         super().__init__()
@@ -22,6 +27,11 @@ class SynthSettings(QGroupBox):
         drift_label = QLabel("osc drift:")
         key_tracking_label = QLabel("key tracking:")
         key_velocity_label = QLabel("key velocity:")
+        latency_label = QLabel("block size:")
+        oversample_label = QLabel("filter os:")
+        unison_label = QLabel("unison:")
+        spread_label = QLabel("spread:")
+        meter_label = QLabel("dsp load:")
 
         self.drift_slider = QSlider(Qt.Horizontal)
         self.drift_slider.setRange(0, 1000)
@@ -37,6 +47,31 @@ class SynthSettings(QGroupBox):
         self.key_velocity_slider.setRange(0, 127)
         self.key_velocity_slider.setSingleStep(1)
         self.key_velocity_slider.setValue(127)
+
+        #oscillator unison copies (1 = off) & detune/stereo spread
+        self.unison_slider = QSlider(Qt.Horizontal)
+        self.unison_slider.setRange(1, 8)
+        self.unison_slider.setSingleStep(1)
+        self.unison_slider.setValue(1)
+
+        self.spread_slider = QSlider(Qt.Horizontal)
+        self.spread_slider.setRange(0, 1000)
+        self.spread_slider.setSingleStep(1)
+        self.spread_slider.setValue(0)
+
+        #stream block size (auto = device default, high latency)
+        self.latency_select = QComboBox()
+        self.latency_select.setEditable(False)
+        self.latency_select.setFocusPolicy(Qt.NoFocus)
+        self.latency_select.addItems(["auto", "64", "128", "256", "512", "1024"])
+
+        #chamberlin filter oversampling (auto = adaptive)
+        self.oversample = 8
+        self.oversample_select = QComboBox()
+        self.oversample_select.setEditable(False)
+        self.oversample_select.setFocusPolicy(Qt.NoFocus)
+        self.oversample_select.addItems(["auto", "1x", "2x", "4x", "8x"])
+        self.oversample_select.setCurrentText("8x")
      
         self.drift_display = self.configure_display(ClickLCD(), 3, QLCDNumber.Dec, QLCDNumber.Flat, True)
         self.set_palette(self.drift_display)
@@ -47,6 +82,19 @@ class SynthSettings(QGroupBox):
         self.key_velocity_display = self.configure_display(ClickLCD(), 3, QLCDNumber.Dec, QLCDNumber.Flat, True)
         self.set_palette(self.key_velocity_display)
 
+        self.unison_display = self.configure_display(ClickLCD(), 3, QLCDNumber.Dec, QLCDNumber.Flat, True)
+        self.set_palette(self.unison_display)
+
+        self.spread_display = self.configure_display(ClickLCD(), 3, QLCDNumber.Dec, QLCDNumber.Flat, True)
+        self.set_palette(self.spread_display)
+
+        #dsp load meter (% of the block deadline, max since reset) & xrun count | double click to reset
+        self.load_display = self.configure_display(ClickLCD(), 3, QLCDNumber.Dec, QLCDNumber.Flat, True)
+        self.set_palette(self.load_display)
+
+        self.xrun_display = self.configure_display(ClickLCD(), 3, QLCDNumber.Dec, QLCDNumber.Flat, True)
+        self.set_palette(self.xrun_display)
+
         layout = QGridLayout()
 
         layout.addWidget(drift_label, 0, 0)
@@ -60,6 +108,24 @@ class SynthSettings(QGroupBox):
         layout.addWidget(key_velocity_label, 2, 0)
         layout.addWidget(self.key_velocity_slider, 2, 1)
         layout.addWidget(self.key_velocity_display, 2, 2)
+
+        layout.addWidget(latency_label, 3, 0)
+        layout.addWidget(self.latency_select, 3, 1, 1, 2)
+
+        layout.addWidget(oversample_label, 4, 0)
+        layout.addWidget(self.oversample_select, 4, 1, 1, 2)
+
+        layout.addWidget(unison_label, 5, 0)
+        layout.addWidget(self.unison_slider, 5, 1)
+        layout.addWidget(self.unison_display, 5, 2)
+
+        layout.addWidget(spread_label, 6, 0)
+        layout.addWidget(self.spread_slider, 6, 1)
+        layout.addWidget(self.spread_display, 6, 2)
+
+        layout.addWidget(meter_label, 7, 0)
+        layout.addWidget(self.load_display, 7, 1)
+        layout.addWidget(self.xrun_display, 7, 2)
         
         self.setLayout(layout)
         self.setObjectName("synth_group")
@@ -74,6 +140,18 @@ class SynthSettings(QGroupBox):
         self.key_velocity_slider.valueChanged.connect(self.change_key_velocity)
         self.key_velocity_display.double_clicked.connect(self.reset_key_velocity)
 
+        self.latency_select.currentTextChanged.connect(self.change_latency)
+        self.oversample_select.currentTextChanged.connect(self.change_oversample)
+
+        self.unison_slider.valueChanged.connect(self.change_unison)
+        self.unison_display.double_clicked.connect(self.reset_unison)
+
+        self.spread_slider.valueChanged.connect(self.change_spread)
+        self.spread_display.double_clicked.connect(self.reset_spread)
+
+        self.load_display.double_clicked.connect(self.meter_reset)
+        self.xrun_display.double_clicked.connect(self.meter_reset)
+
     def change_drift(self, value):
         norm_value = float(value)/100.0
         self.drift_display.display(f"{norm_value:.2f}")
@@ -97,6 +175,53 @@ class SynthSettings(QGroupBox):
     def reset_key_velocity(self):
         self.key_velocity_slider.setValue(127)
 
+    def change_latency(self, text):
+        if text == "auto":
+            self.latency_changed.emit(0)
+        else:
+            self.latency_changed.emit(int(text))
+
+    def change_oversample(self, text):
+        if text == "auto":
+            self.oversample = 0
+        else:
+            self.oversample = int(text.removesuffix("x"))
+        self.oversample_changed.emit(self.oversample)
+
+    def set_oversample(self, factor):
+        if factor == 0:
+            self.oversample_select.setCurrentText("auto")
+        else:
+            self.oversample_select.setCurrentText(f"{factor}x")
+
+    def change_unison(self, value):
+        self.unison_display.display(f"{value}")
+        self.unison_changed.emit(value)
+
+    def reset_unison(self):
+        self.unison_slider.setValue(1)
+
+    def change_spread(self, value):
+        norm_value = float(value)/1000.0
+        self.spread_display.display(f"{norm_value:.2f}")
+        self.spread_changed.emit(norm_value)
+
+    def reset_spread(self):
+        self.spread_slider.setValue(0)
+
+    #load_stats: (mean load, max load, max load since reset, xruns, callbacks) | stage_times: stage -> mean seconds
+    def update_meter(self, load_stats, stage_times):
+        mean_load, max_load, peak_load, xruns, callbacks = load_stats
+        self.load_display.display(f"{min(mean_load*100.0, 999.0):.0f}")
+        self.xrun_display.display(f"{min(xruns, 999)}")
+        #per-stage mean time & share of the rendered time (stages in render order, see subsnake/audio/meter.py)
+        stage_total = max(sum(stage_times.values()), 1e-9)
+        stage_lines = "\n".join(f"{name}: {seconds*1e6:.0f} us ({seconds/stage_total*100.0:.0f}%)" for name, seconds in stage_times.items())
+        tooltip = (f"load: {mean_load*100.0:.1f}% (max {max_load*100.0:.1f}%, peak {peak_load*100.0:.1f}%)\n"
+                   f"xruns: {xruns}\n{stage_lines}")
+        self.load_display.setToolTip(tooltip)
+        self.xrun_display.setToolTip(tooltip)
+
     #helpers
     def configure_display(self, display, num_digits, num_mode, dig_style, small_dec):
         display.setMode(num_mode)
@@ -14,13 +14,15 @@ from subsnake.gui.patch import PatchManager
 from subsnake.gui.record import RecorderGUI
 from subsnake.gui.mod_gui import ModulatorGUI
 from subsnake.gui.scope_gui import ScopeGUI
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QColor, QPalette
 from PySide6.QtWidgets import (
     QMainWindow, QGridLayout, QApplication,
     QFrame, QWidget, QGraphicsDropShadowEffect,
     QPushButton, QHBoxLayout, 
     QStackedLayout, QButtonGroup, QGroupBox)
+from subsnake.audio.engine import patch_defaults
+from subsnake.audio.compiler import kernels_ready, compile_progress
 from importlib import resources
 
 key_conv = Keys()
@@ -198,6 +200,7 @@ class MainWindow(QMainWindow):
         self.modules_dict.update({"fenv_group": self.fenv_group})
         self.modules_dict.update({"del_group": self.del_group})
         self.modules_dict.update({"mod_group": self.osc2_group})
+        self.modules_dict.update({"synth_group": self.synth_group})
 
         #module drop shadows
         self.osc_view.setGraphicsEffect(self.osc_drop_shadow)
@@ -474,6 +477,11 @@ class MainWindow(QMainWindow):
         self.synth_group.drift_changed.connect(self.update_osc_drift)
         self.synth_group.key_tracking_changed.connect(self.update_key_tracking)
         self.synth_group.key_velocity_changed.connect(self.update_key_velocity)
+        self.synth_group.latency_changed.connect(self.update_latency)
+        self.synth_group.oversample_changed.connect(self.update_filt_oversample)
+        self.synth_group.unison_changed.connect(self.update_osc_unison)
+        self.synth_group.spread_changed.connect(self.update_osc_spread)
+        self.synth_group.meter_reset.connect(self.engine.reset_load_stats)
 
         self.setCentralWidget(window_widget)
 
@@ -492,7 +500,27 @@ class MainWindow(QMainWindow):
 
         self.patch_manager.load_patch(self.patch_manager.patch_select.currentText())
 
+        #loading state while the dsp kernels compile in the background (see subsnake/audio/compiler.py)
+        self.window_widget = window_widget
+        self.loading_timer = QTimer()
+        self.loading_timer.setInterval(100)
+        self.loading_timer.timeout.connect(self.update_loading)
+        if not kernels_ready.is_set():
+            window_widget.setEnabled(False)
+            self.update_loading()
+            self.loading_timer.start()
+
     #helper functions
+    #kernel compile progress (window title) | enable the window once ready
+    def update_loading(self):
+        if kernels_ready.is_set():
+            self.loading_timer.stop()
+            self.window_widget.setEnabled(True)
+            self.setWindowTitle("subsnake")
+        else:
+            done, total = compile_progress()
+            self.setWindowTitle(f"subsnake (loading: {done}/{total} kernels)")
+
     # args: QLCDDisplay widget, # of digits, mode (hex, dec, oct, bin),
     # dig_style (outline, filled, flat), small decimal flag (for floats)
     def configure_display(self, display, num_digits, num_mode, dig_style, small_dec):
@@ -579,6 +607,8 @@ class MainWindow(QMainWindow):
         self.param_sliders.update({"menv2_rel": self.mod_group.menv_rel_slider_2})
 
         self.param_sliders.update({"osc_drift": self.synth_group.drift_slider})
+        self.param_sliders.update({"osc_unison": self.synth_group.unison_slider})
+        self.param_sliders.update({"osc_spread": self.synth_group.spread_slider})
         self.param_sliders.update({"kt_amt": self.synth_group.key_tracking_slider})
         self.param_sliders.update({"kv_amt": self.synth_group.key_velocity_slider})
     
@@ -647,6 +677,8 @@ class MainWindow(QMainWindow):
         
 
     def load_patch(self, patch):
+        #keys missing from older patches (see subsnake/audio/engine.py)
+        patch = patch_defaults | patch
         for param in patch:
             if param in self.param_sliders:
                 self.param_sliders[param].setValue(patch[param])
@@ -667,6 +699,8 @@ class MainWindow(QMainWindow):
                 self.filt_group.update_type(patch[param])
             elif param == "filt_mode":
                 self.filt_group.update_mode(patch[param])
+            elif param == "filt_oversample":
+                self.synth_group.set_oversample(patch[param])
             elif param == "lfo1_shape":
                 self.mod_group.set_lfo1_shape(patch[param])
             elif param == "lfo2_shape":
@@ -837,8 +871,12 @@ class MainWindow(QMainWindow):
         self.set_palette(self.mod_group.menv_rel_display_2)
         #synth settings
         self.set_palette(self.synth_group.drift_display)
+        self.set_palette(self.synth_group.unison_display)
+        self.set_palette(self.synth_group.spread_display)
         self.set_palette(self.synth_group.key_tracking_display)
         self.set_palette(self.synth_group.key_velocity_display)
+        self.set_palette(self.synth_group.load_display)
+        self.set_palette(self.synth_group.xrun_display)
 
     #slots
     # toggle dark mode
@@ -991,6 +1029,9 @@ class MainWindow(QMainWindow):
     def update_filt_mode(self, newMode):
         self.engine.update_mode(newMode)
 
+    def update_filt_oversample(self, factor):
+        self.engine.update_oversample(factor)
+
     # oscillator select
     def update_osc_select(self, button):
         button_text = button.text()
@@ -1176,12 +1217,25 @@ class MainWindow(QMainWindow):
     def update_osc_drift(self, value):
         self.engine.update_osc_drift(value)
 
+    def update_osc_unison(self, value):
+        self.engine.update_osc_unison(value)
+
+    def update_osc_spread(self, value):
+        self.engine.update_osc_spread(value)
+
     def update_key_tracking(self, value):
         self.engine.update_key_tracking(value)
 
     def update_key_velocity(self, value):
         self.key_velocity = value
 
+    #stream block size (0 = device default)
+    def update_latency(self, block_size):
+        if block_size == 0:
+            self.engine.set_latency(None)
+        else:
+            self.engine.set_latency(block_size)
+
     # process pc keyboard press events (chromatic)
     def keyPressEvent(self, event):
         if (event.isAutoRepeat()):